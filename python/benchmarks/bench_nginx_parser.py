@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark: split-based nginx fast path vs the regex + strptime path
+
+Usage:
+    python3 -m benchmarks.bench_nginx_parser --lines 2000000
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from parsers.nginx_parser import NginxParser
+from benchmarks.generators import generate_nginx_log
+
+
+def bench_regex(parser: NginxParser, lines):
+    """Original per-line path: regex match, groupdict, strptime, '-' scan"""
+    count = 0
+    for line in lines:
+        match = parser.LOG_PATTERN.match(line)
+        if match:
+            log_entry = match.groupdict()
+            log_entry['status'] = int(log_entry['status'])
+            log_entry['body_bytes_sent'] = int(log_entry['body_bytes_sent'])
+            log_entry['time_local'] = parser._parse_nginx_timestamp(log_entry['time_local'])
+            for key, value in log_entry.items():
+                if value == '-':
+                    log_entry[key] = None
+            count += 1
+    return count
+
+
+def bench_fast(parser: NginxParser, lines):
+    """Split-based tokenizer with cached timestamps, tuple output"""
+    parse = parser._line_parser.parse
+    count = 0
+    for line in lines:
+        if parse(line) is not None:
+            count += 1
+    return count
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    arg_parser.add_argument("--lines", type=int, default=2000000, help="生成的日志行数")
+    arg_parser.add_argument("--file", default=None, help="使用已有日志文件而非生成")
+    args = arg_parser.parse_args()
+
+    file_path = args.file
+    if not file_path:
+        fd, file_path = tempfile.mkstemp(suffix='.log')
+        os.close(fd)
+        print(f"生成 {args.lines} 行测试日志: {file_path}")
+        generate_nginx_log(file_path, args.lines)
+
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+
+        parser = NginxParser()
+        # Both paths must agree before timing means anything
+        for line in lines[:10000]:
+            assert parser._line_parser.parse(line) == parser._parse_line_regex(line), line
+
+        results = {}
+        for name, func in (('regex', bench_regex), ('fast', bench_fast)):
+            start = time.perf_counter()
+            count = func(NginxParser(), lines)
+            elapsed = time.perf_counter() - start
+            results[name] = elapsed
+            print(f"{name:>6}: {count} 行, {elapsed:.2f}s, {count / elapsed:,.0f} 行/秒")
+
+        print(f"加速比: {results['regex'] / results['fast']:.2f}x")
+    finally:
+        if not args.file:
+            os.remove(file_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite: per-phase load throughput and peak memory of every parser
+
+Each case (dataset x size) runs in a fresh process, so peak RSS belongs to
+that case alone. Results are written as JSON and two result files can be
+compared to spot regressions between commits.
+
+Usage:
+    python3 -m benchmarks.bench_suite --sizes 10000,100000 --output results.json
+    python3 -m benchmarks.bench_suite --datasets nginx,json --sizes 1000000 --repeat 3
+    python3 -m benchmarks.bench_suite --compare baseline.json results.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import resource
+except ImportError:  # Not available on Windows; peak RSS is then not reported
+    resource = None
+
+from core.engine import SQLEngine
+from parsers.nginx_parser import NginxParser
+from parsers.csv_parser import CSVParser
+from parsers.json_parser import JSONParser
+from parsers.ndjson_parser import NDJSONParser
+from parsers.json_stream import orjson
+from benchmarks.generators import (generate_nginx_log, generate_csv, generate_json, generate_ndjson,
+                                   NARROW_CSV_COLUMNS, WIDE_CSV_COLUMNS)
+
+
+# Version of the result file layout
+RESULTS_VERSION = 1
+
+DEFAULT_SIZES = [10000, 100000]
+
+# Slowdown (percent) reported as a regression by --compare
+DEFAULT_THRESHOLD = 10.0
+
+TABLE_NAME = 'bench'
+
+_CSV_QUERIES = [
+    f"SELECT name_3, COUNT(*), AVG(amount_2) FROM {TABLE_NAME} GROUP BY name_3",
+    f"SELECT COUNT(*) FROM {TABLE_NAME} WHERE int_1 < 100",
+    f"SELECT MAX(day_4) FROM {TABLE_NAME}",
+]
+_NESTED_QUERIES = [
+    f'SELECT "user.geo.country", COUNT(*) FROM {TABLE_NAME} GROUP BY 1',
+    f"SELECT COUNT(*) FROM {TABLE_NAME} WHERE type = 'purchase'",
+    f"SELECT SUM(json_array_length(items)) FROM {TABLE_NAME}",
+]
+
+# name: (file suffix, generator(path, rows, seed), parser class, queries)
+DATASETS: Dict[str, Tuple[str, Callable[[str, int, int], None], type, List[str]]] = {
+    'nginx': ('.log', lambda path, rows, seed: generate_nginx_log(path, rows, seed), NginxParser, [
+        f"SELECT status, COUNT(*) FROM {TABLE_NAME} GROUP BY status",
+        f"SELECT path, COUNT(*) FROM {TABLE_NAME} GROUP BY path ORDER BY 2 DESC LIMIT 5",
+        f"SELECT AVG(body_bytes_sent) FROM {TABLE_NAME} WHERE status = 200",
+    ]),
+    'csv-narrow': ('.csv', lambda path, rows, seed: generate_csv(path, rows, NARROW_CSV_COLUMNS, seed),
+                   CSVParser, _CSV_QUERIES),
+    'csv-wide': ('.csv', lambda path, rows, seed: generate_csv(path, rows, WIDE_CSV_COLUMNS, seed),
+                 CSVParser, _CSV_QUERIES),
+    'json': ('.json', generate_json, JSONParser, _NESTED_QUERIES),
+    'ndjson': ('.ndjson', generate_ndjson, NDJSONParser, _NESTED_QUERIES),
+}
+
+
+def dataset_path(data_dir: str, dataset: str, rows: int, seed: int) -> str:
+    """Generate the input file of a case unless it already exists, returning its path"""
+    suffix, generate, _, _ = DATASETS[dataset]
+    path = os.path.join(data_dir, f"{dataset}-{rows}-{seed}{suffix}")
+    if not os.path.exists(path):
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"生成 {dataset} 测试数据 ({rows} 行): {path}", file=sys.stderr)
+        partial = path + '.partial'
+        generate(partial, rows, seed)
+        os.replace(partial, path)
+    return path
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_case(dataset: str, file_path: str) -> Dict[str, Any]:
+    """
+    Load one file and run the dataset's queries (called in a fresh process).
+
+    Returns:
+        Row count, seconds per phase, rows/second per phase and peak RSS
+    """
+    _, _, parser_class, queries = DATASETS[dataset]
+    parser = parser_class()
+    engine = SQLEngine(result_cache_bytes=0)
+
+    # Keep stdout for the result line
+    with contextlib.redirect_stdout(sys.stderr):
+        start = time.perf_counter()
+        records = parser.iter_rows(file_path) if parser.supports_rows else parser.iter_records(file_path)
+        rows = engine.load_stream(records, TABLE_NAME)
+        load_seconds = time.perf_counter() - start
+
+        query_seconds = []
+        for sql_query in queries:
+            start = time.perf_counter()
+            engine.execute_query(sql_query)
+            query_seconds.append(time.perf_counter() - start)
+
+    phases = engine.load_timings(TABLE_NAME)
+    phases.pop('index', None)
+    phases['query'] = sum(query_seconds)
+    engine.close()
+    return {
+        'dataset': dataset,
+        'parser': parser.format_name,
+        'rows': rows,
+        'file_bytes': os.path.getsize(file_path),
+        'load_seconds': load_seconds,
+        'load_rows_per_second': rows / load_seconds if load_seconds > 0 else None,
+        'phase_seconds': phases,
+        'phase_rows_per_second': {phase: rows / seconds if seconds > 0 else None
+                                  for phase, seconds in phases.items()},
+        'queries': [{'sql': sql_query, 'seconds': seconds}
+                    for sql_query, seconds in zip(queries, query_seconds)],
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+
+def spawn_case(dataset: str, file_path: str) -> Dict[str, Any]:
+    """Run a case in a child process and return its result"""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.bench_suite', '--run-case', dataset, file_path],
+        cwd=root, stdout=subprocess.PIPE, check=True, text=True
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def environment() -> Dict[str, Any]:
+    """Machine and build details stored with the results"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    return {
+        'commit': commit or None,
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'orjson': orjson is not None,
+    }
+
+
+def run_suite(datasets: List[str], sizes: List[int], repeat: int, seed: int, data_dir: str) -> Dict[str, Any]:
+    """Run every case, keeping the fastest of `repeat` runs"""
+    results = []
+    for rows in sizes:
+        for dataset in datasets:
+            file_path = dataset_path(data_dir, dataset, rows, seed)
+            runs = [spawn_case(dataset, file_path) for _ in range(max(repeat, 1))]
+            best = min(runs, key=lambda run: run['load_seconds'])
+            best['runs'] = len(runs)
+            results.append(best)
+            print_result(best)
+    return {
+        'version': RESULTS_VERSION,
+        'seed': seed,
+        'environment': environment(),
+        'results': results,
+    }
+
+
+def print_result(result: Dict[str, Any]) -> None:
+    """One summary line per case"""
+    phases = ', '.join(f"{phase} {rate:,.0f}" for phase, rate in result['phase_rows_per_second'].items()
+                       if rate is not None)
+    rss = result['peak_rss_bytes']
+    rss_text = f", 峰值内存 {rss / 1024 / 1024:.0f} MB" if rss else ''
+    print(f"{result['dataset']:>10} {result['rows']:>9} 行: 加载 {result['load_seconds']:.2f}s "
+          f"({result['load_rows_per_second']:,.0f} 行/秒; {phases} 行/秒){rss_text}", file=sys.stderr)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> bool:
+    """
+    Print the change of every case present in both result files.
+
+    Returns:
+        True if any load, phase or peak RSS got worse by more than `threshold` percent
+    """
+    old_cases = {(r['dataset'], r['rows']): r for r in baseline['results']}
+    regressed = False
+    for new in current['results']:
+        old = old_cases.get((new['dataset'], new['rows']))
+        if old is None:
+            continue
+        changes = [('load', old['load_seconds'], new['load_seconds'])]
+        changes += [(phase, old['phase_seconds'].get(phase), seconds)
+                    for phase, seconds in new['phase_seconds'].items()]
+        changes.append(('peak_rss', old['peak_rss_bytes'], new['peak_rss_bytes']))
+
+        parts = []
+        for name, before, after in changes:
+            if not before or after is None:
+                continue
+            # Positive = slower / larger
+            change = (after - before) / before * 100
+            flag = ''
+            if change > threshold:
+                flag = ' !'
+                regressed = True
+            parts.append(f"{name} {change:+.1f}%{flag}")
+        print(f"{new['dataset']:>10} {new['rows']:>9} 行: {', '.join(parts)}")
+    return regressed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    arg_parser.add_argument("--datasets", default=','.join(DATASETS),
+                            help=f"逗号分隔的数据集 (默认: 全部, 可选: {', '.join(DATASETS)})")
+    arg_parser.add_argument("--sizes", default=','.join(map(str, DEFAULT_SIZES)),
+                            help="逗号分隔的行数, 如 10000,1000000,10000000 (默认: 10000,100000)")
+    arg_parser.add_argument("--repeat", type=int, default=1, help="每个用例运行次数, 取最快一次 (默认: 1)")
+    arg_parser.add_argument("--seed", type=int, default=42, help="数据生成的随机种子")
+    arg_parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), 'sqltools-bench'),
+                            help="生成数据的目录, 已存在的文件会被复用")
+    arg_parser.add_argument("--output", "-o", default=None, help="将 JSON 结果写入文件 (默认: 标准输出)")
+    arg_parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                            help="比较两个结果文件, 有退化时退出码为 1")
+    arg_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                            help=f"--compare 视为退化的变慢百分比 (默认: {DEFAULT_THRESHOLD:g})")
+    arg_parser.add_argument("--run-case", nargs=2, metavar=("DATASET", "FILE"), help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.run_case:
+        print(json.dumps(run_case(*args.run_case)))
+        return
+
+    if args.compare:
+        with open(args.compare[0], encoding='utf-8') as f:
+            baseline = json.load(f)
+        with open(args.compare[1], encoding='utf-8') as f:
+            current = json.load(f)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+    datasets = [name for name in args.datasets.split(',') if name]
+    unknown = [name for name in datasets if name not in DATASETS]
+    if unknown:
+        arg_parser.error(f"未知数据集: {', '.join(unknown)}")
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+
+    results = run_suite(datasets, sizes, args.repeat, args.seed, args.data_dir)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"结果已写入 {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Synthetic data generators for benchmarks
+"""
+
+import json
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+
+_METHODS = ['GET', 'GET', 'GET', 'POST', 'PUT', 'DELETE']
+_PATHS = ['/', '/index.html', '/api/login', '/api/items', '/api/items/42',
+          '/static/app.js', '/static/style.css', '/health']
+_STATUSES = [200, 200, 200, 200, 301, 304, 404, 500]
+_REFERERS = ['-', 'http://example.com/', 'https://www.google.com/']
+_AGENTS = ['Mozilla/5.0 (X11; Linux x86_64)', 'curl/7.68.0',
+           'Mozilla/5.0 (Windows NT 10.0; Win64; x64)', '-']
+_COUNTRIES = ['DE', 'US', 'FR', 'JP', 'BR', 'IN', 'CN', 'GB']
+_EVENTS = ['click', 'view', 'purchase', 'signup', 'logout']
+_WORDS = ['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta']
+
+# Column counts of the narrow and wide CSV datasets
+NARROW_CSV_COLUMNS = 6
+WIDE_CSV_COLUMNS = 60
+
+
+def generate_nginx_log(file_path: str, lines: int, seed: int = 42,
+                       lines_per_second: int = 50) -> None:
+    """
+    Write a synthetic Nginx access log in combined format.
+
+    Args:
+        file_path: Output path
+        lines: Number of log lines
+        seed: Random seed, so runs are reproducible
+        lines_per_second: Lines sharing each timestamp
+    """
+    rng = random.Random(seed)
+    start = datetime(2023, 10, 10, 0, 0, 0)
+    ips = [f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}"
+           for _ in range(1000)]
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            timestamp = (start + timedelta(seconds=i // lines_per_second)).strftime(
+                '%d/%b/%Y:%H:%M:%S +0000')
+            f.write(
+                f'{rng.choice(ips)} - - [{timestamp}] '
+                f'"{rng.choice(_METHODS)} {rng.choice(_PATHS)} HTTP/1.1" '
+                f'{rng.choice(_STATUSES)} {rng.randrange(100000)} '
+                f'"{rng.choice(_REFERERS)}" "{rng.choice(_AGENTS)}"\n'
+            )
+
+
+def generate_csv(file_path: str, rows: int, columns: int = NARROW_CSV_COLUMNS, seed: int = 42) -> None:
+    """
+    Write a synthetic CSV file with a header row.
+
+    Columns cycle through integer, float, short text and date values, so
+    type inference sees every type the CSV parser produces.
+
+    Args:
+        file_path: Output path
+        rows: Number of data rows
+        columns: Number of columns (at least 1)
+        seed: Random seed, so runs are reproducible
+    """
+    rng = random.Random(seed)
+    kinds = [('id', 'int', 'amount', 'name', 'day')[i % 5] for i in range(max(columns, 1))]
+    header = ','.join(f"{kind}_{i}" for i, kind in enumerate(kinds))
+    start = datetime(2023, 1, 1)
+
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(header + '\n')
+        for row in range(rows):
+            values = []
+            for kind in kinds:
+                if kind == 'id':
+                    values.append(str(row))
+                elif kind == 'int':
+                    values.append(str(rng.randrange(1000)))
+                elif kind == 'amount':
+                    values.append(f"{rng.random() * 1000:.2f}")
+                elif kind == 'name':
+                    values.append(rng.choice(_WORDS))
+                else:
+                    values.append((start + timedelta(days=rng.randrange(365))).strftime('%Y-%m-%d'))
+            f.write(','.join(values) + '\n')
+
+
+def nested_record(rng: random.Random, index: int) -> Dict[str, Any]:
+    """One nested API event: objects three levels deep and an array of items"""
+    return {
+        'id': index,
+        'type': rng.choice(_EVENTS),
+        'ts': 1696896000 + index,
+        'user': {
+            'id': rng.randrange(10000),
+            'name': rng.choice(_WORDS),
+            'geo': {'country': rng.choice(_COUNTRIES), 'lat': round(rng.uniform(-90, 90), 4)},
+        },
+        'items': [{'sku': f"sku-{rng.randrange(500)}", 'qty': rng.randrange(1, 5)}
+                  for _ in range(rng.randrange(4))],
+        'ok': rng.random() < 0.95,
+    }
+
+
+def generate_json(file_path: str, records: int, seed: int = 42) -> None:
+    """
+    Write nested records as one JSON array, one record at a time.
+
+    Args:
+        file_path: Output path
+        records: Number of records
+        seed: Random seed, so runs are reproducible
+    """
+    rng = random.Random(seed)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write('[\n')
+        for i in range(records):
+            if i:
+                f.write(',\n')
+            f.write(json.dumps(nested_record(rng, i)))
+        f.write('\n]\n')
+
+
+def generate_ndjson(file_path: str, records: int, seed: int = 42) -> None:
+    """
+    Write nested records as NDJSON (one JSON object per line).
+
+    Args:
+        file_path: Output path
+        records: Number of records
+        seed: Random seed, so runs are reproducible
+    """
+    rng = random.Random(seed)
+    with open(file_path, 'w', encoding='utf-8') as f:
+        for i in range(records):
+            f.write(json.dumps(nested_record(rng, i)) + '\n')
@@ -2,5 +2,7 @@
 from .engine import SQLEngine
 from .schema import SchemaInference
 from .registry import registry, ParserRegistry
+from .cache import TableCache
+from .lazy import LazyEngine
 
-__all__ = ['SQLEngine', 'SchemaInference', 'registry', 'ParserRegistry']
+__all__ = ['SQLEngine', 'SchemaInference', 'registry', 'ParserRegistry', 'TableCache', 'LazyEngine']
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent on-disk cache of loaded tables keyed by source file fingerprint
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from typing import Any, Dict, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from parsers.base import BaseParser
+    from .engine import SQLEngine
+
+
+# Bump when the on-disk layout or schema inference changes so that
+# databases built by older versions are never reused.
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_MAX_BYTES = 1024 * 1024 * 1024
+
+CACHE_SUFFIX = '.sqlite'
+
+
+def file_fingerprint(file_path: str, parser: 'BaseParser', table_name: str,
+                     options: Optional[Dict[str, Any]] = None, use_hash: bool = False) -> str:
+    """
+    Identify a file's contents as loaded by a given parser.
+
+    Args:
+        file_path: Path to the source file
+        parser: Parser used to load the file
+        table_name: Name of the table the file is loaded into
+        options: Load options that change the table (e.g. indexes)
+        use_hash: Include a SHA-256 of the file contents, not only its
+            size and modification time
+
+    Returns:
+        Hex digest that changes whenever the loaded table would
+    """
+    stat = os.stat(file_path)
+    key = {
+        'cache_version': CACHE_VERSION,
+        'path': os.path.abspath(file_path),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'parser': parser.format_name,
+        'parser_version': parser.format_version,
+        'parser_options': parser.get_fingerprint_options(),
+        'table': table_name,
+        'options': options or {},
+    }
+    if use_hash:
+        key['sha256'] = _hash_file(file_path)
+    encoded = json.dumps(key, sort_keys=True).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def _hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 of the file contents, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TableCache:
+    """
+    Directory of SQLite databases, one per (file fingerprint, parser, table).
+
+    Entries are evicted least-recently-used first once the total size of
+    the directory exceeds `max_bytes`. A hit refreshes the entry's mtime,
+    which is what the LRU order is based on.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+                 use_hash: bool = False):
+        """
+        Args:
+            cache_dir: Directory holding cached databases (created if missing)
+            max_bytes: Maximum total size of all cached databases
+            use_hash: Include a SHA-256 of the file contents in the key
+        """
+        self.cache_dir = os.path.abspath(os.path.expanduser(cache_dir))
+        self.max_bytes = max_bytes
+        self.use_hash = use_hash
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def fingerprint(self, file_path: str, parser: 'BaseParser', table_name: str,
+                    options: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Compute the cache key for a file loaded by a given parser.
+
+        Args:
+            file_path: Path to the source file
+            parser: Parser used to load the file
+            table_name: Name of the table in the cached database
+            options: Load options that change the database (e.g. indexes)
+
+        Returns:
+            Hex digest identifying the cache entry
+        """
+        return file_fingerprint(file_path, parser, table_name, options, self.use_hash)
+
+    def entry_path(self, key: str) -> str:
+        """Return the database path for a cache key"""
+        return os.path.join(self.cache_dir, key + CACHE_SUFFIX)
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        Find a cached database and mark it as recently used.
+
+        Returns:
+            Path to the cached database, or None on a miss
+        """
+        path = self.entry_path(key)
+        if not os.path.isfile(path):
+            return None
+        os.utime(path)
+        return path
+
+    def store(self, key: str, engine: 'SQLEngine', table_name: str) -> str:
+        """
+        Persist one of the engine's tables under `key` and evict old entries.
+
+        The database is written to a temporary file first and renamed into
+        place, so concurrent readers never see a partially written entry.
+
+        Returns:
+            Path to the cached database
+        """
+        path = self.entry_path(key)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+        os.close(fd)
+        try:
+            engine.save_table(table_name, tmp_path)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self.evict(keep=path)
+        return path
+
+    def invalidate(self, key: str) -> None:
+        """Remove a cache entry if present"""
+        path = self.entry_path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def evict(self, keep: Optional[str] = None) -> None:
+        """
+        Delete least-recently-used entries until the cache fits in max_bytes.
+
+        Args:
+            keep: Entry that must not be evicted (e.g. the one just stored)
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
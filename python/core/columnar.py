@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Columnar query results: one array per column instead of row tuples
+"""
+
+import sqlite3
+from array import array
+from typing import Any, Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+
+DEFAULT_FETCH_SIZE = 10000
+
+# Column kinds in promotion order
+KIND_INT = 0
+KIND_FLOAT = 1
+KIND_OBJECT = 2
+
+_NAN = float('nan')
+
+
+class _ColumnBuffer:
+    """
+    Growable buffer for one result column.
+
+    Integers go to array('q') and floats to array('d'); the buffer is
+    promoted int -> float (NULL becomes NaN) -> object list as values
+    require, so numeric columns never hold Python objects per value.
+    """
+
+    def __init__(self):
+        self.kind = KIND_INT
+        self.values: Any = array('q')
+
+    def extend(self, values: Sequence[Any]) -> None:
+        if self.kind != KIND_OBJECT:
+            size = len(self.values)
+            try:
+                # Fast path: the whole batch fits the current array type
+                self.values.extend(values)
+                return
+            except (TypeError, OverflowError):
+                del self.values[size:]
+
+        kind = self._batch_kind(values)
+        if kind > self.kind:
+            self._promote(kind)
+
+        if self.kind == KIND_FLOAT:
+            self.values.extend(_NAN if value is None else value for value in values)
+        else:
+            self.values.extend(values)
+
+    @staticmethod
+    def _batch_kind(values: Sequence[Any]) -> int:
+        kind = KIND_INT
+        for value in values:
+            if value is None or isinstance(value, float):
+                kind = KIND_FLOAT
+            elif not isinstance(value, int):
+                return KIND_OBJECT
+            elif not -2 ** 63 <= value < 2 ** 63:
+                return KIND_OBJECT
+        return kind
+
+    def _promote(self, kind: int) -> None:
+        if kind == KIND_FLOAT:
+            self.values = array('d', self.values)
+        elif self.kind == KIND_FLOAT:
+            # NaN stood in for NULL; restore None in the object list
+            self.values = [None if value != value else value for value in self.values]
+        else:
+            self.values = list(self.values)
+        self.kind = kind
+
+    def finish(self) -> Any:
+        """Return a NumPy array when available, else the array/list itself"""
+        if np is None:
+            return self.values
+        if self.kind == KIND_INT:
+            return np.frombuffer(self.values, dtype=np.int64)
+        if self.kind == KIND_FLOAT:
+            return np.frombuffer(self.values, dtype=np.float64)
+        result = np.empty(len(self.values), dtype=object)
+        result[:] = self.values
+        return result
+
+
+def column_names(cursor: sqlite3.Cursor) -> List[str]:
+    """Result column names, with duplicates suffixed (_1, _2, ...)"""
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for desc in cursor.description or ():
+        name = desc[0]
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}_{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def fetch_columns(cursor: sqlite3.Cursor, fetch_size: int = DEFAULT_FETCH_SIZE) -> Dict[str, Any]:
+    """
+    Drain an executed cursor into per-column arrays.
+
+    Rows are fetched in batches with fetchmany() and transposed batch by
+    batch, so no list of all row tuples is ever built. Integer columns
+    become int64 arrays, numeric columns with floats or NULLs become
+    float64 arrays (NULL -> NaN), and anything else an object array/list.
+
+    Args:
+        cursor: Cursor on which a query has been executed
+        fetch_size: Rows per fetchmany() call
+
+    Returns:
+        Ordered mapping of column name to NumPy array (or array.array/list
+        when NumPy is not installed)
+    """
+    names = column_names(cursor)
+    buffers = [_ColumnBuffer() for _ in names]
+
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        for buffer, values in zip(buffers, zip(*rows)):
+            buffer.extend(values)
+
+    return {name: buffer.finish() for name, buffer in zip(names, buffers)}
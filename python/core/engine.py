@@ -4,39 +4,471 @@
 SQL query execution engine with interactive REPL
 """
 
+import os
 import sqlite3
-from typing import List, Dict, Any, Optional
-from .schema import SchemaInference
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple, TYPE_CHECKING
+from .schema import SchemaInference, TableStats, DEFAULT_BATCH_SIZE, DEFAULT_SAMPLE_SIZE
+from .incremental import TailIngestor
+from .fileset import FileSetIngestor
+from .multiload import load_concurrently
+from .indexing import choose_auto_indexes, create_index
+from .columnar import fetch_columns, DEFAULT_FETCH_SIZE
+from .result_cache import ResultCache, normalize_sql, is_cacheable, DEFAULT_RESULT_CACHE_BYTES
+from .profiling import StepCounter, query_report
+from .storage import disk_pragmas, LoadedTables, DEFAULT_PAGE_SIZE, DEFAULT_DB_CACHE_BYTES, DEFAULT_MMAP_BYTES
+from .query_pool import QueryPool
+from .repl import ReplMixin
 
+if TYPE_CHECKING:
+    from parsers.base import BaseParser
 
-class SQLEngine:
+
+# PRAGMAs applied to the in-memory database while bulk loading (see
+# SQLEngine._loading). A load writes new tables and nothing survives a
+# crash, so journaling and fsync are pure overhead. The previous settings
+# are restored afterwards, so a failing REPL statement still rolls back.
+LOAD_PRAGMAS = (
+    "PRAGMA journal_mode=OFF",
+    "PRAGMA synchronous=OFF",
+)
+
+
+class SQLEngine(ReplMixin):
     """
     SQL query execution engine with interactive REPL.
     Extracted from query_json_with_sql() in jsonsql.py
     """
 
-    def __init__(self):
+    def __init__(self, db_path: Optional[str] = None,
+                 result_cache_bytes: int = DEFAULT_RESULT_CACHE_BYTES,
+                 page_size: int = DEFAULT_PAGE_SIZE,
+                 db_cache_bytes: int = DEFAULT_DB_CACHE_BYTES,
+                 mmap_bytes: int = DEFAULT_MMAP_BYTES):
+        """
+        Args:
+            db_path: Build into this on-disk database file instead of memory
+            result_cache_bytes: Bound on the results of execute_query() kept
+                for repeated queries (0 = no result cache)
+            page_size: Page size of a new on-disk database
+            db_cache_bytes: SQLite page cache of an on-disk database
+            mmap_bytes: Memory-mapped I/O size of an on-disk database
+        """
+        self.db_path = db_path
+        self.page_size = page_size
+        self.db_cache_bytes = db_cache_bytes
+        self.mmap_bytes = mmap_bytes
         self.conn: Optional[sqlite3.Connection] = None
         self.cursor: Optional[sqlite3.Cursor] = None
+        # Column statistics gathered while loading, per table
+        self.table_stats: Dict[str, TableStats] = {}
+        self.result_cache = ResultCache(result_cache_bytes) if result_cache_bytes > 0 else None
+        # Incremented by every load and write through this engine
+        self.data_version = 0
+        # Column names of a result served from the cache (the cursor did not run it)
+        self._cached_columns: Optional[List[str]] = None
+        # Count VM steps and capture the plan of every execute_query() call
+        self.profiling = False
+        # Print the wall time of every REPL query
+        self.timer = False
+        # Report of the last execute_query() call (see profiling.query_report)
+        self.last_query: Optional[Dict[str, Any]] = None
+        # file: URI of the on-disk main database (None = in memory)
+        self.database_uri: Optional[str] = None
+        # (uri, alias) of every attached database
+        self.attached: List[Tuple[str, str]] = []
+        # Read-only connections of execute_many(), and the file and data
+        # version of the snapshot they read for an in-memory database
+        self._pool: Optional[QueryPool] = None
+        self._snapshot_path: Optional[str] = None
+        self._snapshot_version: Optional[Tuple[int, int]] = None
+
+    def _connect(self) -> None:
+        """
+        Open the database.
+
+        The connection is opened once and shared by every table loaded into
+        this engine, so several files can be queried (and joined) together.
+        """
+        if self.conn:
+            return
 
-    def load_data(self, data: List[Dict[str, Any]], table_name: str = "data") -> None:
+        if self.db_path:
+            # WAL, and memory bounded by the page cache (see core.storage)
+            self.conn = sqlite3.connect(self.db_path)
+            self.cursor = self.conn.cursor()
+            self.database_uri = Path(self.db_path).resolve().as_uri()
+            for pragma in disk_pragmas(self.page_size, self.db_cache_bytes, self.mmap_bytes):
+                self.cursor.execute(pragma)
+            return
+
+        # uri=True so that read-only cached databases can be ATTACHed
+        self.conn = sqlite3.connect(':memory:', uri=True)
+        self.cursor = self.conn.cursor()
+        self.cursor.execute("PRAGMA temp_store=MEMORY")
+
+    @contextmanager
+    def _loading(self) -> Iterator[None]:
+        """
+        Connect, and apply LOAD_PRAGMAS to an in-memory database until the load ends.
+
+        On-disk databases keep their WAL settings (see core.storage).
+        """
+        self._connect()
+        if self.database_uri is not None:
+            yield
+            return
+
+        restore = [f"PRAGMA {name}={self.conn.execute(f'PRAGMA {name}').fetchone()[0]}"
+                   for name in ('journal_mode', 'synchronous')]
+        for pragma in LOAD_PRAGMAS:
+            self.cursor.execute(pragma)
+        try:
+            yield
+        finally:
+            # The journal mode cannot change inside a transaction
+            self.conn.commit()
+            for pragma in restore:
+                self.cursor.execute(pragma)
+
+    def load_data(self, data: List[Dict[str, Any]], table_name: str = "data",
+                  batch_size: int = DEFAULT_BATCH_SIZE,
+                  infer_limit: Optional[int] = None) -> None:
         """
         Load data into in-memory SQLite database.
 
+        An existing table of the same name is replaced.
+
         Args:
             data: List of dictionaries to load
             table_name: Name for the table
+            batch_size: Number of rows inserted per transaction
+            infer_limit: Rows analyzed for column statistics (None = all)
+        """
+        with self._loading():
+            self.cursor.execute(f"DROP TABLE IF EXISTS [{table_name}]")
+
+            start = time.perf_counter()
+            stats = self.table_stats[table_name] = TableStats(infer_limit)
+            count = SchemaInference.create_table_from_data(
+                self.cursor,
+                table_name,
+                data,
+                batch_size,
+                stats
+            )
+        self._report_load(count, table_name, time.perf_counter() - start)
+        self._data_changed()
+
+    def load_stream(self, records: Iterable[Dict[str, Any]], table_name: str = "data",
+                    batch_size: int = DEFAULT_BATCH_SIZE,
+                    sample_size: int = DEFAULT_SAMPLE_SIZE,
+                    infer_limit: Optional[int] = None) -> int:
+        """
+        Load a stream of records into in-memory SQLite database.
+
+        Records are consumed in chunks of `batch_size`, so peak memory does
+        not grow with the size of the input. An existing table of the same
+        name is replaced.
+
+        Args:
+            records: Iterable of dictionaries (e.g. BaseParser.iter_records()),
+                or parsers.rows.Rows (e.g. BaseParser.iter_rows())
+            table_name: Name for the table
+            batch_size: Number of rows inserted per transaction
+            sample_size: Number of leading records used to create the table
+            infer_limit: Rows analyzed for column types and statistics
+                (None = all; types are widened over the analyzed rows)
+
+        Returns:
+            Number of records loaded
+        """
+        with self._loading():
+            self.cursor.execute(f"DROP TABLE IF EXISTS [{table_name}]")
+
+            start = time.perf_counter()
+            stats = self.table_stats[table_name] = TableStats(infer_limit)
+            count = SchemaInference.create_table_from_stream(
+                self.cursor,
+                table_name,
+                records,
+                batch_size,
+                sample_size,
+                stats
+            )
+        self._report_load(count, table_name, time.perf_counter() - start)
+        self._data_changed()
+        return count
+
+    def ingest_tail(self, parser: 'BaseParser', file_path: str, table_name: str = "data",
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+        """
+        Append lines added to a log since the last run to an on-disk table.
+
+        Args:
+            parser: Parser with `supports_tail = True`
+            file_path: Path to the log file
+            table_name: Name for the table
+            batch_size: Number of rows inserted per transaction
+
+        Returns:
+            Number of new records loaded
         """
-        self.conn = sqlite3.connect(':memory:')
+        if not self.db_path:
+            raise RuntimeError("Incremental loading requires an on-disk database (db_path).")
+        self._connect()
+
+        start = time.perf_counter()
+        stats = self.table_stats[table_name] = TableStats()
+        count = TailIngestor(self.conn).ingest(parser, file_path, table_name, batch_size, stats)
+        self._report_load(count, table_name, time.perf_counter() - start)
+        self._data_changed()
+        return count
+
+    def loaded_tables(self) -> LoadedTables:
+        """
+        Bookkeeping of the files loaded in full into the on-disk database.
+
+        Lets a later run reuse a table instead of parsing its unchanged file again.
+        """
+        if not self.db_path:
+            raise RuntimeError("Reusing loaded tables requires an on-disk database (db_path).")
+        self._connect()
+        return LoadedTables(self.conn)
+
+    def list_tables(self) -> List[str]:
+        """Names of the data tables in the main database (bookkeeping tables left out)"""
+        if not self.cursor:
+            return []
+        self.cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' "
+            "AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\' AND name NOT LIKE '\\_sqltools\\_%' ESCAPE '\\' "
+            "ORDER BY name"
+        )
+        return [row[0] for row in self.cursor.fetchall()]
+
+    def ingest_files(self, parser: 'BaseParser', file_paths: List[str], table_name: str = "data",
+                     batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1) -> int:
+        """
+        Load a set of files (e.g. rotated logs) into one table.
+
+        Rows carry the path of their file in a `_source_file` column. With
+        an on-disk database, files loaded by an earlier run are skipped.
+
+        Args:
+            parser: Parser used for every file
+            file_paths: Files to load, in load order
+            table_name: Name for the table
+            batch_size: Number of rows inserted per transaction
+            workers: Number of files parsed concurrently
+
+        Returns:
+            Number of new records loaded
+        """
+        with self._loading():
+            start = time.perf_counter()
+            stats = self.table_stats[table_name] = TableStats()
+            count = FileSetIngestor(self.conn).ingest(parser, file_paths, table_name,
+                                                      batch_size, workers, stats)
+        self._report_load(count, table_name, time.perf_counter() - start)
+        self._data_changed()
+        return count
+
+    def index_table(self, table_name: str = "data", indexes: Optional[List[List[str]]] = None,
+                    auto: bool = False, hints: Iterable[str] = ()) -> List[Dict[str, Any]]:
+        """
+        Create indexes on a loaded table and run ANALYZE.
+
+        Args:
+            table_name: Table to index
+            indexes: Explicit index definitions, each a list of columns
+            auto: Also pick indexes from the load-time column statistics
+            hints: Frequently filtered columns suggested by the parser (auto mode)
+
+        Returns:
+            One report dict per index (name, columns, created, seconds, bytes)
+        """
+        if not self.cursor:
+            raise RuntimeError("No data loaded. Call load_data() first.")
+
+        existing = [col['name'] for col in SchemaInference.get_table_info(self.cursor, table_name)]
+        wanted = [list(columns) for columns in (indexes or [])]
+        for columns in wanted:
+            missing = [col for col in columns if col not in existing]
+            if missing:
+                raise ValueError(f"表 '{table_name}' 中没有列: {', '.join(missing)}")
+        if auto:
+            for columns in choose_auto_indexes(self.table_stats.get(table_name), hints, existing):
+                if columns not in wanted:
+                    wanted.append(columns)
+
+        start = time.perf_counter()
+        reports = [create_index(self.cursor, table_name, columns) for columns in wanted]
+        for report in reports:
+            if report['created']:
+                print(f"已创建索引 {report['name']} ({', '.join(report['columns'])}): "
+                      f"耗时 {report['seconds']:.2f}s, 大小 {report['bytes'] / 1024 / 1024:.1f} MB")
+
+        if any(report['created'] for report in reports):
+            analyze_start = time.perf_counter()
+            self.cursor.execute("ANALYZE")
+            self.conn.commit()
+            print(f"已更新统计信息 (ANALYZE): 耗时 {time.perf_counter() - analyze_start:.2f}s")
+        if table_name in self.table_stats:
+            self.table_stats[table_name].add_time('index', time.perf_counter() - start)
+        return reports
+
+    def get_column_stats(self, table_name: str = "data") -> List[Dict[str, Any]]:
+        """
+        Return column statistics gathered during the last load of a table.
+
+        Returns:
+            One dict per column with type, count, null_count and distinct_estimate
+        """
+        stats = self.table_stats.get(table_name)
+        if not stats:
+            return []
+        return [column.as_dict() for column in stats.columns.values()]
+
+    def open_database(self, db_path: str, read_only: bool = True) -> None:
+        """
+        Open an existing SQLite database file instead of loading data.
+
+        Args:
+            db_path: Path to the database file
+            read_only: Open the file with mode=ro so it cannot be modified
+        """
+        self.database_uri = Path(db_path).resolve().as_uri()
+        uri = self.database_uri + '?mode=ro' if read_only else self.database_uri
+        self.conn = sqlite3.connect(uri, uri=True)
         self.cursor = self.conn.cursor()
+        for pragma in disk_pragmas(self.page_size, self.db_cache_bytes, self.mmap_bytes, read_only=read_only):
+            self.cursor.execute(pragma)
+        self._data_changed()
+
+    def save_database(self, db_path: str) -> None:
+        """
+        Copy the current database to a file using the SQLite backup API.
+
+        Args:
+            db_path: Destination file path (overwritten)
+        """
+        if not self.conn:
+            raise RuntimeError("No data loaded. Call load_data() first.")
+
+        dest = sqlite3.connect(db_path)
+        try:
+            self.conn.backup(dest)
+        finally:
+            dest.close()
 
-        SchemaInference.create_table_from_data(
-            self.cursor,
-            table_name,
-            data
+    def load_streams(self, sources: List[Tuple[str, Iterable[Dict[str, Any]]]],
+                     batch_size: int = DEFAULT_BATCH_SIZE,
+                     sample_size: int = DEFAULT_SAMPLE_SIZE,
+                     infer_limit: Optional[int] = None) -> Dict[str, int]:
+        """
+        Load several record streams into separate tables concurrently.
+
+        Parsing runs on one thread per stream while this thread performs
+        all inserts, so SQLite only ever sees a single writer. Existing
+        tables with the same names are replaced.
+
+        Args:
+            sources: (table_name, records) pairs, as for load_stream()
+            batch_size: Number of rows inserted per transaction
+            sample_size: Number of leading records used to create each table
+            infer_limit: Rows analyzed per table for column types (None = all)
+
+        Returns:
+            Mapping of table name to number of records loaded
+        """
+        with self._loading():
+            for table_name, _ in sources:
+                self.cursor.execute(f"DROP TABLE IF EXISTS [{table_name}]")
+                self.table_stats[table_name] = TableStats(infer_limit)
+
+            start = time.perf_counter()
+            try:
+                return load_concurrently(
+                    self.cursor, sources, self.table_stats, batch_size, sample_size,
+                    on_complete=lambda table_name, count: self._report_load(
+                        count, table_name, time.perf_counter() - start)
+                )
+            finally:
+                self._data_changed()
+
+    def attach_database(self, db_path: str, alias: str, read_only: bool = True) -> None:
+        """
+        Attach another database file; its tables become queryable by name.
+
+        Args:
+            db_path: Path to the database file
+            alias: Schema name for the attached database
+            read_only: Attach with mode=ro so it cannot be modified
+        """
+        self._connect()
+        uri = Path(db_path).resolve().as_uri()
+        if read_only:
+            uri += '?mode=ro'
+        self.cursor.execute("ATTACH DATABASE ? AS ?", (uri, alias))
+        self.attached.append((uri, alias))
+        self._data_changed()
+
+    def save_table(self, table_name: str, db_path: str) -> None:
+        """
+        Copy one table, with its indexes and statistics, into a new database file.
+
+        Args:
+            table_name: Table to copy
+            db_path: Destination file path (must not contain the table)
+        """
+        if not self.cursor:
+            raise RuntimeError("No data loaded. Call load_data() first.")
+
+        self.cursor.execute(
+            "SELECT type, sql FROM sqlite_master WHERE tbl_name = ? AND sql IS NOT NULL",
+            (table_name,)
         )
+        schema = self.cursor.fetchall()
+        table_sql = [sql for obj_type, sql in schema if obj_type == 'table']
+        index_sql = [sql for obj_type, sql in schema if obj_type == 'index']
 
-        print(f"已加载 {len(data)} 条记录到表 '{table_name}' 中")
+        dest = sqlite3.connect(db_path)
+        try:
+            for sql in table_sql:
+                dest.execute(sql)
+            dest.commit()
+        finally:
+            dest.close()
+
+        alias = '_sqltools_export'
+        self.cursor.execute("ATTACH DATABASE ? AS ?", (db_path, alias))
+        try:
+            self.cursor.execute(f"INSERT INTO [{alias}].[{table_name}] SELECT * FROM main.[{table_name}]")
+            self.conn.commit()
+        finally:
+            self.cursor.execute("DETACH DATABASE ?", (alias,))
+
+        # Indexes are cheaper to build after the rows are in place
+        dest = sqlite3.connect(db_path)
+        try:
+            for sql in index_sql:
+                dest.execute(sql)
+            if index_sql:
+                dest.execute("ANALYZE")
+            dest.commit()
+        finally:
+            dest.close()
+
+    @staticmethod
+    def _report_load(count: int, table_name: str, elapsed: float) -> None:
+        """Print row count and insert throughput for a finished load"""
+        rate = count / elapsed if elapsed > 0 else 0.0
+        print(f"已加载 {count} 条记录到表 '{table_name}' 中 "
+              f"(耗时 {elapsed:.2f}s, {rate:,.0f} 行/秒)")
 
     def execute_query(self, sql_query: str) -> Optional[List[tuple]]:
         """
@@ -51,64 +483,209 @@ class SQLEngine:
         if not self.cursor:
             raise RuntimeError("No data loaded. Call load_data() first.")
 
-        self.cursor.execute(sql_query)
+        counter = None
+        if self.profiling:
+            counter = StepCounter()
+            self.conn.set_progress_handler(counter, counter.interval)
+        start = time.perf_counter()
+        try:
+            results = self._execute_query(sql_query)
+        finally:
+            if counter is not None:
+                self.conn.set_progress_handler(None, 0)
+        seconds = time.perf_counter() - start
+
+        plan = self.explain_query(sql_query) if counter is not None and results is not None else ()
+        self.last_query = query_report(sql_query, seconds, results,
+                                       self._cached_columns is not None, counter, plan)
+        return results
 
-        if sql_query.strip().upper().startswith('SELECT'):
+    def _execute_query(self, sql_query: str) -> Optional[List[tuple]]:
+        """execute_query() without the instrumentation"""
+        self._cached_columns = None
+        if not sql_query.strip().upper().startswith('SELECT'):
+            self.cursor.execute(sql_query)
+            self.conn.commit()
+            self._data_changed()
+            return None
+
+        if self.result_cache is None or not is_cacheable(sql_query):
+            self.cursor.execute(sql_query)
             return self.cursor.fetchall()
-        else:
+
+        # Identical queries over unchanged data are answered from the cache
+        key = (normalize_sql(sql_query), self.data_version, self._external_version())
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            self._cached_columns, rows = cached
+            return list(rows)
+
+        self.cursor.execute(sql_query)
+        rows = self.cursor.fetchall()
+        self.result_cache.put(key, self.get_column_names(), rows)
+        return list(rows)
+
+    def execute_batches(self, sql_query: str,
+                        fetch_size: int = DEFAULT_FETCH_SIZE) -> Optional[Iterator[List[tuple]]]:
+        """
+        Execute a query and return its rows lazily, in fetchmany() batches.
+
+        Args:
+            sql_query: SQL query string
+            fetch_size: Rows per batch
+
+        Returns:
+            Iterator over row batches, or None for statements without a
+            result set (which are committed). Column names are available
+            from get_column_names() right after the call.
+        """
+        if not self.cursor:
+            raise RuntimeError("No data loaded. Call load_data() first.")
+
+        self._cached_columns = None
+        cursor = self.cursor
+        changes = self.conn.total_changes
+        cursor.execute(sql_query)
+        if cursor.description is None:
             self.conn.commit()
+            self._data_changed()
             return None
+        if self.conn.total_changes != changes:
+            # e.g. INSERT ... RETURNING
+            self._data_changed()
 
-    def get_column_names(self) -> Optional[List[str]]:
-        """Get column names from last query"""
-        if self.cursor and self.cursor.description:
-            return [desc[0] for desc in self.cursor.description]
-        return None
+        def batches() -> Iterator[List[tuple]]:
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    return
+                yield rows
+
+        return batches()
+
+    def execute_columnar(self, sql_query: str,
+                         fetch_size: int = DEFAULT_FETCH_SIZE) -> Dict[str, Any]:
+        """
+        Execute a query and return its result as one array per column.
+
+        Args:
+            sql_query: SQL query string
+            fetch_size: Rows per fetchmany() batch
 
-    def run_repl(self, table_name: str = "data") -> None:
+        Returns:
+            Mapping of column name to NumPy array, or array.array/list
+            when NumPy is not installed
         """
-        Run interactive REPL for SQL queries.
+        if not self.cursor:
+            raise RuntimeError("No data loaded. Call load_data() first.")
 
-        This is extracted from the main loop in query_json_with_sql()
+        self._cached_columns = None
+        self.cursor.execute(sql_query)
+        return fetch_columns(self.cursor, fetch_size)
+
+    def execute_many(self, queries: List[str], workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Run read-only queries concurrently, yielding each result as it completes.
+
+        The queries run on a pool of read-only connections (see
+        core.query_pool.QueryPool), so independent scans and aggregates use
+        several cores. An on-disk database is read directly; an in-memory
+        one is first copied to a temporary snapshot file, taken again only
+        after the data changes. The result cache is not consulted.
 
         Args:
-            table_name: Default table name for queries
+            queries: SQL statements (writes fail)
+            workers: Number of concurrent queries (None = all CPU cores)
+
+        Yields:
+            Dicts with index, sql, columns, rows, seconds and error, as
+            described in QueryPool.run()
         """
-        print("请输入SQL查询语句，输入 'exit' 或 'quit' 退出程序\n")
+        if not self.conn:
+            raise RuntimeError("No data loaded. Call load_data() first.")
+        yield from self._query_pool(workers).run(queries)
 
-        while True:
-            try:
-                sql_query = input("SQL> ").strip()
+    def _query_pool(self, workers: Optional[int]) -> QueryPool:
+        """The pool of execute_many(), reopened when the worker count or snapshot changes"""
+        if self.database_uri is None:
+            version = (self.data_version, self._external_version())
+            if version != self._snapshot_version:
+                self._close_pool()
+                if self._snapshot_path is None:
+                    fd, self._snapshot_path = tempfile.mkstemp(prefix='sqltools-', suffix='.db')
+                    os.close(fd)
+                # Commit first: the backup waits for an open write transaction
+                self.conn.commit()
+                self.save_database(self._snapshot_path)
+                self._snapshot_version = version
+            uri = Path(self._snapshot_path).as_uri()
+        else:
+            uri = self.database_uri
+
+        if self._pool is not None and self._pool.workers != (workers or self._pool.workers):
+            self._close_pool()
+        if self._pool is None:
+            pragmas = disk_pragmas(self.page_size, self.db_cache_bytes, self.mmap_bytes, read_only=True)
+            self._pool = QueryPool(uri, workers, pragmas, self.attached)
+        return self._pool
 
-                if sql_query.lower() in ['exit', 'quit', '']:
-                    break
+    def _close_pool(self) -> None:
+        """Close the connections of execute_many()"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
 
-                results = self.execute_query(sql_query)
+    def explain_query(self, sql_query: str) -> List[tuple]:
+        """
+        Return the EXPLAIN QUERY PLAN rows of a statement without running it.
 
-                if sql_query.strip().upper().startswith('SELECT'):
-                    column_names = self.get_column_names()
+        See profiling.format_plan() and profiling.summarize_plan() for
+        rendering the rows and finding the indexes used.
 
-                    if column_names:
-                        print(f"\n列名: {column_names}")
+        Args:
+            sql_query: SQL query string
+
+        Returns:
+            Rows of (id, parent, unused, detail)
+        """
+        if not self.cursor:
+            raise RuntimeError("No data loaded. Call load_data() first.")
+        return self.conn.execute(f"EXPLAIN QUERY PLAN {sql_query}").fetchall()
 
-                    if results:
-                        print(f"找到 {len(results)} 条记录:")
-                        for i, row in enumerate(results, 1):
-                            print(f"记录 {i}: {dict(zip(column_names, row))}")
-                    else:
-                        print("未找到匹配的记录")
-                else:
-                    print(f"执行完成，影响了 {self.cursor.rowcount} 行")
+    def get_column_names(self) -> Optional[List[str]]:
+        """Get column names from last query"""
+        if self._cached_columns is not None:
+            return self._cached_columns
+        if self.cursor and self.cursor.description:
+            return [desc[0] for desc in self.cursor.description]
+        return None
+
+    def rows_changed(self) -> int:
+        """Number of rows changed by the last statement"""
+        return self.cursor.rowcount
+
+    def _data_changed(self) -> None:
+        """Record a load or write: cached results are no longer valid"""
+        self.data_version += 1
+        if self.result_cache is not None:
+            self.result_cache.clear()
+
+    def _external_version(self) -> int:
+        """
+        SQLite's data_version of the database file, which changes when
+        another connection (e.g. a LogFollower) commits to it.
+        """
+        return self.conn.execute("PRAGMA data_version").fetchone()[0]
 
-            except sqlite3.Error as e:
-                print(f"SQL错误: {e}")
-            except KeyboardInterrupt:
-                print("\n程序被中断")
-                break
-            except Exception as e:
-                print(f"错误: {e}")
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Result cache counters (see ResultCache.stats), or None if disabled"""
+        return self.result_cache.stats() if self.result_cache is not None else None
 
     def close(self) -> None:
         """Close database connection"""
+        self._close_pool()
+        if self._snapshot_path is not None:
+            os.remove(self._snapshot_path)
+            self._snapshot_path = None
         if self.conn:
             self.conn.close()
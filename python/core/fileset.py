@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingestion of file sets (globs, directories, rotated logs) into one table
+"""
+
+import glob
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from typing import Dict, List, Optional, Tuple, TYPE_CHECKING
+from .schema import SchemaInference, TableStats, DEFAULT_BATCH_SIZE, NUMERIC_TYPES
+from .parallel import iter_files_parallel, FILE_DONE
+from parsers.reader import open_file, is_compressed
+
+if TYPE_CHECKING:
+    from parsers.base import BaseParser
+
+
+# Bookkeeping table holding the files ingested into each file-set table
+FILES_TABLE = '_sqltools_ingested_files'
+
+# Column added to every row, holding the path of the file it came from
+SOURCE_COLUMN = '_source_file'
+
+# Leading (decompressed) bytes hashed to recognise a file across renames,
+# compression and appends
+HEAD_BYTES = 64 * 1024
+
+_ROTATION_NUMBER = re.compile(r'\.(\d+)(?:\.(?:gz|bz2|xz))?$', re.IGNORECASE)
+
+
+def is_file_set(path: str) -> bool:
+    """True if the input names a set of files: a directory or a glob pattern"""
+    return os.path.isdir(path) or glob.has_magic(path)
+
+
+def expand_file_set(path: str) -> List[str]:
+    """
+    List the files of a directory or glob pattern, oldest rotation first.
+
+    Files are ordered by name with the logrotate number descending, so
+    `access.log.30.gz ... access.log.1, access.log` load chronologically.
+
+    Args:
+        path: Directory or glob pattern
+
+    Returns:
+        Regular file paths
+    """
+    if os.path.isdir(path):
+        candidates = [os.path.join(path, name) for name in os.listdir(path)]
+    else:
+        candidates = glob.glob(path)
+    return sorted((p for p in candidates if os.path.isfile(p)), key=rotation_sort_key)
+
+
+def rotation_sort_key(file_path: str) -> Tuple[str, int]:
+    """Sort key grouping rotated copies of a file, highest number first"""
+    match = _ROTATION_NUMBER.search(file_path)
+    if match:
+        return file_path[:match.start()], -int(match.group(1))
+    base = re.sub(r'\.(?:gz|bz2|xz)$', '', file_path, flags=re.IGNORECASE)
+    return base, 0
+
+
+class FileSetIngestor:
+    """
+    Load many files of one format into a single table.
+
+    Every row gets a `_source_file` column. Each ingested file is recorded
+    by a hash of its first HEAD_BYTES of (decompressed) content, which stays
+    the same when logrotate renames or compresses it, so re-running against
+    an on-disk database skips files that are already loaded. A recorded
+    file that has grown is resumed from its last offset when the parser
+    supports tailing; for other parsers a file whose content length changed
+    is loaded again, replacing its earlier rows.
+
+    A file is marked as loaded in the same transaction as its last batch.
+    Rows of files whose load was interrupted are deleted on the next run.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Args:
+            conn: Connection to the database holding the table
+        """
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS [{FILES_TABLE}] ("
+            "table_name TEXT, source_path TEXT, head_hash TEXT, head_len INTEGER, "
+            "size INTEGER, mtime_ns INTEGER, length INTEGER, rows INTEGER, "
+            "complete INTEGER, high_water INTEGER, ingested_at REAL, "
+            "loaded_path TEXT, last_rowid INTEGER)"
+        )
+        # Databases written before rows of a file could be replaced
+        recorded = {col['name'] for col in SchemaInference.get_table_info(self.cursor, FILES_TABLE)}
+        SchemaInference.add_columns(
+            self.cursor, FILES_TABLE,
+            {name: 'TEXT' if name == 'loaded_path' else 'INTEGER'
+             for name in ('loaded_path', 'last_rowid') if name not in recorded}
+        )
+        self.conn.commit()
+
+    def ingest(self, parser: 'BaseParser', file_paths: List[str], table_name: str,
+               batch_size: int = DEFAULT_BATCH_SIZE, workers: int = 1,
+               stats: Optional[TableStats] = None) -> int:
+        """
+        Ingest every new or grown file of the set.
+
+        Args:
+            parser: Parser used for every file
+            file_paths: Files to load, in load order
+            table_name: Table to append to (created on first run)
+            batch_size: Number of rows inserted per transaction
+            workers: Number of files parsed concurrently in worker processes
+            stats: Column statistics of the new rows, filled during the load
+
+        Returns:
+            Number of new records inserted
+        """
+        if stats is None:
+            stats = TableStats()
+
+        self._discard_incomplete(table_name)
+        tasks = self._plan(parser, file_paths, table_name)
+        skipped = len(file_paths) - len(tasks)
+        if skipped:
+            print(f"跳过 {skipped} 个已加载且未变化的文件")
+        if not tasks:
+            return 0
+
+        columns = None
+        high_water = 0
+        if SchemaInference.table_exists(self.cursor, table_name):
+            table_info = SchemaInference.get_table_info(self.cursor, table_name)
+            columns = [col['name'] for col in table_info]
+            stats.expect_numbers(col['name'] for col in table_info if col['type'] in NUMERIC_TYPES)
+            self.cursor.execute(f"SELECT MAX(rowid) FROM [{table_name}]")
+            high_water = self.cursor.fetchone()[0] or 0
+
+        # Mark every planned file as in progress before any row is written
+        state_ids = []
+        for file_path, _, info, _ in tasks:
+            self.cursor.execute(
+                f"INSERT INTO [{FILES_TABLE}] "
+                "(table_name, source_path, loaded_path, complete, high_water, ingested_at) "
+                "VALUES (?, ?, ?, 0, ?, ?)",
+                (table_name, file_path, file_path, high_water, time.time())
+            )
+            state_ids.append(self.cursor.lastrowid)
+        self.conn.commit()
+
+        counts = [0] * len(tasks)
+        total = 0
+        work = [(file_path, offset, {SOURCE_COLUMN: file_path}) for file_path, offset, _, _ in tasks]
+        for index, batch, end_offset in stats.timed(iter_files_parallel(parser, work, workers, batch_size)):
+            if batch == FILE_DONE:
+                file_path, _, info, previous = tasks[index]
+                self._complete(table_name, state_ids[index], file_path, info, end_offset,
+                               counts[index], previous)
+                self.conn.commit()
+                continue
+
+            if columns is None:
+                columns = SchemaInference.create_table_from_sample(self.cursor, table_name, batch, stats)
+            inserted = SchemaInference.append_batch(self.cursor, table_name, columns, batch, stats=stats)
+            counts[index] += inserted
+            total += inserted
+
+        if total:
+            SchemaInference.apply_stats_types(self.cursor, table_name, stats, widen_declared=True)
+        return total
+
+    def _discard_incomplete(self, table_name: str) -> None:
+        """Delete rows left behind by an interrupted run"""
+        self.cursor.execute(
+            f"SELECT rowid, source_path, high_water FROM [{FILES_TABLE}] "
+            "WHERE table_name = ? AND complete = 0",
+            (table_name,)
+        )
+        incomplete = self.cursor.fetchall()
+        if not incomplete:
+            return
+        if SchemaInference.table_exists(self.cursor, table_name):
+            for _, source_path, high_water in incomplete:
+                self.cursor.execute(
+                    f"DELETE FROM [{table_name}] WHERE rowid > ? AND [{SOURCE_COLUMN}] = ?",
+                    (high_water, source_path)
+                )
+        self.cursor.executemany(
+            f"DELETE FROM [{FILES_TABLE}] WHERE rowid = ?",
+            [(state_id,) for state_id, _, _ in incomplete]
+        )
+        self.conn.commit()
+
+    def _plan(self, parser: 'BaseParser', file_paths: List[str],
+              table_name: str) -> List[Tuple[str, int, Dict, Optional[tuple]]]:
+        """
+        Decide which files need loading.
+
+        Returns:
+            (file_path, start offset, file info, previous state row) per file
+        """
+        self.cursor.execute(
+            "SELECT rowid, head_hash, head_len, size, mtime_ns, length, rows, "
+            f"high_water, COALESCE(loaded_path, source_path), last_rowid FROM [{FILES_TABLE}] "
+            "WHERE table_name = ? AND complete = 1 ORDER BY head_len DESC",
+            (table_name,)
+        )
+        known = self.cursor.fetchall()
+
+        tasks = []
+        for file_path in file_paths:
+            info = self._file_info(file_path)
+            if not info['head_len']:
+                continue
+            previous = self._match(info, known)
+            if previous is None:
+                tasks.append((file_path, 0, info, None))
+                continue
+            known.remove(previous)
+
+            state_id, size, mtime_ns, length = previous[0], previous[3], previous[4], previous[5]
+            if (size, mtime_ns) == (info['size'], info['mtime_ns']):
+                # Unchanged, possibly renamed by rotation
+                self.cursor.execute(
+                    f"UPDATE [{FILES_TABLE}] SET source_path = ? WHERE rowid = ?",
+                    (file_path, state_id)
+                )
+                continue
+            if parser.supports_tail:
+                # Same file, renamed, compressed or appended to: read only the new tail
+                tasks.append((file_path, length or 0, info, previous))
+            elif self._content_length(file_path, info) == length:
+                # Only renamed or compressed; remember its new size and time
+                self.cursor.execute(
+                    f"UPDATE [{FILES_TABLE}] SET source_path = ?, size = ?, mtime_ns = ? WHERE rowid = ?",
+                    (file_path, info['size'], info['mtime_ns'], state_id)
+                )
+            else:
+                # Edited: load it again in place of its earlier rows
+                self._discard(table_name, previous)
+                tasks.append((file_path, 0, info, None))
+        self.conn.commit()
+        return tasks
+
+    def _discard(self, table_name: str, previous: tuple) -> None:
+        """Delete a loaded file's rows and its record"""
+        state_id, high_water, loaded_path, last_rowid = previous[0], previous[7], previous[8], previous[9]
+        if SchemaInference.table_exists(self.cursor, table_name):
+            # Rows of other files loaded in the same run share the rowid
+            # range; later runs may have loaded another file at the same path
+            self.cursor.execute(
+                f"DELETE FROM [{table_name}] WHERE rowid > ? AND rowid <= COALESCE(?, rowid) "
+                f"AND [{SOURCE_COLUMN}] = ?",
+                (high_water or 0, last_rowid, loaded_path)
+            )
+        self.cursor.execute(f"DELETE FROM [{FILES_TABLE}] WHERE rowid = ?", (state_id,))
+
+    @staticmethod
+    def _file_info(file_path: str) -> Dict:
+        """Stat the file and hash its leading content"""
+        stat = os.stat(file_path)
+        with open_file(file_path, 'rb') as f:
+            head = f.read(HEAD_BYTES)
+        return {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'head': head,
+            'head_len': len(head),
+            'head_hash': hashlib.sha256(head).hexdigest(),
+        }
+
+    @staticmethod
+    def _match(info: Dict, known: List[tuple]) -> Optional[tuple]:
+        """Find the recorded file whose leading content this file starts with"""
+        head = info['head']
+        for row in known:
+            head_hash, head_len = row[1], row[2]
+            if head_len <= len(head) and hashlib.sha256(head[:head_len]).hexdigest() == head_hash:
+                return row
+        return None
+
+    @staticmethod
+    def _content_length(file_path: str, info: Dict) -> int:
+        """Length of the decompressed content"""
+        if not is_compressed(file_path):
+            return info['size']
+        length = 0
+        with open_file(file_path, 'rb') as f:
+            while True:
+                block = f.read(1024 * 1024)
+                if not block:
+                    return length
+                length += len(block)
+
+    def _complete(self, table_name: str, state_id: int, file_path: str, info: Dict,
+                  end_offset: Optional[int], rows: int, previous: Optional[tuple]) -> None:
+        """Mark a file as loaded, replacing the record of its earlier part"""
+        if previous is not None:
+            rows += previous[6] or 0
+            self.cursor.execute(f"DELETE FROM [{FILES_TABLE}] WHERE rowid = ?", (previous[0],))
+        if end_offset is None:
+            end_offset = self._content_length(file_path, info)
+        last_rowid = None
+        if SchemaInference.table_exists(self.cursor, table_name):
+            self.cursor.execute(f"SELECT MAX(rowid) FROM [{table_name}]")
+            last_rowid = self.cursor.fetchone()[0]
+        self.cursor.execute(
+            f"UPDATE [{FILES_TABLE}] SET head_hash = ?, head_len = ?, size = ?, mtime_ns = ?, "
+            "length = ?, rows = ?, complete = 1, ingested_at = ?, last_rowid = ? WHERE rowid = ?",
+            (info['head_hash'], info['head_len'], info['size'], info['mtime_ns'],
+             end_offset, rows, time.time(), last_rowid, state_id)
+        )
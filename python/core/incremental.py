@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental tail-append ingestion for growing, append-only files
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from itertools import islice
+from typing import Optional, Tuple, TYPE_CHECKING
+from .schema import SchemaInference, TableStats, DEFAULT_BATCH_SIZE, NUMERIC_TYPES
+
+if TYPE_CHECKING:
+    from parsers.base import BaseParser
+
+
+# Bookkeeping table holding the ingestion position of each tailed table
+STATE_TABLE = '_sqltools_ingest_state'
+
+DEFAULT_FOLLOW_INTERVAL = 1.0
+
+
+class TailIngestor:
+    """
+    Append only the new tail of a file to a table in an on-disk database.
+
+    The byte offset just past the last ingested line is stored alongside
+    the file's inode and device, and is updated in the same transaction as
+    the inserted rows, so an interrupted run never loses or duplicates
+    lines. A changed inode means the log was rotated: the remainder of the
+    rotated file (`<path>.1`) is ingested first if it can be found, then the
+    new file is read from the beginning. A file smaller than the stored
+    offset was truncated in place and is also re-read from the start.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Args:
+            conn: Connection to the database holding the table
+        """
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS [{STATE_TABLE}] ("
+            "table_name TEXT PRIMARY KEY, source_path TEXT, "
+            "inode INTEGER, device INTEGER, offset INTEGER, updated_at REAL)"
+        )
+        self.conn.commit()
+
+    def get_state(self, table_name: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Return the stored (inode, device, offset) for a table, if any.
+        """
+        self.cursor.execute(
+            f"SELECT inode, device, offset FROM [{STATE_TABLE}] WHERE table_name = ?",
+            (table_name,)
+        )
+        return self.cursor.fetchone()
+
+    def ingest(self, parser: 'BaseParser', file_path: str, table_name: str,
+               batch_size: int = DEFAULT_BATCH_SIZE,
+               stats: Optional[TableStats] = None) -> int:
+        """
+        Parse and insert everything appended to the file since the last run.
+
+        Column types are only ever widened to fit the new rows.
+
+        Args:
+            parser: Parser with `supports_tail = True`
+            file_path: Path to the log file
+            table_name: Table to append to (created on first run)
+            batch_size: Number of rows inserted per transaction
+            stats: Column statistics of the new rows, filled during the load
+
+        Returns:
+            Number of new records inserted
+        """
+        if not parser.supports_tail:
+            raise ValueError(f"{parser.get_display_name()} 格式不支持增量加载")
+
+        if stats is None:
+            stats = TableStats()
+
+        stat = os.stat(file_path)
+        state = self.get_state(table_name)
+        offset = 0
+        total = 0
+
+        if state:
+            inode, device, offset = state
+            if (inode, device) != (stat.st_ino, stat.st_dev):
+                # Rotated: finish the old file if it sits next to the new one
+                rotated = f"{file_path}.1"
+                if os.path.exists(rotated):
+                    rotated_stat = os.stat(rotated)
+                    if (rotated_stat.st_ino, rotated_stat.st_dev) == (inode, device):
+                        total += self._ingest_from(parser, rotated, rotated_stat,
+                                                   table_name, offset, batch_size,
+                                                   stats, record_state=False)
+                offset = 0
+            elif stat.st_size < offset:
+                # Truncated in place (e.g. copytruncate)
+                offset = 0
+
+        total += self._ingest_from(parser, file_path, stat, table_name, offset,
+                                   batch_size, stats)
+        if total:
+            SchemaInference.apply_stats_types(self.cursor, table_name, stats, widen_declared=True)
+        return total
+
+    def _ingest_from(self, parser: 'BaseParser', file_path: str, stat: os.stat_result,
+                     table_name: str, offset: int, batch_size: int,
+                     stats: TableStats, record_state: bool = True) -> int:
+        """Insert records from `offset` onwards, committing state with each batch"""
+        pairs = parser.iter_records_from(file_path, offset, skip_partial=True)
+        columns = None
+        if SchemaInference.table_exists(self.cursor, table_name):
+            table_info = SchemaInference.get_table_info(self.cursor, table_name)
+            columns = [col['name'] for col in table_info]
+            stats.expect_numbers(col['name'] for col in table_info if col['type'] in NUMERIC_TYPES)
+
+        total = 0
+        chunks = iter(lambda: list(islice(pairs, max(batch_size, 1))), [])
+        for chunk in stats.timed(chunks):
+            batch = [record for record, _ in chunk]
+            end_offset = chunk[-1][1]
+
+            if columns is None:
+                columns = SchemaInference.create_table_from_sample(self.cursor, table_name, batch, stats)
+
+            total += SchemaInference.append_batch(self.cursor, table_name, columns,
+                                                  batch, commit=False, stats=stats)
+            if record_state:
+                self._save_state(table_name, file_path, stat, end_offset)
+            self.conn.commit()
+
+        if record_state and not total and self.get_state(table_name) is None:
+            self._save_state(table_name, file_path, stat, offset)
+            self.conn.commit()
+        return total
+
+    def _save_state(self, table_name: str, file_path: str, stat: os.stat_result,
+                    offset: int) -> None:
+        """Record the ingestion position for a table"""
+        self.cursor.execute(
+            f"INSERT OR REPLACE INTO [{STATE_TABLE}] "
+            "(table_name, source_path, inode, device, offset, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (table_name, os.path.abspath(file_path), stat.st_ino, stat.st_dev,
+             offset, time.time())
+        )
+
+
+class LogFollower(threading.Thread):
+    """
+    Background thread that keeps ingesting new lines into a table.
+
+    Uses its own connection to the database file, so queries on the main
+    connection can run in between ingestion passes.
+    """
+
+    def __init__(self, db_path: str, parser: 'BaseParser', file_path: str,
+                 table_name: str, batch_size: int = DEFAULT_BATCH_SIZE,
+                 interval: float = DEFAULT_FOLLOW_INTERVAL):
+        """
+        Args:
+            db_path: On-disk database holding the table
+            parser: Parser with `supports_tail = True`
+            file_path: Path to the log file
+            table_name: Table to append to
+            batch_size: Number of rows inserted per transaction
+            interval: Seconds to sleep between ingestion passes
+        """
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.parser = parser
+        self.file_path = file_path
+        self.table_name = table_name
+        self.batch_size = batch_size
+        self.interval = interval
+        self.ingested = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        conn = sqlite3.connect(self.db_path)
+        try:
+            ingestor = TailIngestor(conn)
+            while not self._stop_event.is_set():
+                try:
+                    self.ingested += ingestor.ingest(self.parser, self.file_path,
+                                                     self.table_name, self.batch_size)
+                except (sqlite3.OperationalError, FileNotFoundError):
+                    # Database busy or log mid-rotation: retry next pass
+                    conn.rollback()
+                self._stop_event.wait(self.interval)
+        finally:
+            conn.close()
+
+    def stop(self) -> None:
+        """Signal the thread to exit and wait for the current pass to finish"""
+        self._stop_event.set()
+        self.join()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Index selection and creation after a load
+"""
+
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from .schema import TableStats
+
+
+# Tables smaller than this are scanned quickly enough without indexes
+AUTO_INDEX_MIN_ROWS = 10000
+
+# A column qualifies for an automatic index if it has at most this many
+# distinct values, and no more than AUTO_INDEX_MAX_RATIO of the row count
+AUTO_INDEX_MAX_DISTINCT = 10000
+AUTO_INDEX_MAX_RATIO = 0.1
+
+# Upper bound on automatically created indexes per table
+AUTO_INDEX_LIMIT = 6
+
+
+def parse_index_spec(spec: str) -> List[List[str]]:
+    """
+    Parse an --index value: comma-separated indexes, '+' joins columns.
+
+    'status,path' -> [['status'], ['path']]; 'status+path' -> [['status', 'path']]
+    """
+    indexes = []
+    for item in spec.split(','):
+        columns = [col.strip() for col in item.split('+') if col.strip()]
+        if columns:
+            indexes.append(columns)
+    return indexes
+
+
+def choose_auto_indexes(stats: Optional[TableStats], hints: Iterable[str] = (),
+                        existing_columns: Sequence[str] = ()) -> List[List[str]]:
+    """
+    Pick columns worth indexing from load-time statistics.
+
+    Columns the parser marks as commonly filtered come first, followed by
+    low-cardinality columns (few distinct values relative to the row
+    count), which are the typical WHERE/GROUP BY targets in logs.
+
+    Args:
+        stats: Statistics gathered while loading the table
+        hints: Parser-declared frequently filtered columns
+        existing_columns: Columns of the table
+
+    Returns:
+        Single-column index definitions
+    """
+    if not stats or stats.row_count < AUTO_INDEX_MIN_ROWS:
+        return []
+
+    max_distinct = min(AUTO_INDEX_MAX_DISTINCT, stats.row_count * AUTO_INDEX_MAX_RATIO)
+    chosen = [name for name in hints if name in existing_columns]
+
+    candidates = []
+    for name, column in stats.columns.items():
+        if name in chosen or name not in existing_columns:
+            continue
+        if column.sql_type in (None, 'REAL') or column.null_count == column.count:
+            continue
+        distinct = column.distinct_estimate
+        if 2 <= distinct <= max_distinct:
+            candidates.append((distinct, name))
+
+    chosen.extend(name for _, name in sorted(candidates))
+    return [[name] for name in chosen[:AUTO_INDEX_LIMIT]]
+
+
+def index_name(table_name: str, columns: Sequence[str]) -> str:
+    """Deterministic index name for a table and column list"""
+    return f"idx_{table_name}_{'_'.join(columns)}"
+
+
+def create_index(cursor: sqlite3.Cursor, table_name: str, columns: Sequence[str]) -> Dict[str, Any]:
+    """
+    Create an index (if missing) and measure its build time and size.
+
+    The size is the growth in database pages, which works for in-memory
+    databases and builds without the dbstat extension.
+
+    Returns:
+        Dict with name, columns, created, seconds and bytes
+    """
+    name = index_name(table_name, columns)
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,))
+    if cursor.fetchone():
+        return {'name': name, 'columns': list(columns), 'created': False,
+                'seconds': 0.0, 'bytes': 0}
+
+    page_size = cursor.execute("PRAGMA page_size").fetchone()[0]
+    pages_before = cursor.execute("PRAGMA page_count").fetchone()[0]
+    start = time.perf_counter()
+    column_list = ', '.join(f"[{col}]" for col in columns)
+    cursor.execute(f"CREATE INDEX [{name}] ON [{table_name}] ({column_list})")
+    cursor.connection.commit()
+    elapsed = time.perf_counter() - start
+    pages_after = cursor.execute("PRAGMA page_count").fetchone()[0]
+
+    return {'name': name, 'columns': list(columns), 'created': True,
+            'seconds': elapsed, 'bytes': max(pages_after - pages_before, 0) * page_size}
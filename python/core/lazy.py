@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lazy engine: query files in place through SQLite virtual tables
+"""
+
+import os
+import time
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TYPE_CHECKING
+from .repl import ReplMixin
+from .schema import SchemaInference, DEFAULT_SAMPLE_SIZE
+from .columnar import DEFAULT_FETCH_SIZE
+from .profiling import StepCounter, query_report
+from .query_pool import run_serially
+from parsers.reader import open_file
+
+try:
+    import apsw
+except ImportError:  # APSW is optional; only the lazy engine needs it
+    apsw = None
+
+if TYPE_CHECKING:
+    from parsers.base import BaseParser
+
+
+# Query engines selectable from the command line
+ENGINES = ('materialize', 'lazy')
+
+# Name of the virtual table module every file table is created with
+MODULE_NAME = 'sqltools_file'
+
+# Rows of a completed scan kept for rescans of the same table (join inner side)
+RESCAN_CACHE_ROWS = 100000
+
+# Bytes read from the start of a source to estimate its row count
+ROW_ESTIMATE_SAMPLE_BYTES = 64 * 1024
+
+
+def lazy_available() -> bool:
+    """True if the lazy engine can be used (APSW is installed)"""
+    return apsw is not None
+
+
+class _FileSource:
+    """A file (or file set) exposed as one virtual table"""
+
+    def __init__(self, parser: 'BaseParser', file_paths: Sequence[str], columns: Sequence[str],
+                 extra: Optional[Dict[str, Any]] = None):
+        self.parser = parser
+        self.file_paths = list(file_paths)
+        self.columns = list(columns)
+        self.extra = extra
+        self._estimated_rows: Optional[int] = None
+
+    def size(self) -> int:
+        """Total size of the files in bytes"""
+        return sum(os.path.getsize(file_path) for file_path in self.file_paths)
+
+    def estimated_rows(self) -> int:
+        """
+        Rough row count: total size divided by the average line length at
+        the start of the first file. Computed once; only meant to tell the
+        query planner that a file holds many rows.
+        """
+        if self._estimated_rows is None:
+            sample = b''
+            if self.file_paths:
+                with open_file(self.file_paths[0], 'rb') as f:
+                    sample = f.read(ROW_ESTIMATE_SAMPLE_BYTES)
+            line_bytes = len(sample) / max(sample.count(b'\n'), 1) if sample else 1
+            self._estimated_rows = max(int(self.size() / max(line_bytes, 1)), 1)
+        return self._estimated_rows
+
+    def iter_records(self) -> Iterator[Dict[str, Any]]:
+        """Parse the files again from the start"""
+        for file_path in self.file_paths:
+            if self.extra is None:
+                yield from self.parser.iter_records(file_path)
+                continue
+            extra = {name: (file_path if value is None else value) for name, value in self.extra.items()}
+            for record in self.parser.iter_records(file_path):
+                record.update(extra)
+                yield record
+
+
+class _FileModule:
+    """APSW virtual table module; the module argument indexes a registered source"""
+
+    def __init__(self, sources: List[_FileSource]):
+        self.sources = sources
+
+    def Create(self, connection, module_name, database_name, table_name, *args):
+        source = self.sources[int(args[0])]
+        column_defs = ', '.join(f"[{column}]" for column in source.columns)
+        return f"CREATE TABLE x({column_defs})", _FileTable(source)
+
+    Connect = Create
+
+
+class _FileTable:
+    """Read-only virtual table scanning its source on every query"""
+
+    def __init__(self, source: _FileSource):
+        self.source = source
+
+    def BestIndexObject(self, index_info: 'apsw.IndexInfo') -> bool:
+        # Constraints are left to SQLite; the cost steers the smaller file
+        # to the inner side of a join, where its rows are kept in memory.
+        # Without a row estimate SQLite assumes a tiny table and may run a
+        # subquery joined to it once per row instead of materializing it.
+        index_info.estimatedCost = float(self.source.size())
+        index_info.estimatedRows = self.source.estimated_rows()
+        return True
+
+    def Open(self):
+        return _FileCursor(self.source)
+
+    def Disconnect(self):
+        pass
+
+    Destroy = Disconnect
+
+
+class _FileCursor:
+    """
+    Scan of one source. Records are parsed only as SQLite asks for the
+    next row, so a query that stops early (e.g. on LIMIT) stops parsing.
+
+    SQLite scans the inner table of a join once per outer row. A first
+    complete scan of at most RESCAN_CACHE_ROWS rows is therefore kept and
+    replayed by later scans of the same cursor instead of parsing again.
+    """
+
+    def __init__(self, source: _FileSource):
+        self.columns = source.columns
+        self.source = source
+        self.records: Optional[Iterator[Dict[str, Any]]] = None
+        self.record: Optional[Dict[str, Any]] = None
+        self.rowid = 0
+        self.seen: Optional[List[Dict[str, Any]]] = None
+        self.replay: Optional[List[Dict[str, Any]]] = None
+
+    def Filter(self, index_number, index_name, constraint_args):
+        self.Close()
+        if self.replay is not None:
+            self.records = iter(self.replay)
+        else:
+            self.records = self.source.iter_records()
+            self.seen = []
+        self.rowid = 0
+        self.Next()
+
+    def Eof(self):
+        return self.record is None
+
+    def Column(self, number):
+        if number == -1:
+            return self.rowid
+        return self.record.get(self.columns[number])
+
+    def Next(self):
+        self.record = next(self.records, None)
+        self.rowid += 1
+        if self.seen is None:
+            return
+        if self.record is None:
+            self.replay, self.seen = self.seen, None
+        elif len(self.seen) < RESCAN_CACHE_ROWS:
+            self.seen.append(self.record)
+        else:
+            self.seen = None
+
+    def Rowid(self):
+        return self.rowid
+
+    def Close(self):
+        if self.records is not None:
+            if hasattr(self.records, 'close'):
+                # Closes the generator and with it the file
+                self.records.close()
+            self.records = None
+        # An unfinished scan cannot be replayed
+        self.seen = None
+
+
+class LazyEngine(ReplMixin):
+    """
+    Query engine that reads files in place instead of loading them.
+
+    Every file is a virtual table whose rows are parsed only while SQLite
+    consumes them, so queries can start immediately and a LIMIT stops
+    reading early. Each scan parses the file again: repeated queries,
+    joins and aggregations over large files are faster with SQLEngine.
+    Requires APSW (`pip install apsw`).
+    """
+
+    def __init__(self):
+        if apsw is None:
+            raise RuntimeError("The lazy engine requires APSW (pip install apsw)")
+        self.conn = apsw.Connection(':memory:')
+        self.cursor = self.conn.cursor()
+        self.cursor.exec_trace = self._trace
+        self.sources: List[_FileSource] = []
+        self.column_names: Optional[List[str]] = None
+        # Nothing is loaded, so there are no load timings (see ReplMixin.load_timings)
+        self.table_stats: Dict[str, Any] = {}
+        self.profiling = False
+        self.timer = False
+        self.last_query: Optional[Dict[str, Any]] = None
+        # No result cache (cache_stats() is None)
+        self.result_cache = None
+        self.conn.create_module(MODULE_NAME, _FileModule(self.sources), use_bestindex_object=True,
+                                read_only=True)
+
+    def register_file(self, parser: 'BaseParser', file_paths: Sequence[str], table_name: str = "data",
+                      extra: Optional[Dict[str, Any]] = None,
+                      sample_size: int = DEFAULT_SAMPLE_SIZE) -> List[str]:
+        """
+        Expose one file, or several files of one format, as a table.
+
+        Columns come from the parser when it knows them without parsing
+        (CSV header, nginx log_format); otherwise from the keys of the
+        first `sample_size` records, and keys first seen later read as NULL.
+
+        Args:
+            parser: Parser for the files
+            file_paths: Files read one after another on every scan
+            table_name: Name of the virtual table
+            extra: Columns added to every record; a None value is replaced
+                by the path of the file the record came from
+            sample_size: Records sampled for column names if needed
+
+        Returns:
+            Column names of the table
+        """
+        columns = parser.get_columns(file_paths[0]) if file_paths else None
+        if columns is None:
+            sample = list(islice(_FileSource(parser, file_paths, []).iter_records(), sample_size))
+            columns = SchemaInference.get_all_keys(sample)
+        columns = sorted(set(columns) | set(extra or ()))
+
+        self.sources.append(_FileSource(parser, file_paths, columns, extra))
+        self.cursor.execute(f"DROP TABLE IF EXISTS [{table_name}]")
+        self.cursor.execute(f"CREATE VIRTUAL TABLE [{table_name}] USING {MODULE_NAME}({len(self.sources) - 1})")
+        print(f"已注册表 '{table_name}' ({len(columns)} 列, 查询时按需读取文件)")
+        return columns
+
+    def execute_query(self, sql_query: str) -> Optional[List[tuple]]:
+        """
+        Execute a SQL query.
+
+        Args:
+            sql_query: SQL query string
+
+        Returns:
+            Query results or None for non-SELECT queries
+        """
+        counter = None
+        if self.profiling:
+            counter = StepCounter()
+            self.conn.set_progress_handler(counter, counter.interval)
+        start = time.perf_counter()
+        try:
+            rows = self._execute(sql_query).fetchall()
+        finally:
+            if counter is not None:
+                self.conn.set_progress_handler(None)
+        results = rows if sql_query.strip().upper().startswith('SELECT') else None
+
+        plan = self.explain_query(sql_query) if counter is not None and results is not None else ()
+        self.last_query = query_report(sql_query, time.perf_counter() - start, results, False, counter, plan)
+        return results
+
+    def execute_batches(self, sql_query: str,
+                        fetch_size: int = DEFAULT_FETCH_SIZE) -> Optional[Iterator[List[tuple]]]:
+        """
+        Execute a query and return its rows lazily, in batches.
+
+        Args:
+            sql_query: SQL query string
+            fetch_size: Rows per batch
+
+        Returns:
+            Iterator over row batches, or None for statements without a
+            result set. Column names are available from get_column_names()
+            right after the call.
+        """
+        cursor = self._execute(sql_query)
+        if self.column_names is None:
+            return None
+
+        def batches() -> Iterator[List[tuple]]:
+            while True:
+                rows = list(islice(cursor, fetch_size))
+                if not rows:
+                    return
+                yield rows
+
+        return batches()
+
+    def _execute(self, sql_query: str) -> 'apsw.Cursor':
+        """Run a statement, remembering its column names"""
+        self.column_names = None
+        self.cursor.execute(sql_query)
+        return self.cursor
+
+    def _trace(self, cursor: 'apsw.Cursor', sql: str, bindings: Any) -> bool:
+        # The description is only readable here when a query returns no rows
+        self.column_names = [desc[0] for desc in cursor.description] or None
+        return True
+
+    def execute_many(self, queries: List[str], workers: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        SQLEngine.execute_many() one query at a time: the virtual tables
+        parse the files in Python, which would hold the GIL on every
+        connection anyway. `workers` is ignored.
+        """
+        return run_serially(self, queries)
+
+    def explain_query(self, sql_query: str) -> List[tuple]:
+        """Return the EXPLAIN QUERY PLAN rows of a statement without running it"""
+        return list(self.conn.execute(f"EXPLAIN QUERY PLAN {sql_query}"))
+
+    def get_column_names(self) -> Optional[List[str]]:
+        """Get column names from last query"""
+        return self.column_names
+
+    def rows_changed(self) -> int:
+        """Number of rows changed by the last statement"""
+        return self.conn.changes()
+
+    def cache_stats(self) -> None:
+        """Results are not cached: every query reads the files again"""
+        return None
+
+    def close(self) -> None:
+        """Close the connection"""
+        self.conn.close()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Concurrent loading of several record streams into one database
+"""
+
+import queue
+import sqlite3
+import threading
+from itertools import chain, islice, repeat
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from .schema import SchemaInference, TableStats, DEFAULT_BATCH_SIZE, DEFAULT_SAMPLE_SIZE
+
+
+# Batches buffered per source between the producer threads and the writer
+QUEUE_DEPTH_PER_SOURCE = 2
+
+_DONE = object()
+
+
+def _produce(index: int, records: Iterable[Any], batch_size: int,
+             sample_size: int, stats: TableStats, out: queue.Queue) -> None:
+    """Producer thread: chunk one stream of dictionaries or tuples into the shared queue"""
+    try:
+        records = iter(records)
+        # The first chunk is the schema sample
+        sizes = chain([max(sample_size, 1)], repeat(max(batch_size, 1)))
+        chunks = iter(lambda: list(islice(records, next(sizes))), [])
+        for chunk in stats.timed(chunks):
+            out.put((index, chunk))
+        out.put((index, _DONE))
+    except BaseException as e:  # includes SystemExit raised by parsers
+        out.put((index, e))
+
+
+def load_concurrently(cursor: sqlite3.Cursor, sources: List[Tuple[str, Iterable[Any]]],
+                      stats: Dict[str, TableStats],
+                      batch_size: int = DEFAULT_BATCH_SIZE,
+                      sample_size: int = DEFAULT_SAMPLE_SIZE,
+                      on_complete: Optional[Callable[[str, int], None]] = None) -> Dict[str, int]:
+    """
+    Load independent record streams into separate tables.
+
+    Each stream is consumed by its own producer thread, so parsing of one
+    file (and any process pool it uses) overlaps with parsing of the others
+    and with inserts. All inserts happen on the calling thread: SQLite sees
+    a single serialized writer. The queue is bounded, so memory is limited
+    to a few batches per source.
+
+    Args:
+        cursor: SQLite cursor of the calling thread
+        sources: (table_name, records) pairs, records being dictionaries or
+            parsers.rows.Rows; tables must not exist yet
+        stats: TableStats per table name, filled during the load
+        batch_size: Number of rows inserted per transaction
+        sample_size: Number of leading records used to create each table
+        on_complete: Called with (table_name, count) as each source finishes
+
+    Returns:
+        Mapping of table name to number of rows inserted
+    """
+    batches: queue.Queue = queue.Queue(maxsize=QUEUE_DEPTH_PER_SOURCE * max(len(sources), 1))
+    # Column order of each tuple stream (None for dictionaries)
+    declared = [SchemaInference.row_columns(records) for _, records in sources]
+    threads = [
+        threading.Thread(target=_produce,
+                         args=(index, records if declared[index] is None else records.rows,
+                               batch_size, sample_size, stats[table_name], batches),
+                         daemon=True)
+        for index, (table_name, records) in enumerate(sources)
+    ]
+    for thread in threads:
+        thread.start()
+
+    columns: Dict[str, List[str]] = {}
+    counts = {table_name: 0 for table_name, _ in sources}
+    remaining = len(sources)
+    while remaining:
+        index, batch = batches.get()
+        table_name = sources[index][0]
+        if batch is _DONE:
+            remaining -= 1
+            if table_name in columns:
+                SchemaInference.apply_stats_types(cursor, table_name, stats[table_name])
+            if on_complete:
+                on_complete(table_name, counts[table_name])
+            continue
+        if isinstance(batch, BaseException):
+            raise batch
+
+        if table_name not in columns:
+            columns[table_name] = SchemaInference.create_table_from_sample(
+                cursor, table_name, batch, stats[table_name], declared[index])
+        append = SchemaInference.append_batch if declared[index] is None else SchemaInference.append_rows
+        counts[table_name] += append(
+            cursor, table_name, columns[table_name], batch, stats=stats[table_name]
+        )
+
+    return counts
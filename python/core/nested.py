@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Child tables for arrays exploded out of nested records
+"""
+
+import queue
+import re
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+from .schema import DEFAULT_BATCH_SIZE
+
+
+# Column added to every parent row, numbering the records from 1
+RECORD_ID_COLUMN = '_record_id'
+
+# Columns added to every child row: the parent's record id and the
+# position of the element in its array
+PARENT_ID_COLUMN = '_parent_id'
+INDEX_COLUMN = '_index'
+
+# Batches of child rows buffered between the parent stream and each child stream
+CHILD_QUEUE_DEPTH = 2
+
+_DONE = object()
+
+
+def child_table_name(table_name: str, path: str) -> str:
+    """Name of the table holding the elements of the array at `path`"""
+    return f"{table_name}_{re.sub(r'[^0-9A-Za-z_]', '_', path)}"
+
+
+def explode_records(records: Iterable[Dict[str, Any]], table_name: str, paths: Iterable[str],
+                    batch_size: int = DEFAULT_BATCH_SIZE) -> List[Tuple[str, Iterator[Dict[str, Any]]]]:
+    """
+    Split a record stream into a parent stream and one stream per exploded array.
+
+    The records must hold the arrays at `paths` as lists of row
+    dictionaries (see parsers.flatten.Flattener). Each parent record gets
+    a RECORD_ID_COLUMN; each array element becomes a child row with
+    PARENT_ID_COLUMN and INDEX_COLUMN, so the tables join on
+    `child._parent_id = parent._record_id`.
+
+    The streams are meant to be consumed concurrently, one thread each
+    (core.multiload.load_concurrently): child rows are handed over in
+    batches through bounded queues while the parent stream is read, so
+    nothing is buffered beyond a few batches.
+
+    Args:
+        records: Flattened records
+        table_name: Name of the parent table
+        paths: Column names of the exploded arrays
+        batch_size: Child rows handed over at once
+
+    Returns:
+        (table_name, records) pairs: the parent first, then one per path
+    """
+    queues = {path: queue.Queue(maxsize=CHILD_QUEUE_DEPTH) for path in paths}
+    sources = [(table_name, _iter_parents(records, queues, max(batch_size, 1)))]
+    for path, rows in queues.items():
+        sources.append((child_table_name(table_name, path), _iter_children(rows)))
+    return sources
+
+
+def _iter_parents(records: Iterable[Dict[str, Any]], queues: Dict[str, queue.Queue],
+                  batch_size: int) -> Iterator[Dict[str, Any]]:
+    """Number the records and move their exploded arrays to the child queues"""
+    pending: Dict[str, List[Dict[str, Any]]] = {path: [] for path in queues}
+    for record_id, record in enumerate(records, 1):
+        record[RECORD_ID_COLUMN] = record_id
+        for path, rows in pending.items():
+            elements = record.get(path)
+            if not isinstance(elements, list):
+                continue
+            del record[path]
+            for index, element in enumerate(elements):
+                row = {PARENT_ID_COLUMN: record_id, INDEX_COLUMN: index}
+                row.update(element)
+                rows.append(row)
+            if len(rows) >= batch_size:
+                queues[path].put(rows)
+                pending[path] = []
+        yield record
+
+    for path, rows in pending.items():
+        if rows:
+            queues[path].put(rows)
+        queues[path].put(_DONE)
+
+
+def _iter_children(rows: queue.Queue) -> Iterator[Dict[str, Any]]:
+    """Yield the child rows handed over by _iter_parents()"""
+    while True:
+        batch = rows.get()
+        if batch is _DONE:
+            return
+        yield from batch
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental writers for query results
+"""
+
+import csv
+import json
+from typing import Any, Iterable, List, Sequence, TextIO
+
+
+OUTPUT_FORMATS = ('json', 'json-compact', 'ndjson', 'csv', 'tsv')
+
+# Rows per fetchmany() call when streaming results out
+OUTPUT_FETCH_SIZE = 1000
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize BLOB values as hex strings"""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value).hex()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value: Any, **kwargs) -> str:
+    return json.dumps(value, ensure_ascii=False, default=_json_default, **kwargs)
+
+
+def write_results(batches: Iterable[List[tuple]], columns: Sequence[str], fmt: str,
+                  out: TextIO) -> int:
+    """
+    Write query results batch by batch, flushing after each batch.
+
+    Formats:
+        json          Indented array of row arrays (the original --query output)
+        json-compact  {"columns": [...], "rows": [[...], ...]} on one line
+        ndjson        One {"column": value, ...} object per line
+        csv / tsv     Header row followed by one line per row
+
+    Args:
+        batches: Row batches, e.g. from SQLEngine.execute_batches()
+        columns: Result column names
+        fmt: One of OUTPUT_FORMATS
+        out: Text stream to write to
+
+    Returns:
+        Number of rows written
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+
+    count = 0
+    if fmt in ('csv', 'tsv'):
+        writer = csv.writer(out, delimiter='\t' if fmt == 'tsv' else ',', lineterminator='\n')
+        writer.writerow(columns)
+        for rows in batches:
+            writer.writerows(rows)
+            count += len(rows)
+            out.flush()
+        return count
+
+    if fmt == 'ndjson':
+        for rows in batches:
+            out.write(''.join(_dumps(dict(zip(columns, row))) + '\n' for row in rows))
+            count += len(rows)
+            out.flush()
+        return count
+
+    if fmt == 'json-compact':
+        out.write('{"columns": ' + _dumps(list(columns)) + ', "rows": [')
+        separator = ''
+        for rows in batches:
+            for row in rows:
+                out.write(separator + _dumps(row, separators=(',', ':')))
+                separator = ','
+            count += len(rows)
+            out.flush()
+        out.write(']}\n')
+        return count
+
+    # json: same text as json.dumps(all_rows, indent=2), produced row by row
+    out.write('[')
+    separator = '\n'
+    for rows in batches:
+        for row in rows:
+            text = _dumps(list(row), indent=2)
+            out.write(separator + '\n'.join('  ' + line for line in text.split('\n')))
+            separator = ',\n'
+        count += len(rows)
+        out.flush()
+    out.write('\n]\n' if count else ']\n')
+    return count
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parallel multi-process parsing of line-oriented files and file sets
+"""
+
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+from parsers.reader import split_ranges, is_compressed, shared_mapping, DEFAULT_RANGE_BYTES
+from parsers.rows import Rows
+
+if TYPE_CHECKING:
+    from parsers.base import BaseParser
+
+
+def resolve_workers(workers: Optional[int]) -> int:
+    """Map a --workers value to a process count (0 or None means all cores)"""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(workers, 1)
+
+
+def _range_items(parser: 'BaseParser', file_path: str, start: int, end: int, as_rows: bool) -> Iterator[Any]:
+    """Records of one byte range: tuples if `as_rows`, else dictionaries"""
+    if as_rows:
+        return iter(parser.iter_rows_range(file_path, start, end).rows)
+    return parser.iter_records_range(file_path, start, end)
+
+
+def _parse_range(parser: 'BaseParser', file_path: str, start: int, end: int,
+                 as_rows: bool = False) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+    """
+    Worker entry point: parse one byte range into a list of records.
+
+    Also returns the types of rows dropped by the parser's pushdown, which
+    the main process needs to validate the loaded column types.
+    """
+    records = list(_range_items(parser, file_path, start, end, as_rows))
+    return records, parser.pushdown.dropped_types if parser.pushdown is not None else None
+
+
+def _range_records(parser: 'BaseParser', future) -> List[Any]:
+    """Unpack a _parse_range() result, merging dropped-row types into the parser"""
+    records, dropped_types = future.result()
+    if dropped_types:
+        parser.pushdown.merge_dropped(dropped_types)
+    return records
+
+
+def iter_records_parallel(parser: 'BaseParser', file_path: str, workers: int,
+                          range_bytes: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Parse a file with a process pool, yielding records in file order.
+
+    The file is split into newline-aligned byte ranges which workers parse
+    independently. Results are yielded strictly in range order, and at most
+    two ranges per worker are in flight, so memory stays bounded even when
+    the consumer (the SQLite writer) is slower than the parsers.
+
+    Args:
+        parser: Parser with `supports_parallel = True`
+        file_path: Path to the file to load
+        workers: Number of worker processes
+        range_bytes: Target size of each byte range
+
+    Yields:
+        Dictionaries representing the data, one per record
+    """
+
+    if is_compressed(file_path):
+        # A compressed stream cannot be split into byte ranges
+        yield from parser.iter_records(file_path)
+        return
+
+    start = parser.prepare_ranges(file_path)
+    ranges = split_ranges(file_path, start, range_bytes or DEFAULT_RANGE_BYTES)
+    yield from _iter_ranges(parser, file_path, ranges, workers, as_rows=False)
+
+
+def iter_rows_parallel(parser: 'BaseParser', file_path: str, workers: int,
+                       range_bytes: Optional[int] = None) -> 'Rows':
+    """
+    Parse a file with a process pool into tuples, in file order.
+
+    Like iter_records_parallel(), for parsers with `supports_rows = True`:
+    workers send tuples back, which are also cheaper to pickle than
+    dictionaries.
+
+    Args:
+        parser: Parser with `supports_parallel = True` and `supports_rows = True`
+        file_path: Path to the file to load
+        workers: Number of worker processes
+        range_bytes: Target size of each byte range
+
+    Returns:
+        Rows of the whole file
+    """
+
+    if is_compressed(file_path):
+        # A compressed stream cannot be split into byte ranges
+        return parser.iter_rows(file_path)
+
+    start = parser.prepare_ranges(file_path)
+    ranges = split_ranges(file_path, start, range_bytes or DEFAULT_RANGE_BYTES)
+    # Every range has the columns fixed by prepare_ranges() and the pushdown;
+    # an empty range reports them without reading anything
+    columns = parser.iter_rows_range(file_path, start, start).columns
+    return Rows(columns, _iter_ranges(parser, file_path, ranges, workers, as_rows=True))
+
+
+def _iter_ranges(parser: 'BaseParser', file_path: str, ranges: List[Tuple[int, int]], workers: int,
+                 as_rows: bool) -> Iterator[Any]:
+    """Parse byte ranges with up to `workers` processes, yielding records in range order"""
+
+    if workers <= 1 or len(ranges) <= 1:
+        for range_start, range_end in ranges:
+            yield from _range_items(parser, file_path, range_start, range_end, as_rows)
+        return
+
+    max_in_flight = workers * 2
+    # Forked workers inherit the mapping instead of each reopening the file
+    with shared_mapping(file_path), ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for range_start, range_end in ranges:
+            pending.append(pool.submit(_parse_range, parser, file_path, range_start, range_end, as_rows))
+            if len(pending) >= max_in_flight:
+                yield from _range_records(parser, pending.popleft())
+        while pending:
+            yield from _range_records(parser, pending.popleft())
+
+
+# Marks the end of one file in the worker output queue
+FILE_DONE = 'done'
+
+
+def _iter_file_batches(parser: 'BaseParser', file_path: str, offset: int, batch_size: int,
+                       extra: Dict[str, Any]) -> Iterator[Tuple[List[Dict[str, Any]], Optional[int]]]:
+    """
+    Parse one file into batches of records.
+
+    Parsers with `supports_tail = True` start at `offset` and report the
+    offset just past the last complete line; other parsers always read the
+    whole file and report None. `extra` is merged into every record.
+    """
+
+    if parser.supports_tail:
+        # Only a plain file can still be growing: leave its partial last line
+        pairs = parser.iter_records_from(file_path, offset,
+                                         skip_partial=not is_compressed(file_path))
+    else:
+        pairs = ((record, None) for record in parser.iter_records(file_path))
+
+    end_offset = offset if parser.supports_tail else None
+    batch = []
+    for record, end_offset in pairs:
+        record.update(extra)
+        batch.append(record)
+        if len(batch) >= batch_size:
+            yield batch, end_offset
+            batch = []
+    yield batch, end_offset
+
+
+def _file_worker(parser: 'BaseParser', tasks: 'multiprocessing.Queue', results: 'multiprocessing.Queue',
+                 batch_size: int) -> None:
+    """Worker process entry point: parse whole files, streaming batches back"""
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        index, file_path, offset, extra = task
+        try:
+            for batch, end_offset in _iter_file_batches(parser, file_path, offset, batch_size, extra):
+                if batch:
+                    results.put((index, batch, None))
+            results.put((index, FILE_DONE, end_offset))
+        except BaseException as e:  # includes SystemExit raised by parsers
+            results.put((index, e, None))
+            return
+
+
+def iter_files_parallel(parser: 'BaseParser', tasks: List[Tuple[str, int, Dict[str, Any]]],
+                        workers: int, batch_size: int) -> Iterator[Tuple[int, Any, Optional[int]]]:
+    """
+    Parse several files, one file per worker process at a time.
+
+    Unlike iter_records_parallel() this works for compressed files and
+    parsers without byte-range support. Each worker streams batches back
+    through a bounded queue, so memory is limited to a few batches per
+    worker regardless of file size. Batches of different files interleave;
+    batches of one file arrive in order.
+
+    Args:
+        parser: Parser used for every file
+        tasks: (file_path, offset, extra columns) per file
+        workers: Number of worker processes (1 parses in this process)
+        batch_size: Number of records per batch
+
+    Yields:
+        (task index, batch, None) for each batch of records, then
+        (task index, 'done', end offset) once a file is finished
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        for index, (file_path, offset, extra) in enumerate(tasks):
+            end_offset = None
+            for batch, end_offset in _iter_file_batches(parser, file_path, offset, batch_size, extra):
+                if batch:
+                    yield index, batch, None
+            yield index, FILE_DONE, end_offset
+        return
+
+    workers = min(workers, len(tasks))
+    task_queue = multiprocessing.Queue()
+    results = multiprocessing.Queue(maxsize=workers * 2)
+    for index, (file_path, offset, extra) in enumerate(tasks):
+        task_queue.put((index, file_path, offset, extra))
+    for _ in range(workers):
+        task_queue.put(None)
+
+    processes = [
+        multiprocessing.Process(target=_file_worker, args=(parser, task_queue, results, batch_size),
+                                daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        remaining = len(tasks)
+        while remaining:
+            index, batch, end_offset = results.get()
+            if isinstance(batch, BaseException):
+                raise batch
+            if batch == FILE_DONE:
+                remaining -= 1
+            yield index, batch, end_offset
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Query plans and execution counters for diagnosing slow queries
+"""
+
+import re
+from typing import Any, Dict, List, Sequence, Tuple
+
+
+# SQLite virtual machine instructions between progress handler calls while
+# profiling; the step count is accurate to this many instructions
+PROGRESS_INTERVAL = 1000
+
+# Index use reported in EXPLAIN QUERY PLAN details
+_USING_INDEX = re.compile(r'USING (?:COVERING )?INDEX (\S+)|USING (INTEGER PRIMARY KEY|AUTOMATIC)')
+_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(\S+)')
+
+
+class StepCounter:
+    """Progress handler counting executed virtual machine instructions"""
+
+    def __init__(self, interval: int = PROGRESS_INTERVAL):
+        self.interval = interval
+        self.steps = 0
+
+    def __call__(self) -> int:
+        self.steps += self.interval
+        # Returning non-zero would interrupt the query
+        return 0
+
+
+def format_plan(plan: Sequence[Tuple[int, int, Any, str]]) -> List[str]:
+    """
+    Render EXPLAIN QUERY PLAN rows as an indented tree.
+
+    Args:
+        plan: Rows of (id, parent, unused, detail)
+
+    Returns:
+        One line per plan step
+    """
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in plan:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node_id] + detail)
+    return lines
+
+
+def summarize_plan(plan: Sequence[Tuple[int, int, Any, str]]) -> Dict[str, List[str]]:
+    """
+    Extract index use from EXPLAIN QUERY PLAN rows.
+
+    Returns:
+        Dict with 'indexes' (names of the indexes used, 'INTEGER PRIMARY KEY'
+        for rowid lookups, 'AUTOMATIC' for indexes SQLite builds for one
+        query) and 'full_scans' (tables read without an index)
+    """
+    indexes: List[str] = []
+    full_scans: List[str] = []
+    for _, _, _, detail in plan:
+        match = _USING_INDEX.search(detail)
+        if match:
+            name = match.group(1) or match.group(2)
+            if name not in indexes:
+                indexes.append(name)
+            continue
+        match = _FULL_SCAN.match(detail)
+        if match and match.group(1) not in full_scans:
+            full_scans.append(match.group(1))
+    return {'indexes': indexes, 'full_scans': full_scans}
+
+
+def query_report(sql_query: str, seconds: float, rows: Any, cached: bool,
+                 counter: Any = None, plan: Sequence[Tuple[int, int, Any, str]] = ()) -> Dict[str, Any]:
+    """
+    Describe one executed query.
+
+    Args:
+        sql_query: The statement
+        seconds: Wall time of execution and fetching
+        rows: Result rows, or None for statements without a result set
+        cached: The result came from the result cache
+        counter: StepCounter used while profiling (None = not profiled)
+        plan: EXPLAIN QUERY PLAN rows (profiled queries only)
+
+    Returns:
+        Dict with sql, seconds, rows (count, or None) and cached; profiled
+        queries add vm_steps, plan (formatted lines), indexes and full_scans
+    """
+    report = {
+        'sql': sql_query,
+        'seconds': seconds,
+        'rows': len(rows) if rows is not None else None,
+        'cached': cached,
+    }
+    if counter is not None:
+        report['vm_steps'] = counter.steps
+        report['plan'] = format_plan(plan)
+        report.update(summarize_plan(plan))
+    return report
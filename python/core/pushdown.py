@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Projection and predicate pushdown for one-shot queries
+"""
+
+import re
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from .schema import SchemaInference
+
+
+# Authorizer actions a read-only query may perform
+_READ_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION,
+                 getattr(sqlite3, 'SQLITE_RECURSIVE', 33)}
+
+_ROWID_NAMES = {'rowid', 'oid', '_rowid_'}
+
+_TOKEN = re.compile(r"""
+    (?P<space>\s+|--[^\n]*|/\*.*?(?:\*/|$))
+  | (?P<string>'(?:[^']|'')*')
+  | (?P<quoted>"(?:[^"]|"")*"|\[[^\]]*\]|`(?:[^`]|``)*`)
+  | (?P<number>0[xX][0-9a-fA-F]+|(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_][A-Za-z0-9_$]*)
+  | (?P<op><=|>=|<>|!=|==|\|\||<<|>>|[-+*/%<>=(),.;~&|])
+  | (?P<other>.)
+""", re.VERBOSE | re.DOTALL)
+
+# Keywords that end a FROM or WHERE clause at the top level
+_CLAUSE_END = {'WHERE', 'GROUP', 'ORDER', 'LIMIT', 'HAVING', 'WINDOW', ';'}
+_COMPOUND = {'UNION', 'INTERSECT', 'EXCEPT'}
+_JOIN = {'JOIN', 'NATURAL', 'LEFT', 'RIGHT', 'FULL', 'INNER', 'CROSS', 'OUTER', 'ON', 'USING', ','}
+
+_COMPARISONS = {'=': '==', '==': '==', '!=': '!=', '<>': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>='}
+_FLIPPED = {'==': '==', '!=': '!=', '<': '>', '<=': '>=', '>': '<', '>=': '<='}
+
+# Text that SQLite's numeric affinity turns into a number
+_NUMERIC_TEXT = re.compile(r'^[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?$')
+
+
+class Filter(NamedTuple):
+    """
+    A simple predicate on one column, e.g. `status >= 500`.
+
+    `mode` is 'numeric' or 'text' for comparisons (the kind of value the
+    literal is compared as), or None for tests that do not depend on the
+    column's type (IS NULL, LIKE).
+    """
+    column: str
+    op: str
+    values: Tuple[Any, ...]
+    mode: Optional[str]
+
+    def describe(self) -> str:
+        """Human-readable form for progress messages"""
+        if self.op in ('in', 'not in'):
+            return f"{self.column} {self.op.upper()} {self.values!r}"
+        if self.op == 'between':
+            return f"{self.column} BETWEEN {self.values[0]!r} AND {self.values[1]!r}"
+        if self.op in ('is null', 'is not null'):
+            return f"{self.column} {self.op.upper()}"
+        op = '=' if self.op == '==' else self.op.upper()
+        return f"{self.column} {op} {self.values[0]!r}"
+
+
+class Pushdown:
+    """
+    Columns and filters a parser may apply while producing records.
+
+    Only picklable data is stored, so a Pushdown travels with a parser to
+    parallel workers; row tests are compiled where they are used.
+
+    Filters are applied conservatively: a row is dropped only when SQLite
+    would certainly reject it given the column type the filter assumes.
+    Values of another kind (e.g. text in a column compared with a number)
+    are kept and left to SQLite. Column types are inferred from the loaded
+    values, so the types of dropped values are recorded too; types_match()
+    then tells whether the table came out as it would have without filters.
+    """
+
+    def __init__(self, columns: Optional[Iterable[str]] = None, filters: Sequence[Filter] = ()):
+        """
+        Args:
+            columns: Columns to produce (None = all)
+            filters: Conditions every produced row must satisfy
+        """
+        self.columns = frozenset(columns) if columns is not None else None
+        self.filters = tuple(filters)
+        # Widest type per produced column among dropped rows
+        self.dropped_types: Dict[str, Optional[str]] = {}
+
+    def project(self, columns: Sequence[str]) -> List[int]:
+        """Indexes of the produced columns within `columns`"""
+        if self.columns is None:
+            return list(range(len(columns)))
+        return [i for i, name in enumerate(columns) if name in self.columns]
+
+    def row_filter(self, columns: Sequence[str]) -> Optional[Callable[[Sequence[Any]], bool]]:
+        """
+        Compile the filters into a test on value sequences in `columns` order.
+
+        The test records the value types of every row it rejects.
+
+        Returns:
+            Function returning False for rows to drop, or None if there are no filters
+        """
+        if not self.filters:
+            return None
+        position = {name: i for i, name in enumerate(columns)}
+        tests = [(position[f.column], _compile_filter(f)) for f in self.filters if f.column in position]
+        if not tests:
+            return None
+
+        produced = [(i, columns[i]) for i in self.project(columns)]
+        dropped_types = self.dropped_types
+        infer, widen = SchemaInference.infer_column_type, SchemaInference.widen_type
+
+        def keep(row: Sequence[Any]) -> bool:
+            for index, check in tests:
+                if not check(row[index]):
+                    for i, name in produced:
+                        value = row[i]
+                        if value is not None and dropped_types.get(name) != 'TEXT':
+                            dropped_types[name] = widen(dropped_types.get(name), infer(value))
+                    return False
+            return True
+        return keep
+
+    def merge_dropped(self, dropped_types: Dict[str, Optional[str]]) -> None:
+        """Combine dropped-value types recorded by a copy of this pushdown (e.g. in a worker)"""
+        for name, type_name in dropped_types.items():
+            self.dropped_types[name] = SchemaInference.widen_type(self.dropped_types.get(name), type_name)
+
+    def types_match(self, column_types: Dict[str, str]) -> bool:
+        """
+        Check the loaded column types against the types the filters assumed.
+
+        Args:
+            column_types: Declared type per column of the loaded table
+
+        Returns:
+            False if the table must be reloaded without filters
+        """
+        for f in self.filters:
+            declared = column_types.get(f.column, '').upper()
+            if f.mode == 'numeric' and declared not in ('BOOLEAN', 'INTEGER', 'REAL'):
+                return False
+            if f.mode == 'text' and declared != 'TEXT':
+                return False
+        for name, dropped in self.dropped_types.items():
+            declared = column_types.get(name, '').upper()
+            if SchemaInference.widen_type(declared, dropped) != declared:
+                # The dropped rows would have widened this column
+                return False
+        return True
+
+    def describe(self) -> str:
+        """Human-readable summary for progress messages"""
+        parts = []
+        if self.columns is not None:
+            parts.append(f"列 {', '.join(sorted(self.columns))}")
+        if self.filters:
+            parts.append(f"条件 {' AND '.join(f.describe() for f in self.filters)}")
+        return '; '.join(parts)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float))
+
+
+def _compile_filter(f: Filter) -> Callable[[Any], bool]:
+    """Build a test for one value; True keeps the row"""
+    op, values = f.op, f.values
+
+    if op == 'is null':
+        return lambda value: value is None
+    if op == 'is not null':
+        return lambda value: value is not None
+
+    if op in ('like', 'not like'):
+        regex = _like_regex(values[0])
+        negate = op == 'not like'
+
+        def like(value: Any) -> bool:
+            if value is None:
+                return False
+            if not isinstance(value, str):
+                return True
+            return (regex.match(value) is None) == negate
+        return like
+
+    # Values of the other kind are compared by SQLite after loading
+    same_kind = _is_number if f.mode == 'numeric' else (lambda value: isinstance(value, str))
+
+    if op in ('in', 'not in'):
+        members = set(values)
+        negate = op == 'not in'
+
+        def member(value: Any) -> bool:
+            if value is None:
+                return False
+            if not same_kind(value):
+                return True
+            return (value in members) != negate
+        return member
+
+    if op == 'between':
+        low, high = values
+
+        def between(value: Any) -> bool:
+            if value is None:
+                return False
+            if not same_kind(value):
+                return True
+            return low <= value <= high
+        return between
+
+    literal = values[0]
+    compare = {
+        '==': lambda value: value == literal,
+        '!=': lambda value: value != literal,
+        '<': lambda value: value < literal,
+        '<=': lambda value: value <= literal,
+        '>': lambda value: value > literal,
+        '>=': lambda value: value >= literal,
+    }[op]
+
+    def comparison(value: Any) -> bool:
+        if value is None:
+            return False
+        if not same_kind(value):
+            return True
+        return compare(value)
+    return comparison
+
+
+def _like_regex(pattern: str) -> 're.Pattern':
+    """Translate a LIKE pattern (ASCII case-insensitive, % and _) to a regex"""
+    parts = []
+    for char in pattern:
+        if char == '%':
+            parts.append('.*')
+        elif char == '_':
+            parts.append('.')
+        else:
+            parts.append(re.escape(char))
+    return re.compile(''.join(parts) + r'\Z', re.IGNORECASE | re.ASCII | re.DOTALL)
+
+
+def plan_pushdown(sql: str, tables: Dict[str, Sequence[str]],
+                  required: Optional[Dict[str, Iterable[str]]] = None) -> Dict[str, Pushdown]:
+    """
+    Work out which columns and filters a read-only query needs per table.
+
+    Referenced columns come from SQLite itself: the query is compiled
+    against empty tables with an authorizer that records every column
+    read. Filters are the top-level `AND` terms of the WHERE clause of a
+    single-table SELECT that compare a column with literals.
+
+    Args:
+        sql: The query
+        tables: Column names of each table the query may use
+        required: Extra columns to keep per table (e.g. for indexes)
+
+    Returns:
+        Pushdown per table that can skip columns or rows; empty if the
+        query cannot be analyzed or is not read-only
+    """
+    reads: Dict[str, set] = {name.lower(): set() for name in tables}
+    read_only = True
+
+    def authorizer(action, arg1, arg2, db_name, source):
+        nonlocal read_only
+        if action not in _READ_ACTIONS:
+            read_only = False
+        elif action == sqlite3.SQLITE_READ and arg1 and arg1.lower() in reads:
+            reads[arg1.lower()].add(arg2 or '')
+        return sqlite3.SQLITE_OK
+
+    probe = sqlite3.connect(':memory:')
+    try:
+        for name, columns in tables.items():
+            column_defs = ', '.join(f'[{column}]' for column in columns)
+            probe.execute(f"CREATE TABLE [{name}] ({column_defs})")
+        probe.set_authorizer(authorizer)
+        probe.execute(f"EXPLAIN {sql}")
+    except (sqlite3.Error, sqlite3.Warning, ValueError):
+        return {}
+    finally:
+        probe.close()
+    if not read_only:
+        return {}
+
+    filters = _where_filters(sql, tables)
+    required = {name.lower(): set(columns) for name, columns in (required or {}).items()}
+
+    plans = {}
+    for name, columns in tables.items():
+        by_lower = {column.lower(): column for column in columns}
+        used = reads[name.lower()]
+        needed = {by_lower[column.lower()] for column in used if column.lower() in by_lower}
+        needed |= required.get(name.lower(), set())
+        if not needed and columns:
+            # The table still needs its rows (e.g. COUNT(*)); keep one column
+            needed = {columns[0]}
+
+        table_filters = filters.get(name, [])
+        if any(column.lower() in _ROWID_NAMES for column in used):
+            # Dropping rows would renumber rowids
+            table_filters = []
+        projected = needed if len(needed) < len(columns) else None
+        if projected is not None or table_filters:
+            plans[name] = Pushdown(projected, table_filters)
+    return plans
+
+
+def _tokenize(sql: str) -> List[Tuple[str, str]]:
+    """Split SQL into (kind, text) tokens, dropping whitespace and comments"""
+    tokens = []
+    for match in _TOKEN.finditer(sql):
+        kind = match.lastgroup
+        if kind != 'space':
+            tokens.append((kind, match.group()))
+    return tokens
+
+
+def _identifier(token: Tuple[str, str]) -> Optional[str]:
+    """Name of an identifier token, or None"""
+    kind, text = token
+    if kind == 'word':
+        return text
+    if kind == 'quoted':
+        return text[1:-1].replace(text[0] * 2, text[0]) if text[0] != '[' else text[1:-1]
+    return None
+
+
+def _where_filters(sql: str, tables: Dict[str, Sequence[str]]) -> Dict[str, List[Filter]]:
+    """Extract pushable WHERE filters of a single-table SELECT"""
+    tokens = _tokenize(sql)
+    if not tokens or tokens[0][1].upper() != 'SELECT':
+        return {}
+
+    # Top-level clause boundaries; a compound SELECT is never pushed down
+    depth = 0
+    from_at = where_at = None
+    where_end = len(tokens)
+    for i, (kind, text) in enumerate(tokens):
+        upper = text.upper() if kind in ('word', 'op') else None
+        if text == '(':
+            depth += 1
+        elif text == ')':
+            depth -= 1
+        elif depth == 0 and upper in _COMPOUND:
+            return {}
+        elif depth == 0 and upper == 'FROM' and from_at is None:
+            from_at = i
+        elif depth == 0 and upper == 'WHERE' and from_at is not None:
+            where_at = i
+        elif depth == 0 and where_at is not None and upper in _CLAUSE_END and where_end == len(tokens):
+            where_end = i
+    if from_at is None or where_at is None:
+        return {}
+
+    # FROM must name exactly one table: `table [[AS] alias]`
+    from_tokens = tokens[from_at + 1:where_at]
+    if not from_tokens or any(text.upper() in _JOIN or text == '(' for _, text in from_tokens):
+        return {}
+    table = _identifier(from_tokens[0])
+    names = {name.lower(): name for name in tables}
+    if table is None or table.lower() not in names:
+        return {}
+    table = names[table.lower()]
+    aliases = {table.lower()}
+    rest = from_tokens[1:]
+    if rest and rest[0][1].upper() == 'AS':
+        rest = rest[1:]
+    if len(rest) > 1:
+        return {}
+    if rest:
+        alias = _identifier(rest[0])
+        if alias is None:
+            return {}
+        aliases.add(alias.lower())
+
+    # Every other mention of the table (e.g. a subquery) would see the filtered rows
+    mentions = sum(1 for token in tokens if (_identifier(token) or '').lower() == table.lower())
+    if mentions != 1:
+        return {}
+
+    columns = {column.lower(): column for column in tables[table]}
+    filters = []
+    for term in _split_and(tokens[where_at + 1:where_end]):
+        parsed = _parse_term(term, columns, aliases)
+        if parsed is not None:
+            filters.append(parsed)
+    return {table: filters} if filters else {}
+
+
+def _split_and(tokens: List[Tuple[str, str]]) -> List[List[Tuple[str, str]]]:
+    """Split a condition into its top-level AND terms"""
+    terms, current = [], []
+    depth = 0
+    in_between = False
+    for token in tokens:
+        text = token[1].upper()
+        if text == '(':
+            depth += 1
+        elif text == ')':
+            depth -= 1
+        elif depth == 0 and text == 'BETWEEN':
+            in_between = True
+        elif depth == 0 and text == 'AND' and token[0] == 'word':
+            if in_between:
+                in_between = False
+            else:
+                terms.append(current)
+                current = []
+                continue
+        elif depth == 0 and text == 'OR' and token[0] == 'word':
+            # An OR at the top level joins the whole condition; nothing is pushable
+            return []
+        current.append(token)
+    terms.append(current)
+    return terms
+
+
+def _parse_term(term: List[Tuple[str, str]], columns: Dict[str, str],
+                aliases: set) -> Optional[Filter]:
+    """Parse `column OP literal` style terms; None if the term is anything else"""
+    column, rest = _take_column(term, columns, aliases)
+    if column is None:
+        # literal OP column
+        literal, after = _take_literal(term)
+        if literal is _NO_LITERAL or not after or after[0][1] not in _COMPARISONS:
+            return None
+        column, rest = _take_column(after[1:], columns, aliases)
+        if column is None or rest:
+            return None
+        return _comparison(column, _FLIPPED[_COMPARISONS[after[0][1]]], [literal])
+
+    words = [text.upper() for _, text in rest]
+    if words in (['IS', 'NULL'], ['ISNULL']):
+        return Filter(column, 'is null', (), None)
+    if words in (['IS', 'NOT', 'NULL'], ['NOTNULL'], ['NOT', 'NULL']):
+        return Filter(column, 'is not null', (), None)
+
+    negate = bool(words) and words[0] == 'NOT'
+    if negate:
+        rest, words = rest[1:], words[1:]
+    if not rest:
+        return None
+
+    if words[0] == 'LIKE':
+        literal, after = _take_literal(rest[1:])
+        if after or not isinstance(literal, str):
+            return None
+        return Filter(column, 'not like' if negate else 'like', (literal,), None)
+
+    if words[0] == 'IN':
+        if len(rest) < 3 or rest[1][1] != '(' or rest[-1][1] != ')':
+            return None
+        literals = []
+        items = rest[2:-1]
+        while items:
+            literal, items = _take_literal(items)
+            if literal is _NO_LITERAL:
+                return None
+            literals.append(literal)
+            if items:
+                if items[0][1] != ',' or len(items) == 1:
+                    return None
+                items = items[1:]
+        return _comparison(column, 'not in' if negate else 'in', literals)
+
+    if words[0] == 'BETWEEN' and not negate:
+        low, after = _take_literal(rest[1:])
+        if low is _NO_LITERAL or not after or after[0][1].upper() != 'AND':
+            return None
+        high, after = _take_literal(after[1:])
+        if high is _NO_LITERAL or after:
+            return None
+        return _comparison(column, 'between', [low, high])
+
+    if negate or rest[0][1] not in _COMPARISONS:
+        return None
+    literal, after = _take_literal(rest[1:])
+    if literal is _NO_LITERAL or after:
+        return None
+    return _comparison(column, _COMPARISONS[rest[0][1]], [literal])
+
+
+_NO_LITERAL = object()
+
+
+def _take_column(tokens: List[Tuple[str, str]], columns: Dict[str, str],
+                 aliases: set) -> Tuple[Optional[str], List[Tuple[str, str]]]:
+    """Read `[qualifier.]column` from the start of tokens"""
+    if len(tokens) >= 3 and tokens[1][1] == '.':
+        qualifier = _identifier(tokens[0])
+        if qualifier is None or qualifier.lower() not in aliases:
+            return None, tokens
+        tokens = tokens[2:]
+    if not tokens:
+        return None, tokens
+    name = _identifier(tokens[0])
+    if name is None or name.lower() not in columns:
+        return None, tokens
+    return columns[name.lower()], tokens[1:]
+
+
+def _take_literal(tokens: List[Tuple[str, str]]) -> Tuple[Any, List[Tuple[str, str]]]:
+    """Read a string or (signed) number literal from the start of tokens"""
+    sign = 1
+    if tokens and tokens[0][1] in ('-', '+'):
+        sign = -1 if tokens[0][1] == '-' else 1
+        tokens = tokens[1:]
+        if not tokens or tokens[0][0] != 'number':
+            return _NO_LITERAL, tokens
+    if not tokens:
+        return _NO_LITERAL, tokens
+    kind, text = tokens[0]
+    if kind == 'number':
+        return sign * _parse_number(text), tokens[1:]
+    if kind == 'string':
+        return text[1:-1].replace("''", "'"), tokens[1:]
+    return _NO_LITERAL, tokens
+
+
+def _parse_number(text: str) -> Any:
+    if text[:2].lower() == '0x':
+        return int(text, 16)
+    if any(char in text for char in '.eE'):
+        return float(text)
+    return int(text)
+
+
+def _comparison(column: str, op: str, literals: List[Any]) -> Optional[Filter]:
+    """Build a filter, deciding whether the literals compare as numbers or text"""
+    converted = []
+    for literal in literals:
+        if isinstance(literal, str) and _NUMERIC_TEXT.match(literal):
+            # A numeric column applies numeric affinity to the literal
+            literal = _parse_number(literal.lstrip('+'))
+        converted.append(literal)
+    if all(_is_number(literal) for literal in converted):
+        mode = 'numeric'
+    elif all(isinstance(literal, str) for literal in converted):
+        mode = 'text'
+    else:
+        return None
+    return Filter(column, op, tuple(converted), mode)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Concurrent read-only queries over one loaded database
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Connections (and threads) of a pool when the caller does not choose
+DEFAULT_POOL_SIZE = os.cpu_count() or 1
+
+
+class QueryPool:
+    """
+    Read-only connections to one database file, one per worker thread.
+
+    sqlite3 releases the GIL while SQLite runs a statement, so scans and
+    aggregates submitted together execute on separate cores; only building
+    the result rows takes turns. Every connection has its own page cache
+    and reads the file (through mmap where enabled) independently. A
+    shared-cache in-memory database would not do: its connections share
+    one B-tree and run one statement at a time.
+
+    Each query runs in its own read transaction, so it sees everything
+    committed before it started; writes fail (query_only).
+    """
+
+    def __init__(self, uri: str, workers: Optional[int] = None,
+                 pragmas: Sequence[str] = (), attached: Sequence[Tuple[str, str]] = ()):
+        """
+        Args:
+            uri: file: URI of the database, opened with mode=ro
+            workers: Number of connections and threads (None = DEFAULT_POOL_SIZE)
+            pragmas: PRAGMAs run on every new connection
+            attached: (uri, alias) of databases to ATTACH to every connection
+        """
+        self.uri = uri
+        self.workers = max(workers or DEFAULT_POOL_SIZE, 1)
+        self.pragmas = list(pragmas)
+        self.attached = list(attached)
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='sqltools-query')
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        """The connection of the calling worker thread, opened on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            separator = '&' if '?' in self.uri else '?'
+            # Closed by close() from the thread that owns the pool
+            conn = sqlite3.connect(self.uri + separator + 'mode=ro', uri=True, check_same_thread=False)
+            for pragma in self.pragmas:
+                conn.execute(pragma)
+            conn.execute("PRAGMA query_only=ON")
+            for uri, alias in self.attached:
+                conn.execute("ATTACH DATABASE ? AS ?", (uri, alias))
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _run(self, index: int, sql_query: str) -> Dict[str, Any]:
+        """Execute one query on this thread's connection (runs on a worker)"""
+        result = {'index': index, 'sql': sql_query, 'columns': None, 'rows': None, 'error': None}
+        start = time.perf_counter()
+        try:
+            cursor = self._connection().execute(sql_query)
+            rows = cursor.fetchall()
+            if cursor.description:
+                result['columns'] = [desc[0] for desc in cursor.description]
+                result['rows'] = rows
+        except sqlite3.Error as e:
+            result['error'] = str(e)
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    def run(self, queries: Sequence[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Execute queries concurrently, yielding each result as it completes.
+
+        A failing query does not stop the others; its result carries the
+        error message.
+
+        Args:
+            queries: SQL statements
+
+        Yields:
+            Dict with index (position in `queries`), sql, columns and rows
+            (None for statements without a result set), seconds and error
+            (None on success), in completion order
+        """
+        futures = [self._executor.submit(self._run, i, sql_query) for i, sql_query in enumerate(queries)]
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            # Stopped early: drop the queries that have not started
+            for future in futures:
+                future.cancel()
+
+    def close(self) -> None:
+        """Wait for running queries, then close every connection"""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+
+
+def run_serially(engine: Any, queries: Sequence[str]) -> Iterator[Dict[str, Any]]:
+    """
+    QueryPool.run() for engines that cannot share their database, one query at a time.
+
+    Args:
+        engine: Object with execute_query() and get_column_names()
+        queries: SQL statements
+
+    Yields:
+        Results shaped as those of QueryPool.run(), in query order
+    """
+    for i, sql_query in enumerate(queries):
+        result = {'index': i, 'sql': sql_query, 'columns': None, 'rows': None, 'error': None}
+        start = time.perf_counter()
+        try:
+            rows = engine.execute_query(sql_query)
+            if rows is not None:
+                result['columns'] = engine.get_column_names()
+                result['rows'] = rows
+        except Exception as e:
+            result['error'] = str(e)
+        result['seconds'] = time.perf_counter() - start
+        yield result
@@ -6,6 +6,7 @@ Plugin registry for file format parsers
 
 from typing import Dict, List, Optional, Type
 from pathlib import Path
+from parsers.reader import logical_name
 
 
 class ParserRegistry:
@@ -34,22 +35,25 @@ class ParserRegistry:
                 ext = '.' + ext
             self._extension_map[ext.lower()] = format_name
 
-    def get_parser(self, format_name: str) -> Optional['BaseParser']:
-        """Get parser instance by format name"""
+    def get_parser(self, format_name: str, **options) -> Optional['BaseParser']:
+        """Get parser instance by format name, passing options to its constructor"""
         parser_class = self._parsers.get(format_name)
-        return parser_class() if parser_class else None
+        return parser_class(**options) if parser_class else None
 
     def detect_format(self, file_path: str) -> Optional[str]:
         """
         Auto-detect format based on file extension.
 
+        Compression (.gz/.bz2/.xz) and logrotate (.1, .2, ...) suffixes
+        are ignored, so `access.log.3.gz` is detected like `access.log`.
+
         Args:
             file_path: Path to the file
 
         Returns:
             Format name or None if not detected
         """
-        ext = Path(file_path).suffix.lower()
+        ext = Path(logical_name(file_path)).suffix.lower()
         return self._extension_map.get(ext)
 
     def find_parser_for_file(self, file_path: str, format_hint: Optional[str] = None) -> Optional['BaseParser']:
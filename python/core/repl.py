@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Interactive REPL shared by the query engines
+"""
+
+import sqlite3
+from typing import Any, Dict, List, Optional
+from .schema import LOAD_PHASES
+from .profiling import format_plan, summarize_plan
+
+
+class ReplMixin:
+    """
+    The REPL loop, its '.' commands and query reports.
+
+    An engine using it implements the query methods below and sets these
+    attributes in __init__:
+        table_stats: TableStats per loaded table (for .loadtime)
+        profiling: Profile every execute_query() call
+        timer: Print the wall time of every REPL query
+        last_query: Report of the last execute_query() call, or None
+        result_cache: Cache cleared by '.cache clear' (only used when
+            cache_stats() is not None)
+    """
+
+    def execute_query(self, sql_query: str) -> Optional[List[tuple]]:
+        """Run a statement, returning its rows (None without a result set)"""
+        raise NotImplementedError
+
+    def explain_query(self, sql_query: str) -> List[tuple]:
+        """Return the EXPLAIN QUERY PLAN rows of a statement without running it"""
+        raise NotImplementedError
+
+    def get_column_names(self) -> Optional[List[str]]:
+        """Get column names from last query"""
+        raise NotImplementedError
+
+    def rows_changed(self) -> int:
+        """Number of rows changed by the last statement"""
+        raise NotImplementedError
+
+    def cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Result cache counters (see ResultCache.stats), or None if there is no cache"""
+        raise NotImplementedError
+
+    def enable_profiling(self, enabled: bool = True) -> None:
+        """
+        Profile every execute_query() call: count SQLite VM steps and record
+        the query plan in `last_query` (see profiling.query_report).
+        """
+        self.profiling = enabled
+
+    def load_timings(self, table_name: str = "data") -> Dict[str, float]:
+        """
+        Return the seconds spent per phase of the last load of a table.
+
+        Returns:
+            Mapping of phase (see schema.LOAD_PHASES) to seconds; empty if
+            the table was not loaded by this engine
+        """
+        stats = self.table_stats.get(table_name)
+        return dict(stats.timings) if stats else {}
+
+    def run_repl(self, table_name: str = "data") -> None:
+        """
+        Run interactive REPL for SQL queries.
+
+        This is extracted from the main loop in query_json_with_sql()
+
+        Args:
+            table_name: Default table name for queries
+        """
+        print("请输入SQL查询语句，输入 'exit' 或 'quit' 退出程序, 输入 '.help' 查看命令\n")
+
+        while True:
+            try:
+                sql_query = input("SQL> ").strip()
+
+                if sql_query.lower() in ['exit', 'quit', '']:
+                    break
+
+                if sql_query.startswith('.'):
+                    self.run_meta_command(sql_query)
+                    continue
+
+                results = self.execute_query(sql_query)
+
+                if sql_query.strip().upper().startswith('SELECT'):
+                    column_names = self.get_column_names()
+
+                    if column_names:
+                        print(f"\n列名: {column_names}")
+
+                    if results:
+                        print(f"找到 {len(results)} 条记录:")
+                        for i, row in enumerate(results, 1):
+                            print(f"记录 {i}: {dict(zip(column_names, row))}")
+                    else:
+                        print("未找到匹配的记录")
+                else:
+                    print(f"执行完成，影响了 {self.rows_changed()} 行")
+
+                if self.timer or self.profiling:
+                    self.print_query_report(self.last_query)
+
+            except sqlite3.Error as e:
+                print(f"SQL错误: {e}")
+            except KeyboardInterrupt:
+                print("\n程序被中断")
+                break
+            except EOFError:
+                print()
+                break
+            except Exception as e:
+                print(f"错误: {e}")
+
+    def run_meta_command(self, command: str) -> None:
+        """
+        Run a REPL command starting with '.'.
+
+        Args:
+            command: The command line, e.g. '.cache' or '.cache clear'
+        """
+        name, *args = command.split()
+        if name == '.help':
+            print(".timer on|off       显示每条查询的耗时")
+            print(".profile on|off     显示每条查询的耗时、虚拟机指令数、查询计划和索引使用")
+            print(".explain [SQL]      显示查询计划 (默认: 上一条查询)")
+            print(".loadtime [表名]    显示加载各阶段 (解析、推断、插入、索引) 的耗时")
+            print(".cache              显示结果缓存的命中统计")
+            print(".cache clear        清空结果缓存")
+        elif name in ('.timer', '.profile'):
+            if args not in (['on'], ['off']):
+                print(f"用法: {name} on|off")
+            elif name == '.timer':
+                self.timer = args == ['on']
+            else:
+                self.enable_profiling(args == ['on'])
+        elif name == '.explain':
+            sql_query = command[len(name):].strip() or (self.last_query or {}).get('sql')
+            if not sql_query:
+                print("用法: .explain SQL")
+                return
+            plan = self.explain_query(sql_query)
+            for line in format_plan(plan):
+                print(line)
+            self._print_index_use(summarize_plan(plan))
+        elif name == '.loadtime':
+            tables = args or list(self.table_stats)
+            if not tables:
+                print("没有加载计时 (本次没有加载数据)")
+            for table_name in tables:
+                timings = self.load_timings(table_name)
+                if not timings:
+                    print(f"表 '{table_name}' 没有加载计时")
+                    continue
+                phases = ', '.join(f"{phase} {timings[phase]:.2f}s" for phase in LOAD_PHASES)
+                print(f"表 '{table_name}': {phases}")
+        elif name == '.cache':
+            stats = self.cache_stats()
+            if stats is None:
+                print("结果缓存未启用")
+            elif args == ['clear']:
+                self.result_cache.clear()
+                print("结果缓存已清空")
+            else:
+                print(f"结果缓存: 命中 {stats['hits']} 次, 未命中 {stats['misses']} 次 "
+                      f"(命中率 {stats['hit_rate']:.0%}), {stats['entries']} 个结果, "
+                      f"{stats['bytes'] / 1024 / 1024:.1f} / {stats['max_bytes'] / 1024 / 1024:.0f} MB, "
+                      f"淘汰 {stats['evictions']} 次, 因数据变化失效 {stats['invalidations']} 次")
+        else:
+            print(f"未知命令: {name} (输入 .help 查看命令)")
+
+    def print_query_report(self, report: Optional[Dict[str, Any]]) -> None:
+        """Print the timing (and profile, if recorded) of a query"""
+        if not report:
+            return
+        line = f"耗时 {report['seconds'] * 1000:.1f} ms"
+        if report['cached']:
+            line += " (结果缓存)"
+        if 'vm_steps' in report:
+            line += f", 虚拟机指令约 {report['vm_steps']:,} 条"
+        print(line)
+        if report.get('plan'):
+            print("查询计划:")
+            for plan_line in report['plan']:
+                print(f"  {plan_line}")
+            self._print_index_use(report)
+
+    @staticmethod
+    def _print_index_use(summary: Dict[str, List[str]]) -> None:
+        """Print which indexes a plan uses and which tables it scans in full"""
+        if summary['indexes']:
+            print(f"使用索引: {', '.join(summary['indexes'])}")
+        if summary['full_scans']:
+            print(f"全表扫描: {', '.join(summary['full_scans'])}")
+        if not summary['indexes'] and not summary['full_scans']:
+            print("未访问表")
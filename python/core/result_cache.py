@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LRU cache of query results, invalidated whenever the data changes
+"""
+
+import re
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+# Default bound on the estimated size of all cached results
+DEFAULT_RESULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Estimated cost of a row and of a non-text value, besides text and blob lengths
+ROW_OVERHEAD_BYTES = 64
+VALUE_BYTES = 16
+
+# Quoted literals and identifiers, kept verbatim by normalize_sql()
+_SQL_PARTS = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|\[[^\]]*\]|`[^`]*`)|([^'"\[`]+|.)""", re.DOTALL)
+_WHITESPACE = re.compile(r'\s+')
+
+# Functions and keywords whose result differs between identical queries;
+# never cached
+_VOLATILE = re.compile(r"\b(?:random|randomblob|changes|total_changes|last_insert_rowid)\s*\(|"
+                       r"\bcurrent_(?:date|time|timestamp)\b", re.IGNORECASE)
+_NOW = re.compile(r"'now'", re.IGNORECASE)
+
+# Date and time functions, with the number of arguments they need to be
+# given a time value; called with fewer, they use the current time
+_TIME_FUNCTIONS = {'date': 1, 'time': 1, 'datetime': 1, 'julianday': 1, 'unixepoch': 1, 'strftime': 2}
+_TIME_CALL = re.compile(r"\b(" + '|'.join(_TIME_FUNCTIONS) + r")\s*\(", re.IGNORECASE)
+
+
+def normalize_sql(sql_query: str) -> str:
+    """
+    Canonical form of a statement, for use as a cache key.
+
+    Whitespace runs collapse to one space and text outside quotes is
+    lowercased (SQLite keywords and identifiers are case-insensitive);
+    string literals and quoted identifiers are kept as written. A trailing
+    semicolon is dropped.
+    """
+    parts = [quoted or _WHITESPACE.sub(' ', text).lower()
+             for quoted, text in _SQL_PARTS.findall(sql_query)]
+    return ''.join(parts).strip().rstrip(';').rstrip()
+
+
+def is_cacheable(sql_query: str) -> bool:
+    """
+    False for queries whose result changes between runs: calls of random()
+    and similar functions, CURRENT_DATE / CURRENT_TIME / CURRENT_TIMESTAMP,
+    'now', and date and time functions called without a time value (e.g.
+    date() or strftime('%s')).
+    """
+    if _NOW.search(sql_query):
+        return False
+    # Literals and quoted identifiers cannot call functions; blank them out
+    code = ''.join("''" if quoted else text for quoted, text in _SQL_PARTS.findall(sql_query))
+    if _VOLATILE.search(code):
+        return False
+    for match in _TIME_CALL.finditer(code):
+        if _argument_count(code, match.end()) < _TIME_FUNCTIONS[match.group(1).lower()]:
+            return False
+    return True
+
+
+def _argument_count(code: str, start: int) -> int:
+    """Number of arguments of the call whose '(' ends just before `start`"""
+    depth = 0
+    count = 0
+    empty = True
+    for char in code[start:]:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            if depth == 0:
+                break
+            depth -= 1
+        elif char == ',' and depth == 0:
+            count += 1
+            continue
+        if not char.isspace():
+            empty = False
+    return 0 if empty and count == 0 else count + 1
+
+
+def result_size(rows: List[tuple], limit: Optional[int] = None) -> int:
+    """
+    Estimate the memory held by a result.
+
+    Args:
+        rows: Result rows
+        limit: Stop counting once the estimate exceeds this
+
+    Returns:
+        Estimated size in bytes
+    """
+    size = 0
+    for row in rows:
+        size += ROW_OVERHEAD_BYTES
+        for value in row:
+            size += len(value) if isinstance(value, (str, bytes)) else VALUE_BYTES
+        if limit is not None and size > limit:
+            break
+    return size
+
+
+class ResultCache:
+    """
+    Results of read-only queries, least recently used evicted first.
+
+    Keys combine the normalized SQL with the engine's data version, and
+    the engine clears the cache whenever that version changes, so a
+    result is never served after a write or a new load.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_RESULT_CACHE_BYTES):
+        """
+        Args:
+            max_bytes: Bound on the estimated size of all cached results
+        """
+        self.max_bytes = max_bytes
+        self.entries: 'OrderedDict[Hashable, Tuple[List[str], List[tuple], int]]' = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[List[str], List[tuple]]]:
+        """Return (column names, rows) cached for `key`, or None"""
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def put(self, key: Hashable, columns: List[str], rows: List[tuple]) -> bool:
+        """
+        Cache a result, evicting the least recently used ones to make room.
+
+        Returns:
+            False if the result alone is larger than the cache
+        """
+        size = result_size(rows, self.max_bytes)
+        if size > self.max_bytes:
+            return False
+        old = self.entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+        while self.entries and self.bytes + size > self.max_bytes:
+            _, (_, _, evicted) = self.entries.popitem(last=False)
+            self.bytes -= evicted
+            self.evictions += 1
+        self.entries[key] = (columns, rows, size)
+        self.bytes += size
+        return True
+
+    def clear(self) -> None:
+        """Drop every cached result (the data changed)"""
+        if self.entries:
+            self.invalidations += 1
+        self.entries.clear()
+        self.bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+        }
@@ -4,13 +4,200 @@
 Schema inference module - extracts schema from data and creates SQLite tables
 """
 
+import heapq
+import re
 import sqlite3
-from typing import List, Dict, Any, Set
+import time
+from itertools import islice
+from operator import itemgetter
+from typing import List, Dict, Any, Set, Iterable, Iterator, Optional, Sequence, TypeVar
+from parsers.rows import Rows
+
+
+# Default number of rows per executemany() call / transaction
+DEFAULT_BATCH_SIZE = 10000
+
+# Default number of leading records used to infer a streamed table's schema
+DEFAULT_SAMPLE_SIZE = 1000
+
+# Type widening order: a column holding values of several types gets the widest
+TYPE_RANK = {'BOOLEAN': 0, 'INTEGER': 1, 'REAL': 2, 'TEXT': 3}
+
+# Declared types with numeric affinity: a column of any of them stores and
+# compares the same values the same way
+NUMERIC_TYPES = {'BOOLEAN', 'INTEGER', 'REAL'}
+
+# Text that a column with numeric affinity would store as a number
+_NUMERIC_TEXT = re.compile(r'\s*[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[eE][+-]?\d+)?\s*')
+
+# Number of smallest hashes kept per column for distinct-count estimation
+DEFAULT_KMV_SIZE = 256
+
+# Phases of a load timed in TableStats.timings: reading records from the
+# parser, schema and type inference, inserting rows, building indexes
+LOAD_PHASES = ('parse', 'infer', 'insert', 'index')
+
+T = TypeVar('T')
+
+_HASH_RANGE = 2.0 ** 64
+_END = object()
+_NONE_HASH = hash((None,))
+
+
+class ColumnStats:
+    """
+    Statistics for one column, gathered while rows are inserted.
+
+    Memory is bounded: the distinct count is a K-Minimum-Values estimate
+    built from the `kmv_size` smallest value hashes seen so far, and is
+    exact while fewer distinct values than that have been seen.
+    """
+
+    def __init__(self, name: str, kmv_size: int = DEFAULT_KMV_SIZE):
+        self.name = name
+        self.sql_type: Optional[str] = None   # None until a non-NULL value is seen
+        # Numbers were seen, and then text looking like a number, which a
+        # numeric column would store as a number (see retype_numeric_text)
+        self.numeric_seen = False
+        self.numeric_text = False
+        self.count = 0
+        self.null_count = 0
+        self._kmv_size = kmv_size
+        self._hashes: List[int] = []
+
+    def update(self, values: Sequence[Any]) -> None:
+        """Fold a batch of column values into the statistics"""
+        nulls = values.count(None)
+        self.count += len(values)
+        self.null_count += nulls
+        if nulls == len(values):
+            return
+
+        value_types = set(map(type, values))
+        self.numeric_seen = self.numeric_seen or bool(value_types & {bool, int, float})
+        for value_type in value_types:
+            if value_type is not type(None):
+                self.sql_type = SchemaInference.widen_type(
+                    self.sql_type, SchemaInference.PYTHON_TYPES.get(value_type, 'TEXT')
+                )
+        if self.numeric_seen and str in value_types and not self.numeric_text:
+            self.numeric_text = any(_NUMERIC_TEXT.fullmatch(value) for value in values
+                                    if isinstance(value, str))
+
+        # Hash 1-tuples: small ints hash to themselves, tuple hashing mixes them
+        hashes = set(map(hash, zip(values)))
+        hashes.discard(_NONE_HASH)
+        hashes.update(self._hashes)
+        self._hashes = heapq.nsmallest(self._kmv_size, hashes)
+
+    @property
+    def distinct_estimate(self) -> int:
+        """Estimated number of distinct non-NULL values"""
+        if len(self._hashes) < self._kmv_size:
+            return len(self._hashes)
+        kth = (self._hashes[-1] + 2 ** 63) / _HASH_RANGE
+        return int((self._kmv_size - 1) / kth) if kth > 0 else len(self._hashes)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'type': self.sql_type,
+            'count': self.count,
+            'null_count': self.null_count,
+            'distinct_estimate': self.distinct_estimate,
+        }
+
+
+class TableStats:
+    """
+    Column statistics for a table, updated batch by batch during the load.
+
+    Args:
+        limit: Stop analyzing after this many rows (None analyzes all rows)
+    """
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self.row_count = 0
+        self.columns: Dict[str, ColumnStats] = {}
+        # Seconds spent per load phase (see LOAD_PHASES). Phases overlap
+        # when records are parsed on other threads during the inserts.
+        self.timings: Dict[str, float] = dict.fromkeys(LOAD_PHASES, 0.0)
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        """Add time spent in a load phase"""
+        self.timings[phase] += seconds
+
+    def timed(self, items: Iterable[T], phase: str = 'parse') -> Iterator[T]:
+        """
+        Yield from `items`, adding the time spent producing each item to `phase`.
+
+        Meant for iterables of batches, so the clock is read once per batch.
+        """
+        iterator = iter(items)
+        while True:
+            start = time.perf_counter()
+            item = next(iterator, _END)
+            self.add_time(phase, time.perf_counter() - start)
+            if item is _END:
+                return
+            yield item
+
+    def update(self, columns: Sequence[str], rows: List[Sequence[Any]]) -> Set[str]:
+        """
+        Fold a batch of rows (values in `columns` order) into the statistics.
+
+        Returns:
+            Columns in which this batch brought the first text looking like
+            a number after numbers (see ColumnStats.numeric_text)
+        """
+        if self.limit is not None:
+            remaining = self.limit - self.row_count
+            if remaining <= 0:
+                return set()
+            rows = rows[:remaining]
+        if not rows:
+            return set()
+
+        flagged = set()
+        for name, values in zip(columns, zip(*rows)):
+            column = self.columns.get(name)
+            if column is None:
+                column = self.columns[name] = ColumnStats(name)
+                # Column added mid-load: earlier rows hold NULL
+                column.count = column.null_count = self.row_count
+            numeric_text = column.numeric_text
+            column.update(values)
+            if column.numeric_text and not numeric_text:
+                flagged.add(name)
+        self.row_count += len(rows)
+        return flagged
+
+    def expect_numbers(self, names: Iterable[str]) -> None:
+        """
+        Count numbers as seen in these columns before the first batch.
+
+        For appends to a table whose earlier rows, not covered by these
+        statistics, gave the columns a numeric type.
+        """
+        for name in names:
+            column = self.columns.setdefault(name, ColumnStats(name))
+            column.numeric_seen = True
+
+    def column_types(self) -> Dict[str, Optional[str]]:
+        """Widened type per column (None for columns that were always NULL)"""
+        return {name: column.sql_type for name, column in self.columns.items()}
+
+    def numeric_text_columns(self) -> Set[str]:
+        """Columns holding both numbers and text that looks like a number"""
+        return {name for name, column in self.columns.items() if column.numeric_text}
 
 
 class SchemaInference:
     """Extract schema inference logic from original jsonsql.py"""
 
+    PYTHON_TYPES = {bool: 'BOOLEAN', int: 'INTEGER', float: 'REAL', str: 'TEXT'}
+
     @staticmethod
     def infer_column_type(value: Any) -> str:
         """
@@ -33,6 +220,19 @@ class SchemaInference:
         else:
             return "TEXT"
 
+    @staticmethod
+    def widen_type(current: Optional[str], other: Optional[str]) -> Optional[str]:
+        """
+        Return the narrowest type able to hold values of both types.
+
+        BOOLEAN < INTEGER < REAL < TEXT; None (only NULLs seen) widens to anything.
+        """
+        if current is None:
+            return other
+        if other is None:
+            return current
+        return current if TYPE_RANK.get(current, 3) >= TYPE_RANK.get(other, 3) else other
+
     @staticmethod
     def get_all_keys(data: List[Dict[str, Any]]) -> Set[str]:
         """
@@ -49,44 +249,455 @@ class SchemaInference:
             all_keys.update(item.keys())
         return all_keys
 
+    @staticmethod
+    def insert_rows(cursor: sqlite3.Cursor, table_name: str, columns: Sequence[str],
+                    rows: Iterable[Sequence[Any]],
+                    batch_size: int = DEFAULT_BATCH_SIZE, commit: bool = True) -> int:
+        """
+        Bulk insert rows using chunked executemany().
+
+        The INSERT statement is built once and every chunk is committed as
+        its own transaction, so SQLite pays the per-transaction cost once per
+        chunk instead of once per row.
+
+        Args:
+            cursor: SQLite cursor
+            table_name: Target table
+            columns: Column names, in the same order as the row values
+            rows: Iterable of row value sequences
+            batch_size: Number of rows per executemany() call
+            commit: Commit after each chunk; pass False to leave the
+                transaction open for the caller
+
+        Returns:
+            Number of rows inserted
+        """
+        column_list = ', '.join(f"[{col}]" for col in columns)
+        placeholders = ','.join('?' * len(columns))
+        insert_sql = f"INSERT INTO [{table_name}] ({column_list}) VALUES ({placeholders})"
+
+        conn = cursor.connection
+        total = 0
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cursor.executemany(insert_sql, batch)
+                if commit:
+                    conn.commit()
+                total += len(batch)
+                batch = []
+
+        if batch:
+            cursor.executemany(insert_sql, batch)
+            if commit:
+                conn.commit()
+            total += len(batch)
+
+        return total
+
     @staticmethod
     def create_table_from_data(cursor: sqlite3.Cursor, table_name: str,
-                               data: List[Dict[str, Any]]) -> None:
+                               data: List[Dict[str, Any]],
+                               batch_size: int = DEFAULT_BATCH_SIZE,
+                               stats: Optional[TableStats] = None) -> int:
         """
         Create SQLite table from list of dictionaries.
 
-        This is the refactored version of create_table_from_data() from jsonsql.py
+        This is the refactored version of create_table_from_data() from jsonsql.py.
+        Column types are widened across every record, not taken from the first one.
 
         Args:
             cursor: SQLite cursor
             table_name: Name of the table to create
             data: List of dictionaries containing the data
+            batch_size: Number of rows inserted per transaction
+            stats: Column statistics to fill during the load
+
+        Returns:
+            Number of rows inserted
         """
         if not data:
-            return
+            return 0
+
+        # The whole list is the schema sample
+        return SchemaInference.create_table_from_stream(
+            cursor, table_name, data, batch_size, len(data), stats
+        )
+
+    @staticmethod
+    def infer_types_from_sample(sample: List[Dict[str, Any]], keys: Iterable[str]) -> Dict[str, str]:
+        """
+        Infer column types by widening over every value of each key in a sample.
 
-        all_keys = SchemaInference.get_all_keys(data)
+        Args:
+            sample: Records to analyze
+            keys: Column names to type
 
-        # Sort keys for consistent column order
-        sorted_keys = sorted(all_keys)
+        Returns:
+            Mapping of column name to SQLite type name (TEXT if always NULL)
+        """
+        types = {}
+        for key in keys:
+            col_type = None
+            for value_type in {type(item.get(key)) for item in sample}:
+                if value_type is not type(None):
+                    col_type = SchemaInference.widen_type(
+                        col_type, SchemaInference.PYTHON_TYPES.get(value_type, 'TEXT')
+                    )
+            types[key] = col_type or 'TEXT'
+        return types
 
-        # Create table structure
-        columns = []
-        for key in sorted_keys:
-            first_value = data[0].get(key)
-            col_type = SchemaInference.infer_column_type(first_value)
-            columns.append(f"[{key}] {col_type}")
+    @staticmethod
+    def infer_types_from_rows(columns: Sequence[str], rows: List[Sequence[Any]]) -> Dict[str, str]:
+        """
+        Infer column types by widening over every value of each column in sample rows.
 
-        # Create table
-        create_sql = f"CREATE TABLE [{table_name}] ({', '.join(columns)})"
-        cursor.execute(create_sql)
+        Args:
+            columns: Column names, in the order of the row values
+            rows: Value sequences to analyze
 
-        # Insert data
-        for item in data:
-            row_values = [item.get(key) for key in sorted_keys]
-            placeholders = ','.join(['?' for _ in range(len(sorted_keys))])
-            insert_sql = f"INSERT INTO [{table_name}] VALUES ({placeholders})"
-            cursor.execute(insert_sql, row_values)
+        Returns:
+            Mapping of column name to SQLite type name (TEXT if always NULL)
+        """
+        types = dict.fromkeys(columns, 'TEXT')
+        for name, values in zip(columns, zip(*rows)):
+            col_type = None
+            for value_type in set(map(type, values)):
+                if value_type is not type(None):
+                    col_type = SchemaInference.widen_type(
+                        col_type, SchemaInference.PYTHON_TYPES.get(value_type, 'TEXT')
+                    )
+            types[name] = col_type or 'TEXT'
+        return types
+
+    @staticmethod
+    def row_columns(records: Iterable[Any]) -> Optional[List[str]]:
+        """
+        Declared column order of a record stream.
+
+        Returns:
+            The columns of a parsers.rows.Rows stream, or None for a stream
+            of dictionaries
+        """
+        return records.columns if isinstance(records, Rows) else None
+
+    @staticmethod
+    def create_table(cursor: sqlite3.Cursor, table_name: str, columns: Sequence[str],
+                     types: Dict[str, str]) -> None:
+        """Create a table with the given column order and types"""
+        column_defs = ', '.join(f"[{key}] {types[key]}" for key in columns)
+        cursor.execute(f"CREATE TABLE [{table_name}] ({column_defs})")
+
+    @staticmethod
+    def add_columns(cursor: sqlite3.Cursor, table_name: str, types: Dict[str, str]) -> None:
+        """
+        Add new columns to an existing table (existing rows get NULL).
+
+        Args:
+            cursor: SQLite cursor
+            table_name: Table to alter
+            types: Mapping of new column name to SQLite type name
+        """
+        for key, col_type in types.items():
+            cursor.execute(f"ALTER TABLE [{table_name}] ADD COLUMN [{key}] {col_type}")
+
+    @staticmethod
+    def create_table_from_stream(cursor: sqlite3.Cursor, table_name: str,
+                                 records: Iterable[Dict[str, Any]],
+                                 batch_size: int = DEFAULT_BATCH_SIZE,
+                                 sample_size: int = DEFAULT_SAMPLE_SIZE,
+                                 stats: Optional[TableStats] = None) -> int:
+        """
+        Create SQLite table from a stream of records in bounded memory.
+
+        The table is created from the first `sample_size` records. Keys
+        that first appear later in the stream are added with ALTER TABLE,
+        so at most one batch of records is held in memory at a time.
+        Tuples of a parsers.rows.Rows stream are inserted as they are;
+        dictionaries are turned into rows batch by batch.
+        Column statistics are gathered while inserting. A numeric column is
+        made TEXT before the first batch holding text that it would store
+        as a number (e.g. '007'), so that text is kept as it is; a TEXT
+        column that only held numbers is retyped once at the end (inside
+        SQLite, the input is not read again).
+
+        Args:
+            cursor: SQLite cursor
+            table_name: Name of the table to create
+            records: Iterable of dictionaries (e.g. BaseParser.iter_records())
+                or parsers.rows.Rows (e.g. BaseParser.iter_rows())
+            batch_size: Number of rows inserted per transaction
+            sample_size: Number of leading records used for schema inference
+            stats: Column statistics to fill during the load
+
+        Returns:
+            Number of rows inserted
+        """
+        if stats is None:
+            stats = TableStats()
+
+        declared = SchemaInference.row_columns(records)
+        records = iter(records.rows if declared is not None else records)
+        start = time.perf_counter()
+        sample = list(islice(records, max(sample_size, 1)))
+        stats.add_time('parse', time.perf_counter() - start)
+        if not sample:
+            return 0
+
+        columns = SchemaInference.create_table_from_sample(cursor, table_name, sample, stats, declared)
+        append = SchemaInference.append_batch if declared is None else SchemaInference.append_rows
+
+        total = 0
+        for batch in stats.timed(SchemaInference._chunks(sample, records, batch_size)):
+            total += append(cursor, table_name, columns, batch, stats=stats)
+
+        SchemaInference.apply_stats_types(cursor, table_name, stats)
+        return total
+
+    @staticmethod
+    def create_table_from_sample(cursor: sqlite3.Cursor, table_name: str,
+                                 sample: List[Any],
+                                 stats: Optional[TableStats] = None,
+                                 declared: Optional[Sequence[str]] = None) -> List[str]:
+        """
+        Create a table with the keys of a sample, typed from its values.
+
+        Args:
+            cursor: SQLite cursor
+            table_name: Name of the table to create
+            sample: Leading records of the load (dictionaries, or value
+                tuples in `declared` order)
+            stats: Statistics whose 'infer' timing is updated
+            declared: Column order of tuple records (None for dictionaries)
+
+        Returns:
+            Column order to insert batches in: the sorted key names for
+            dictionaries (append_batch()), `declared` for tuples
+            (append_rows()). Either way the table's columns are sorted.
+        """
+        start = time.perf_counter()
+        if declared is None:
+            columns = sorted(SchemaInference.get_all_keys(sample))
+            types = SchemaInference.infer_types_from_sample(sample, columns)
+        else:
+            columns = list(declared)
+            types = SchemaInference.infer_types_from_rows(columns, sample)
+        SchemaInference.create_table(cursor, table_name, sorted(columns), types)
+        if stats is not None:
+            stats.add_time('infer', time.perf_counter() - start)
+        return columns
+
+    @staticmethod
+    def append_batch(cursor: sqlite3.Cursor, table_name: str, columns: List[str],
+                     batch: List[Dict[str, Any]], commit: bool = True,
+                     stats: Optional[TableStats] = None) -> int:
+        """
+        Insert a batch of dictionaries into an existing table.
+
+        Keys not yet in `columns` are added to the table with ALTER TABLE
+        and appended to `columns` in place, so callers can keep passing the
+        same list for subsequent batches.
+
+        Args:
+            cursor: SQLite cursor
+            table_name: Target table
+            columns: Current column order of the table (updated in place)
+            batch: Records to insert
+            commit: Commit after inserting
+            stats: Column statistics to update with the batch
+
+        Returns:
+            Number of rows inserted
+        """
+        start = time.perf_counter()
+        new_keys = SchemaInference.get_all_keys(batch).difference(columns)
+        if new_keys:
+            new_columns = sorted(new_keys)
+            SchemaInference.add_columns(
+                cursor, table_name,
+                SchemaInference.infer_types_from_sample(batch, new_columns)
+            )
+            columns.extend(new_columns)
+
+        keyed = time.perf_counter()
+        rows = SchemaInference.records_to_rows(batch, columns)
+        if stats is not None:
+            stats.add_time('infer', keyed - start)
+            stats.add_time('insert', time.perf_counter() - keyed)
+        return SchemaInference.append_rows(cursor, table_name, columns, rows, commit, stats)
+
+    @staticmethod
+    def records_to_rows(records: List[Dict[str, Any]], columns: Sequence[str]) -> List[Sequence[Any]]:
+        """
+        Turn dictionaries into value sequences in `columns` order (missing keys are NULL).
+
+        When every record has every column (the common case for flat,
+        uniform input) each one is read with a single itemgetter call
+        instead of a lookup per key.
+        """
+        if len(columns) > 1:
+            try:
+                return list(map(itemgetter(*columns), records))
+            except KeyError:
+                pass
+        return [[item.get(key) for key in columns] for item in records]
+
+    @staticmethod
+    def append_rows(cursor: sqlite3.Cursor, table_name: str, columns: Sequence[str],
+                    rows: List[Sequence[Any]], commit: bool = True,
+                    stats: Optional[TableStats] = None) -> int:
+        """
+        Insert a batch of value sequences into an existing table.
+
+        Args:
+            cursor: SQLite cursor
+            table_name: Target table
+            columns: Column names, in the order of the row values
+            rows: Values to insert
+            commit: Commit after inserting
+            stats: Column statistics to update with the batch
+
+        Returns:
+            Number of rows inserted
+        """
+        if stats is None:
+            return SchemaInference.insert_rows(cursor, table_name, columns, rows,
+                                               max(len(rows), 1), commit)
+
+        start = time.perf_counter()
+        flagged = stats.update(columns, rows)
+        if flagged:
+            SchemaInference.retype_numeric_text(cursor, table_name, flagged)
+        updated = time.perf_counter()
+        count = SchemaInference.insert_rows(cursor, table_name, columns, rows,
+                                            max(len(rows), 1), commit)
+        stats.add_time('infer', updated - start)
+        stats.add_time('insert', time.perf_counter() - updated)
+        return count
+
+    @staticmethod
+    def apply_stats_types(cursor: sqlite3.Cursor, table_name: str, stats: TableStats,
+                          widen_declared: bool = False) -> List[str]:
+        """
+        Retype TEXT columns that turned out to hold only numbers.
+
+        The declared types come from the leading rows; the statistics cover
+        the whole load. The numbers of such a column were stored as text,
+        so they compare as text; copying them into a numeric column turns
+        them back into the same numbers. Other differences keep the
+        declared type: an INTEGER column with some REAL values, or a
+        numeric column with some non-numeric text, stores those values as
+        they are, and numeric-looking text was already handled before it
+        was inserted (see retype_numeric_text).
+
+        Args:
+            cursor: SQLite cursor
+            table_name: Table to check
+            stats: Statistics gathered while loading
+            widen_declared: Only widen the declared types (for appends to a
+                table whose earlier rows are not covered by `stats`)
+
+        Returns:
+            Names of the retyped columns
+        """
+        start = time.perf_counter()
+        observed = stats.column_types()
+        declared = {col['name']: col['type'] for col in SchemaInference.get_table_info(cursor, table_name)}
+        target = dict(declared)
+        for name, declared_type in declared.items():
+            observed_type = observed.get(name)
+            if widen_declared:
+                observed_type = SchemaInference.widen_type(declared_type, observed_type)
+            if declared_type == 'TEXT' and observed_type in NUMERIC_TYPES:
+                target[name] = observed_type
+
+        changed = SchemaInference._retype_changed(cursor, table_name, declared, target)
+        stats.add_time('infer', time.perf_counter() - start)
+        return changed
+
+    @staticmethod
+    def retype_numeric_text(cursor: sqlite3.Cursor, table_name: str, names: Set[str]) -> List[str]:
+        """
+        Make numeric columns TEXT before text looking like a number is inserted.
+
+        A column with numeric affinity would store '007' as 7. The rows
+        already in the table hold numbers there, which TEXT affinity keeps
+        as their decimal text; the batch that brought the text is inserted
+        after the rebuild, so the text is stored as it is.
+
+        Args:
+            cursor: SQLite cursor
+            table_name: Table about to receive the batch
+            names: Columns in which the batch holds numeric-looking text
+
+        Returns:
+            Names of the retyped columns
+        """
+        declared = {col['name']: col['type'] for col in SchemaInference.get_table_info(cursor, table_name)}
+        target = {name: 'TEXT' if name in names and declared_type in NUMERIC_TYPES else declared_type
+                  for name, declared_type in declared.items()}
+        return SchemaInference._retype_changed(cursor, table_name, declared, target)
+
+    @staticmethod
+    def _retype_changed(cursor: sqlite3.Cursor, table_name: str,
+                        declared: Dict[str, str], target: Dict[str, str]) -> List[str]:
+        """Retype the table if `target` differs from `declared`, reporting the changes"""
+        changed = [name for name in declared if target[name] != declared[name]]
+        if changed:
+            print(f"表 '{table_name}' 的列类型与前几行推断的不同, 重建表: "
+                  + ', '.join(f"{name} {declared[name]} -> {target[name]}" for name in changed))
+            SchemaInference.retype_table(cursor, table_name, target)
+        return changed
+
+    @staticmethod
+    def retype_table(cursor: sqlite3.Cursor, table_name: str, types: Dict[str, str]) -> None:
+        """
+        Rebuild a table with new column types, keeping column order and indexes.
+
+        Args:
+            cursor: SQLite cursor
+            table_name: Table to rebuild
+            types: Mapping of every column name to its new type
+        """
+        columns = [col['name'] for col in SchemaInference.get_table_info(cursor, table_name)]
+        cursor.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+            (table_name,)
+        )
+        index_sql = [row[0] for row in cursor.fetchall()]
+
+        tmp_name = f"_sqltools_retype_{table_name}"
+        SchemaInference.create_table(cursor, tmp_name, columns, types)
+        column_list = ', '.join(f"[{col}]" for col in columns)
+        cursor.execute(f"INSERT INTO [{tmp_name}] ({column_list}) SELECT {column_list} FROM [{table_name}]")
+        cursor.execute(f"DROP TABLE [{table_name}]")
+        cursor.execute(f"ALTER TABLE [{tmp_name}] RENAME TO [{table_name}]")
+        for sql in index_sql:
+            cursor.execute(sql)
+        cursor.connection.commit()
+
+    @staticmethod
+    def table_exists(cursor: sqlite3.Cursor, table_name: str) -> bool:
+        """Check whether a table exists in the main database"""
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (table_name,)
+        )
+        return cursor.fetchone() is not None
+
+    @staticmethod
+    def _chunks(head: List[Dict[str, Any]], rest: Iterator[Dict[str, Any]],
+                size: int) -> Iterator[List[Dict[str, Any]]]:
+        """Yield `head` followed by the remaining records in lists of at most `size`"""
+        size = max(size, 1)
+        for start in range(0, len(head), size):
+            yield head[start:start + size]
+        while True:
+            batch = list(islice(rest, size))
+            if not batch:
+                return
+            yield batch
 
     @staticmethod
     def get_table_info(cursor: sqlite3.Cursor, table_name: str) -> List[Dict[str, str]]:
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Settings and bookkeeping of on-disk databases (--db)
+"""
+
+import sqlite3
+import time
+from typing import List, Optional
+
+
+# Page size of newly created database files. Larger pages mean fewer,
+# fuller B-tree pages for wide rows and long scans.
+DEFAULT_PAGE_SIZE = 16384
+
+# Page cache per connection. This, not the size of the data, bounds the
+# memory SQLite uses for a database on disk.
+DEFAULT_DB_CACHE_BYTES = 128 * 1024 * 1024
+
+# Bytes of the database file read through a memory mapping instead of
+# read() calls (0 = no mapping)
+DEFAULT_MMAP_BYTES = 256 * 1024 * 1024
+
+# Bookkeeping table recording the file each fully loaded table came from
+LOADED_TABLE = '_sqltools_loaded_tables'
+
+
+def disk_pragmas(page_size: int = DEFAULT_PAGE_SIZE, cache_bytes: int = DEFAULT_DB_CACHE_BYTES,
+                 mmap_bytes: int = DEFAULT_MMAP_BYTES, read_only: bool = False) -> List[str]:
+    """
+    PRAGMAs for a connection to an on-disk database.
+
+    WAL mode lets other connections (another process, or a --follow
+    thread) read committed batches while a load is still writing.
+    synchronous=NORMAL is safe with WAL: a crash can lose only the last
+    transactions, never corrupt the file. The page size applies only to a
+    database that has no tables yet.
+
+    Args:
+        page_size: Page size in bytes of a new database (power of two, 512-65536)
+        cache_bytes: Page cache size in bytes
+        mmap_bytes: Memory-mapped I/O size in bytes
+        read_only: Leave out the PRAGMAs that write to the file
+
+    Returns:
+        PRAGMA statements, in the order they must run
+    """
+    pragmas = []
+    if not read_only:
+        pragmas += [
+            # Before switching to WAL, which fixes the page size
+            f"PRAGMA page_size={int(page_size)}",
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+        ]
+    pragmas += [
+        # A negative cache_size is in KiB rather than pages
+        f"PRAGMA cache_size=-{max(int(cache_bytes) // 1024, 1)}",
+        f"PRAGMA mmap_size={max(int(mmap_bytes), 0)}",
+    ]
+    return pragmas
+
+
+class LoadedTables:
+    """
+    Fingerprints of the files loaded in full into an on-disk database.
+
+    A table whose source file still has the recorded fingerprint (see
+    core.cache.file_fingerprint) is reused by the next run instead of
+    being parsed again. Incrementally loaded logs and file sets keep their
+    own bookkeeping (core.incremental, core.fileset).
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        """
+        Args:
+            conn: Connection to the database holding the tables
+        """
+        self.conn = conn
+        self.cursor = conn.cursor()
+        self.cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS [{LOADED_TABLE}] ("
+            "table_name TEXT PRIMARY KEY, source_path TEXT, fingerprint TEXT, "
+            "rows INTEGER, loaded_at REAL)"
+        )
+        self.conn.commit()
+
+    def lookup(self, table_name: str) -> Optional[str]:
+        """Fingerprint recorded for a table that still exists, or None"""
+        self.cursor.execute(
+            f"SELECT fingerprint FROM [{LOADED_TABLE}] WHERE table_name = ? "
+            "AND table_name IN (SELECT name FROM sqlite_master WHERE type = 'table')",
+            (table_name,)
+        )
+        row = self.cursor.fetchone()
+        return row[0] if row else None
+
+    def record(self, table_name: str, source_path: str, fingerprint: str, rows: int) -> None:
+        """Record that `table_name` now holds the file with `fingerprint`"""
+        self.cursor.execute(
+            f"INSERT OR REPLACE INTO [{LOADED_TABLE}] "
+            "(table_name, source_path, fingerprint, rows, loaded_at) VALUES (?, ?, ?, ?, ?)",
+            (table_name, source_path, fingerprint, rows, time.time())
+        )
+        self.conn.commit()
+
+    def forget(self, table_name: str) -> None:
+        """Drop the record of a table about to be reloaded"""
+        self.cursor.execute(f"DELETE FROM [{LOADED_TABLE}] WHERE table_name = ?", (table_name,))
+        self.conn.commit()
@@ -1,7 +1,8 @@
 """File format parsers"""
 from .base import BaseParser
 from .json_parser import JSONParser
+from .ndjson_parser import NDJSONParser
 from .csv_parser import CSVParser
 from .nginx_parser import NginxParser
 
-__all__ = ['BaseParser', 'JSONParser', 'CSVParser', 'NginxParser']
+__all__ = ['BaseParser', 'JSONParser', 'NDJSONParser', 'CSVParser', 'NginxParser']
@@ -5,8 +5,10 @@ Base parser class for all file format parsers
 """
 
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 import os
+from .reader import logical_name
+from .rows import Rows
 
 
 class BaseParser(ABC):
@@ -14,6 +16,23 @@ class BaseParser(ABC):
 
     # Class attributes for metadata
     format_name: str = "base"
+    # Bump when parser output changes, so cached tables are rebuilt
+    format_version: str = "1"
+    # Columns commonly used in WHERE / GROUP BY, indexed in auto-index mode
+    index_hints: List[str] = []
+    # True if iter_records_from() can resume parsing at a byte offset
+    supports_tail: bool = False
+    # True if the file can be split into line ranges parsed independently
+    supports_parallel: bool = False
+    # True if iter_rows() produces tuples in a column order known before parsing
+    supports_rows: bool = False
+    # True if set_pushdown() makes the parser skip columns and rows while parsing
+    supports_pushdown: bool = False
+    # Columns and filters for the records produced (see set_pushdown)
+    pushdown = None
+    # Flattens nested objects in the records produced, for parsers of
+    # formats with nested values (see set_flattener); None for flat formats
+    flattener = None
     file_extensions: List[str] = []
     mime_types: List[str] = []
 
@@ -30,18 +49,179 @@ class BaseParser(ABC):
         """
         pass
 
-    @abstractmethod
+    def iter_records(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Parse the file lazily, yielding one dictionary per record.
+
+        Parsers should override this (or iter_rows()) so that files are
+        never fully materialized. The default implementation adapts
+        iter_rows(), or wraps a legacy load().
+
+        Args:
+            file_path: Path to the file to load
+
+        Yields:
+            Dictionaries representing the data, one per record
+        """
+        if self.supports_rows:
+            yield from self.iter_rows(file_path)
+            return
+        if type(self).load is BaseParser.load:
+            raise NotImplementedError(
+                f"{type(self).__name__} must implement iter_records() or load()"
+            )
+        yield from self.load(file_path)
+
+    def iter_rows(self, file_path: str) -> Rows:
+        """
+        Parse the file lazily into tuples, for parsers with `supports_rows = True`.
+
+        The column order is fixed before parsing starts (by the file's
+        header or format, and the pushdown), so the loader inserts the
+        tuples without building a dictionary per record.
+
+        Args:
+            file_path: Path to the file to load
+
+        Returns:
+            Rows whose `columns` are known immediately; the file is read as
+            `rows` is iterated
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not produce rows")
+
     def load(self, file_path: str) -> List[Dict[str, Any]]:
         """
         Load and parse the file into a list of dictionaries.
 
+        Compatibility wrapper around iter_records().
+
         Args:
             file_path: Path to the file to load
 
         Returns:
             List of dictionaries representing the data
         """
-        pass
+        return list(self.iter_records(file_path))
+
+    def iter_records_from(self, file_path: str, offset: int = 0,
+                          skip_partial: bool = False) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """
+        Parse the file starting at a byte offset, for incremental ingestion.
+
+        Only parsers with `supports_tail = True` implement this.
+
+        Args:
+            file_path: Path to the file to load
+            offset: Byte offset of the first line to parse
+            skip_partial: Stop before a trailing line without a newline
+                (it may still be being written)
+
+        Yields:
+            Tuples of (record, byte offset just past the record's line)
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support incremental loading")
+
+    def prepare_ranges(self, file_path: str) -> int:
+        """
+        Prepare for parallel parsing of byte ranges.
+
+        Called once in the main process before the parser instance is sent
+        to workers, so any state read here (e.g. a CSV header) travels with
+        it. Only parsers with `supports_parallel = True` implement this.
+
+        Args:
+            file_path: Path to the file to load
+
+        Returns:
+            Byte offset where record lines begin
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support parallel loading")
+
+    def iter_records_range(self, file_path: str, start: int, end: int) -> Iterator[Dict[str, Any]]:
+        """
+        Parse the lines starting within [start, end) of the file.
+
+        Args:
+            file_path: Path to the file to load
+            start: Byte offset of the first line (newline-aligned)
+            end: Lines starting at or after this offset are left to the next range
+
+        Yields:
+            Dictionaries representing the data, one per record
+        """
+        if self.supports_rows:
+            yield from self.iter_rows_range(file_path, start, end)
+            return
+        raise NotImplementedError(f"{type(self).__name__} does not support parallel loading")
+
+    def iter_rows_range(self, file_path: str, start: int, end: int) -> Rows:
+        """
+        Parse the lines starting within [start, end) of the file into tuples.
+
+        Only parsers with both `supports_parallel` and `supports_rows`
+        implement this. The columns are the same for every range of a file
+        once prepare_ranges() has run.
+
+        Args:
+            file_path: Path to the file to load
+            start: Byte offset of the first line (newline-aligned)
+            end: Lines starting at or after this offset are left to the next range
+
+        Returns:
+            Rows of the range
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not produce rows")
+
+    def get_columns(self, file_path: str) -> Optional[List[str]]:
+        """
+        Return the column names of the file without parsing its records.
+
+        Needed for pushdown, which analyzes a query before loading.
+
+        Args:
+            file_path: Path to the file
+
+        Returns:
+            Column names, or None if they are only known after parsing
+        """
+        return None
+
+    def set_pushdown(self, pushdown: Optional[Any]) -> None:
+        """
+        Restrict the records produced by iter_records() and iter_records_range().
+
+        Parsers with `supports_pushdown = True` only build the columns in
+        `pushdown.columns` and skip rows rejected by
+        `pushdown.row_filter()`, before any record is created.
+
+        Args:
+            pushdown: core.pushdown.Pushdown, or None to produce everything
+        """
+        self.pushdown = pushdown
+
+    def set_flattener(self, flattener: Any) -> None:
+        """
+        Choose how nested objects in the records are turned into columns.
+
+        Only has an effect on parsers that have a flattener (formats with
+        nested values); every method producing records applies it.
+
+        Args:
+            flattener: parsers.flatten.Flattener
+        """
+        if self.flattener is not None:
+            self.flattener = flattener
+
+    def get_fingerprint_options(self) -> Dict[str, Any]:
+        """
+        Return parser options that affect the parsed output.
+
+        Included in cache fingerprints so that loading the same file with
+        different options never reuses a stale table.
+        """
+        if self.flattener is not None:
+            return {'flatten': self.flattener.options()}
+        return {}
 
     def get_table_name(self, file_path: str) -> str:
         """
@@ -53,7 +233,7 @@ class BaseParser(ABC):
         Returns:
             Suggested table name (default: 'data')
         """
-        basename = os.path.basename(file_path)
+        basename = logical_name(file_path)
         name_without_ext = os.path.splitext(basename)[0]
         # Sanitize: remove non-alphanumeric chars
         table_name = name_without_ext.replace('-', '_').replace(' ', '_').replace('.', '_')
@@ -5,9 +5,33 @@ CSV file format parser
 """
 
 import csv
+import re
 import sys
-from typing import List, Dict, Any
+from itertools import islice
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence, Tuple
 from .base import BaseParser
+from .reader import iter_text_lines, open_file, logical_name
+from .rows import Rows
+
+
+# Bytes read from the start of the file to detect the delimiter
+SNIFF_BYTES = 8 * 1024
+
+# Delimiters the sniffer may choose from
+SNIFF_DELIMITERS = ',\t;|'
+
+# Rows converted together, column by column; the first batch of a file (or
+# byte range) decides each column's type
+CONVERT_BATCH_ROWS = 2000
+
+# Values typed as INTEGER / REAL. Integers with leading zeros (e.g. 007)
+# or a sign other than a single '-' (+7, -0) stay text, as do NaN and inf;
+# empty fields of numeric columns become NULL.
+_INTEGER = re.compile(r'0|-?[1-9][0-9]*')
+_REAL = re.compile(r'(?!-0\Z)-?(?:(?:0|[1-9][0-9]*)(?:\.[0-9]*)?|\.[0-9]+)(?:[eE][-+]?[0-9]+)?')
+
+# Range of integers SQLite can store
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
 
 
 class CSVParser(BaseParser):
@@ -16,39 +40,26 @@ class CSVParser(BaseParser):
     format_name = "csv"
     file_extensions = ['.csv', '.tsv']
     mime_types = ['text/csv', 'text/tab-separated-values']
+    supports_parallel = True
+    supports_pushdown = True
+    supports_rows = True
 
     def supports_format(self, file_path: str) -> bool:
         """Check if file is CSV"""
-        ext = file_path.lower().split('.')[-1]
+        ext = logical_name(file_path).lower().split('.')[-1]
         return ext in ['csv', 'tsv']
 
-    def load(self, file_path: str) -> List[Dict[str, Any]]:
-        """Load CSV file and convert to list of dictionaries"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                # Auto-detect delimiter
-                sample = f.read(1024)
-                f.seek(0)
-
-                delimiter = ','
-                try:
-                    sniffer = csv.Sniffer()
-                    if sniffer.has_header(sample):
-                        delimiter = sniffer.sniff(sample).delimiter
-                except csv.Error:
-                    delimiter = ','
-
-                # Read with detected delimiter
-                reader = csv.DictReader(f, delimiter=delimiter)
-                data = list(reader)
-
-                # Type inference: try to convert strings to numbers
-                for row in data:
-                    for key, value in row.items():
-                        row[key] = self._infer_type(value)
-
-                return data
+    def iter_rows(self, file_path: str) -> Rows:
+        """Stream CSV rows as tuples in header order"""
+        delimiter, fieldnames, body_start = self._read_header(file_path)
+        rows = self._parse_lines(file_path, body_start, None, delimiter, fieldnames)
+        return Rows(rows.columns, self._exit_on_error(file_path, rows.rows))
 
+    @staticmethod
+    def _exit_on_error(file_path: str, rows: Iterator[Tuple[Any, ...]]) -> Iterator[Tuple[Any, ...]]:
+        """Yield from `rows`, reporting a read error and exiting"""
+        try:
+            yield from rows
         except FileNotFoundError:
             print(f"错误: 文件 {file_path} 不存在")
             sys.exit(1)
@@ -56,11 +67,242 @@ class CSVParser(BaseParser):
             print(f"读取CSV错误: {e}")
             sys.exit(1)
 
-    def _infer_type(self, value: str) -> Any:
-        """Try to convert string to int, float, or keep as string"""
+    def get_columns(self, file_path: str) -> Optional[List[str]]:
+        """Column names from the header row"""
+        _, fieldnames, _ = self._read_header(file_path)
+        return fieldnames
+
+    def prepare_ranges(self, file_path: str) -> int:
+        """
+        Read the delimiter and header so workers can parse body ranges.
+
+        Note: ranges are split on newlines, so quoted fields containing
+        line breaks are not supported when loading in parallel.
+        """
+        self._delimiter, self._fieldnames, body_start = self._read_header(file_path)
+        return body_start
+
+    def _read_header(self, file_path: str) -> Tuple[str, List[str], int]:
+        """
+        Return (delimiter, column names, byte offset of the first data line).
+
+        The delimiter is sniffed from the header and the complete lines
+        that follow it within the first SNIFF_BYTES bytes. Column names are
+        made unique (see _unique_names).
+        """
+        try:
+            with open_file(file_path, 'rb') as f:
+                header_line = f.readline()
+                body_start = f.tell()
+                sample = header_line + f.read(SNIFF_BYTES)
+        except FileNotFoundError:
+            print(f"错误: 文件 {file_path} 不存在")
+            sys.exit(1)
+
+        if len(sample) > len(header_line) and b'\n' in sample[len(header_line):]:
+            # Leave out the last, possibly cut, line
+            sample = sample[:sample.rindex(b'\n') + 1]
+        delimiter = self._detect_delimiter(sample.decode('utf-8', errors='ignore'))
+        header = header_line.decode('utf-8')
+        fields = next(csv.reader([header], delimiter=delimiter), [])
+        return delimiter, _unique_names(fields), body_start
+
+    def iter_rows_range(self, file_path: str, start: int, end: int) -> Rows:
+        """Parse the CSV rows starting within [start, end) using the prepared header"""
+        return self._parse_lines(file_path, start, end, self._delimiter, self._fieldnames)
+
+    def _parse_lines(self, file_path: str, start: int, end: Optional[int], delimiter: str,
+                     fieldnames: List[str]) -> Rows:
+        """
+        Parse the data lines starting within [start, end) into tuples.
+
+        Rows are read in batches and converted column by column (see
+        _ColumnTypes). With a pushdown, only the produced and filtered
+        columns are converted, and only the produced columns of the rows
+        that pass the filters are output.
+        """
+        width = len(fieldnames)
+        keep = None
+        produced = list(range(width))
+        converted = produced
+        if self.pushdown is not None:
+            keep = self.pushdown.row_filter(fieldnames)
+            produced = self.pushdown.project(fieldnames)
+            filtered = {i for i, name in enumerate(fieldnames)
+                        if any(f.column == name for f in self.pushdown.filters)}
+            converted = sorted(set(produced) | filtered)
+        names = [fieldnames[i] for i in produced]
+        values = self._iter_values(file_path, start, end, delimiter, width, produced, converted, keep)
+        return Rows(names, values)
+
+    @staticmethod
+    def _iter_values(file_path: str, start: int, end: Optional[int], delimiter: str, width: int,
+                     produced: List[int], converted: List[int],
+                     keep: Optional[Callable[[Sequence[Any]], bool]]) -> Iterator[Tuple[Any, ...]]:
+        """Yield the `produced` fields of the rows passing `keep`, typed per column"""
+        types = _ColumnTypes(converted)
+        rows = csv.reader(iter_text_lines(file_path, start, end), delimiter=delimiter)
+        for batch in _iter_batches(rows, width, CONVERT_BATCH_ROWS):
+            columns = list(zip(*batch))
+            types.convert(columns)
+            output = zip(*[columns[i] for i in produced]) if produced else (() for _ in batch)
+            if keep is None:
+                yield from output
+            else:
+                for row, values in zip(zip(*columns), output):
+                    if keep(row):
+                        yield values
+
+    def _detect_delimiter(self, sample: str) -> str:
+        """Sniff the delimiter from a sample of the file"""
         try:
-            if '.' in value:
-                return float(value)
-            return int(value)
-        except (ValueError, TypeError):
-            return value
+            return csv.Sniffer().sniff(sample, delimiters=SNIFF_DELIMITERS).delimiter
+        except csv.Error:
+            return ','
+
+
+def _unique_names(fields: List[str]) -> List[str]:
+    """
+    Column names for header fields: empty fields become column_<position>
+    and repeated names (compared case-insensitively, as SQLite does) are
+    suffixed _1, _2, ...
+    """
+    names: List[str] = []
+    used = set()
+    for position, field in enumerate(fields, 1):
+        base = field or f"column_{position}"
+        name = base
+        suffix = 0
+        while name.lower() in used:
+            suffix += 1
+            name = f"{base}_{suffix}"
+        used.add(name.lower())
+        names.append(name)
+    return names
+
+
+def _iter_batches(rows: Iterator[List[str]], width: int, size: int) -> Iterator[List[List[str]]]:
+    """
+    Group parsed rows into batches of rows of exactly `width` fields.
+
+    Blank lines are skipped (as csv.DictReader does), short rows are
+    padded with None and fields beyond the header are dropped.
+    """
+    rows = filter(None, rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        for i, row in enumerate(batch):
+            if len(row) != width:
+                batch[i] = (row + [None] * (width - len(row)))[:width]
+        yield batch
+
+
+class _ColumnTypes:
+    """
+    Per-column conversion of CSV text, decided once from the first batch.
+
+    A column is INTEGER if every non-empty sampled value is a canonical
+    integer, REAL if every one is a decimal or scientific number, and text
+    otherwise. Later batches are converted a whole column at a time. When
+    a batch of an INTEGER column fails to convert, the column becomes
+    REAL; when a value is not a number at all, the column's values are
+    converted one by one from that batch on, so the numbers stay numbers
+    (the loader then decides whether the column needs TEXT affinity).
+    """
+
+    def __init__(self, indexes: Sequence[int]):
+        """
+        Args:
+            indexes: Positions of the columns to convert
+        """
+        self.indexes = indexes
+        self.converters: Optional[Dict[int, Callable[[Sequence[Optional[str]]], Optional[list]]]] = None
+
+    def convert(self, columns: List[Sequence[Optional[str]]]) -> None:
+        """Replace the converted columns of a batch (a list of value sequences) in place"""
+        if self.converters is None:
+            self.converters = {}
+            for i in self.indexes:
+                converter = _sample_converter(columns[i])
+                if converter is not None:
+                    self.converters[i] = converter
+
+        for i, converter in list(self.converters.items()):
+            values = converter(columns[i])
+            if values is None and converter is _to_integers:
+                converter = _to_reals
+                values = converter(columns[i])
+            if values is None:
+                converter = _to_mixed
+                values = converter(columns[i])
+            self.converters[i] = converter
+            columns[i] = values
+
+
+def _sample_converter(values: Sequence[Optional[str]]) -> Optional[Callable[[Sequence[Optional[str]]], Optional[list]]]:
+    """Choose the conversion of a column from sample values (None = keep text)"""
+    present = [value for value in values if value]
+    if not present:
+        return None
+    if all(map(_INTEGER.fullmatch, present)) and _to_integers(values) is not None:
+        return _to_integers
+    if all(map(_REAL.fullmatch, present)):
+        return _to_reals
+    return None
+
+
+def _to_integers(values: Sequence[Optional[str]]) -> Optional[list]:
+    """Convert a column to int (empty -> None), or None if any value is not a canonical integer"""
+    present = _present(values)
+    try:
+        numbers = list(map(int, present))
+    except ValueError:
+        return None
+    # int() also accepts '007', '+7', ' 7' and '1_000', which must stay text
+    if tuple(map(str, numbers)) != tuple(present):
+        return None
+    if numbers and (min(numbers) < _INT64_MIN or max(numbers) > _INT64_MAX):
+        return None
+    return numbers if present is values else _restore_nulls(values, numbers)
+
+
+def _to_reals(values: Sequence[Optional[str]]) -> Optional[list]:
+    """Convert a column to float (empty -> None), or None if any value is not a number"""
+    present = _present(values)
+    # float() also accepts 'nan', 'inf' and '1_0', which must stay text
+    if not all(map(_REAL.fullmatch, present)):
+        return None
+    numbers = list(map(float, present))
+    return numbers if present is values else _restore_nulls(values, numbers)
+
+
+def _to_mixed(values: Sequence[Optional[str]]) -> list:
+    """Convert each value that is a number on its own, keeping the others as text (empty -> None)"""
+    return [_to_number(value) for value in values]
+
+
+def _to_number(value: Optional[str]) -> Any:
+    """One value as int or float if it is a canonical number, else unchanged (empty -> None)"""
+    if not value:
+        return None
+    if _INTEGER.fullmatch(value):
+        number = int(value)
+        return number if _INT64_MIN <= number <= _INT64_MAX else value
+    if _REAL.fullmatch(value):
+        return float(value)
+    return value
+
+
+def _present(values: Sequence[Optional[str]]) -> Sequence[str]:
+    """The non-empty values of a column (`values` itself if none is empty)"""
+    if '' in values or None in values:
+        return [value for value in values if value]
+    return values
+
+
+def _restore_nulls(values: Sequence[Optional[str]], numbers: List[Any]) -> List[Any]:
+    """Put None back where `values` had empty fields"""
+    converted = iter(numbers)
+    return [next(converted) if value else None for value in values]
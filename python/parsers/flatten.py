@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Flattening of nested JSON records into columns
+"""
+
+from typing import Any, Dict, Iterable, List
+from .json_stream import dumps
+
+
+# Levels of nested objects turned into columns by default
+DEFAULT_FLATTEN_DEPTH = 3
+
+# Joins the keys of a nested path into a column name, e.g. user.geo.country
+PATH_SEPARATOR = '.'
+
+# Column holding array elements that are not objects, in exploded rows
+VALUE_COLUMN = 'value'
+
+
+class Flattener:
+    """
+    Turn nested objects of a record into dotted columns, one record at a time.
+
+    {"user": {"id": 7, "geo": {"country": "DE"}}} becomes
+    {"user.id": 7, "user.geo.country": "DE"}. Objects nested deeper than
+    `max_depth` keys, and arrays, are stored as JSON text, which SQLite's
+    JSON1 functions (json_extract, json_each, ...) can query.
+
+    Arrays at an `explode` path are kept as lists of flattened rows instead,
+    for the loader to insert into a child table (see core.nested).
+    """
+
+    def __init__(self, max_depth: int = DEFAULT_FLATTEN_DEPTH, explode: Iterable[str] = ()):
+        """
+        Args:
+            max_depth: Keys per column name at most (1 = only top-level keys)
+            explode: Column names of arrays to keep as lists of rows
+        """
+        self.max_depth = max(max_depth, 1)
+        self.explode = frozenset(explode)
+        # Elements of exploded arrays are flattened without exploding further
+        self._elements = Flattener(max_depth) if self.explode else None
+
+    def options(self) -> Dict[str, Any]:
+        """Settings that change the flattened output, for cache fingerprints"""
+        return {'max_depth': self.max_depth, 'explode': sorted(self.explode)}
+
+    def flatten(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Flatten one record.
+
+        Records without nested values are returned unchanged.
+
+        Args:
+            record: Decoded JSON object
+
+        Returns:
+            Dictionary of column name to scalar (or JSON text) value
+        """
+        for value in record.values():
+            if isinstance(value, (dict, list)):
+                break
+        else:
+            return record
+        row: Dict[str, Any] = {}
+        self._flatten_into(row, record, '', 1)
+        return row
+
+    def _flatten_into(self, row: Dict[str, Any], obj: Dict[str, Any], prefix: str, depth: int) -> None:
+        """Add the fields of `obj`, found `depth` keys deep, to `row`"""
+        for key, value in obj.items():
+            name = prefix + key
+            if isinstance(value, dict):
+                if value and depth < self.max_depth:
+                    self._flatten_into(row, value, name + PATH_SEPARATOR, depth + 1)
+                    continue
+                value = dumps(value)
+            elif isinstance(value, list):
+                value = self._explode(value) if name in self.explode else dumps(value)
+            row[name] = value
+
+    def _explode(self, elements: List[Any]) -> List[Dict[str, Any]]:
+        """Rows for the elements of an exploded array"""
+        rows = []
+        for element in elements:
+            if isinstance(element, dict):
+                rows.append(self._elements.flatten(element))
+            elif isinstance(element, list):
+                rows.append({VALUE_COLUMN: dumps(element)})
+            else:
+                rows.append({VALUE_COLUMN: element})
+        return rows
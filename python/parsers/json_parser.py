@@ -5,9 +5,18 @@ JSON file format parser
 """
 
 import json
+import os
 import sys
-from typing import List, Dict, Any
+from typing import Dict, Any, Iterator
 from .base import BaseParser
+from .reader import open_file, is_compressed, logical_name
+from .json_stream import iter_json_records, loads
+from .flatten import Flattener
+
+
+# Plain files up to this size are decoded in one call (with orjson if installed);
+# larger and compressed files are decoded one record at a time
+WHOLE_DOCUMENT_BYTES = 16 * 1024 * 1024
 
 
 class JSONParser(BaseParser):
@@ -16,30 +25,21 @@ class JSONParser(BaseParser):
     format_name = "json"
     file_extensions = ['.json']
     mime_types = ['application/json']
+    flattener = Flattener()
 
     def supports_format(self, file_path: str) -> bool:
         """Check if file is valid JSON"""
-        return file_path.lower().endswith('.json')
+        return logical_name(file_path).lower().endswith('.json')
 
-    def load(self, file_path: str) -> List[Dict[str, Any]]:
-        """Load JSON file and extract data array"""
+    def iter_records(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """Yield flattened records, decoding large files incrementally"""
+        flatten = self.flattener.flatten
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                json_data = json.load(f)
-
-            # Extract "data" array if present (backward compatibility)
-            if "data" in json_data and isinstance(json_data["data"], list):
-                return json_data["data"]
-
-            # Handle direct array
-            if isinstance(json_data, list):
-                return json_data
-
-            # Handle single object - wrap in list
-            if isinstance(json_data, dict):
-                return [json_data]
-
-            raise ValueError("Unsupported JSON structure")
+            if not is_compressed(file_path) and os.path.getsize(file_path) <= WHOLE_DOCUMENT_BYTES:
+                yield from map(flatten, self._iter_document(file_path))
+                return
+            with open_file(file_path, 'r', encoding='utf-8') as f:
+                yield from map(flatten, iter_json_records(f))
 
         except FileNotFoundError:
             print(f"错误: 文件 {file_path} 不存在")
@@ -47,3 +47,33 @@ class JSONParser(BaseParser):
         except json.JSONDecodeError as e:
             print(f"错误: 文件 {file_path} 不是有效的JSON格式: {e}")
             sys.exit(1)
+
+    def _iter_document(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """Decode a small file as one document"""
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        try:
+            json_data = loads(content)
+        except json.JSONDecodeError:
+            # Possibly several concatenated documents; the stream decoder
+            # handles those and reports the error otherwise
+            with open_file(file_path, 'r', encoding='utf-8') as f:
+                yield from iter_json_records(f)
+            return
+
+        # Extract "data" array if present (backward compatibility)
+        if isinstance(json_data, dict) and isinstance(json_data.get("data"), list):
+            yield from json_data["data"]
+            return
+
+        # Handle direct array
+        if isinstance(json_data, list):
+            yield from json_data
+            return
+
+        # Handle single object - wrap in list
+        if isinstance(json_data, dict):
+            yield json_data
+            return
+
+        raise ValueError("Unsupported JSON structure")
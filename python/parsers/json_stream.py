@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Incremental JSON decoding: records of a large document one at a time
+"""
+
+import json
+import re
+from typing import IO, Any, Dict, Iterator, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib decoder is used without it
+    orjson = None
+
+
+# Characters read from the file per refill of the decode buffer
+DEFAULT_CHUNK_CHARS = 1024 * 1024
+
+# A decode error this close to the end of the buffer may just be a cut value
+_TRUNCATION_WINDOW = 64
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+_DECODER = json.JSONDecoder()
+
+
+def loads(text: Union[str, bytes]) -> Any:
+    """
+    Decode one JSON document, with orjson when it is installed.
+
+    orjson rejects some documents the stdlib accepts (e.g. integers wider
+    than 64 bits, NaN); those are decoded again with the json module, which
+    also raises the error for invalid input.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(text)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(text)
+
+
+def dumps(value: Any) -> str:
+    """Encode a value as compact JSON text, with orjson when it is installed"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode('utf-8')
+        except TypeError:  # e.g. integers wider than 64 bits
+            pass
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+class _Buffer:
+    """Text read from a file so far, decoded from the front"""
+
+    def __init__(self, f: IO[str], chunk_chars: int):
+        self.f = f
+        self.chunk_chars = chunk_chars
+        self.text = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size: int = 0) -> bool:
+        """Append more text (dropping what was decoded); False at end of file"""
+        if self.eof:
+            return False
+        data = self.f.read(max(size, self.chunk_chars))
+        if not data:
+            self.eof = True
+            return False
+        self.text = self.text[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ('' at end of file)"""
+        while True:
+            self.pos = _WHITESPACE.match(self.text, self.pos).end()
+            if self.pos < len(self.text):
+                return self.text[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of `chars`"""
+        char = self.peek()
+        if not char or char not in chars:
+            expected = ' or '.join(repr(c) for c in chars)
+            raise json.JSONDecodeError(f"Expecting {expected}", self.text, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the JSON value at the current position"""
+        self.peek()
+        wanted = self.chunk_chars
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as e:
+                truncated = (len(self.text) - e.pos <= _TRUNCATION_WINDOW
+                             or e.msg.startswith('Unterminated string'))
+                # Grow the read size so a huge value is not decoded again per chunk
+                if truncated and self.fill(wanted):
+                    wanted *= 2
+                    continue
+                raise
+            if end == len(self.text) and self.fill(wanted):
+                # A number may continue in the next chunk
+                wanted *= 2
+                continue
+            self.pos = end
+            return value
+
+
+def iter_json_records(f: IO[str], chunk_chars: int = DEFAULT_CHUNK_CHARS) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of a JSON document without decoding it as a whole.
+
+    Accepted layouts, matching what JSONParser has always loaded:
+    a top-level array of records, an object whose "data" key holds the
+    array (other keys are skipped), or a single object. Further top-level
+    values after the first (concatenated JSON) are yielded as records too.
+    Only one record at a time is held in memory besides the read buffer.
+
+    Args:
+        f: File opened in text mode
+        chunk_chars: Characters read per refill
+
+    Yields:
+        Records (normally dictionaries)
+
+    Raises:
+        json.JSONDecodeError: Invalid JSON
+        ValueError: A top-level value that is neither an array nor an object
+    """
+    buffer = _Buffer(f, chunk_chars)
+    first = True
+    while True:
+        char = buffer.peek()
+        if not char:
+            return
+        if char == '[':
+            buffer.pos += 1
+            yield from _iter_array(buffer)
+        elif char == '{' and first:
+            yield from _iter_wrapper(buffer)
+        else:
+            value = buffer.value()
+            if not isinstance(value, dict):
+                raise ValueError("Unsupported JSON structure")
+            yield value
+        first = False
+
+
+def _iter_array(buffer: _Buffer) -> Iterator[Any]:
+    """Yield the elements of an array whose '[' was consumed"""
+    if buffer.peek() == ']':
+        buffer.pos += 1
+        return
+    while True:
+        yield buffer.value()
+        if buffer.expect(',]') == ']':
+            return
+
+
+def _iter_wrapper(buffer: _Buffer) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the records of a top-level object: the elements of its "data"
+    array if it has one, otherwise the object itself.
+    """
+    buffer.expect('{')
+    fields = {}
+    streamed = False
+    if buffer.peek() == '}':
+        buffer.pos += 1
+        yield fields
+        return
+    while True:
+        key = buffer.value()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Expecting property name enclosed in double quotes",
+                                       buffer.text, buffer.pos)
+        buffer.expect(':')
+        if key == 'data' and not streamed and buffer.peek() == '[':
+            buffer.pos += 1
+            yield from _iter_array(buffer)
+            streamed = True
+        else:
+            fields[key] = buffer.value()
+        if buffer.expect(',}') == '}':
+            break
+    if not streamed:
+        yield fields
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+NDJSON / JSON Lines file format parser (one JSON object per line)
+"""
+
+import json
+import sys
+from typing import Dict, Any, Iterator, Optional, Tuple
+from .base import BaseParser
+from .reader import iter_text_lines_with_offsets, logical_name
+from .json_stream import loads
+from .flatten import Flattener
+
+
+class NDJSONParser(BaseParser):
+    """Parser for newline-delimited JSON (NDJSON, JSON Lines)"""
+
+    format_name = "ndjson"
+    file_extensions = ['.ndjson', '.jsonl', '.ldjson']
+    mime_types = ['application/x-ndjson', 'application/jsonl']
+    supports_tail = True
+    supports_parallel = True
+    flattener = Flattener()
+
+    def supports_format(self, file_path: str) -> bool:
+        """Check if file is NDJSON"""
+        return logical_name(file_path).lower().endswith(('.ndjson', '.jsonl', '.ldjson'))
+
+    def iter_records(self, file_path: str) -> Iterator[Dict[str, Any]]:
+        """Decode one record per line"""
+        for record, _ in self.iter_records_from(file_path):
+            yield record
+
+    def prepare_ranges(self, file_path: str) -> int:
+        """Records start at the beginning of the file"""
+        return 0
+
+    def iter_records_range(self, file_path: str, start: int, end: int) -> Iterator[Dict[str, Any]]:
+        """Decode the lines starting within [start, end)"""
+        for record, _ in self.iter_records_from(file_path, start, end=end):
+            yield record
+
+    def iter_records_from(self, file_path: str, offset: int = 0,
+                          skip_partial: bool = False,
+                          end: Optional[int] = None) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """
+        Decode lines from a byte offset, yielding (flattened record, end offset).
+
+        Line numbers are only known when reading from the start of the
+        file; a line of a byte range or of an appended tail is reported
+        by the byte offset at which it starts.
+        """
+        flatten = self.flattener.flatten
+        try:
+            lines = iter_text_lines_with_offsets(file_path, offset, end, skip_partial=skip_partial)
+            line_start = offset
+            for line_num, (line, position) in enumerate(lines, 1):
+                start, line_start = line_start, position
+                if not line.strip():
+                    continue
+                try:
+                    record = loads(line)
+                except json.JSONDecodeError:
+                    print(f"警告: 无法解析{self._line_label(offset, line_num, start)}")
+                    continue
+                if not isinstance(record, dict):
+                    print(f"警告: {self._line_label(offset, line_num, start)}不是 JSON 对象")
+                    continue
+                yield flatten(record), position
+
+        except FileNotFoundError:
+            print(f"错误: 文件 {file_path} 不存在")
+            sys.exit(1)
+        except Exception as e:
+            print(f"读取JSON文件错误: {e}")
+            sys.exit(1)
+
+    @staticmethod
+    def _line_label(offset: int, line_num: int, start: int) -> str:
+        """Name a line by its number when read from the file start, else by its byte offset"""
+        return f"第 {line_num} 行" if offset == 0 else f"偏移 {start} 字节处的行"
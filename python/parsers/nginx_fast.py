@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fast-path parser for Nginx combined log lines (no regex, no strptime)
+"""
+
+import datetime
+from typing import Any, Dict, Optional, Tuple
+
+
+# Output column order; matches the group order of NginxParser.LOG_PATTERN
+COMBINED_COLUMNS = (
+    'remote_addr', 'remote_user', 'auth_user', 'time_local', 'request',
+    'method', 'path', 'protocol', 'status', 'body_bytes_sent',
+    'http_referer', 'http_user_agent',
+)
+
+_MONTHS = {
+    'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
+    'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12,
+}
+
+# Cached date prefixes before the cache is reset (logs span few days)
+_MAX_CACHED_DATES = 4096
+
+
+class TimestampConverter:
+    """
+    Convert '10/Oct/2023:13:55:36 +0000' to '2023-10-10T13:55:36'.
+
+    Consecutive log lines almost always share the same second, and nearly
+    always the same day, so the last result is reused verbatim and the
+    'DD/Mon/YYYY' date prefix is converted once and cached. Only the strict
+    zero-padded layout is handled; anything else returns None so the caller
+    can fall back to strptime.
+    """
+
+    def __init__(self):
+        self._last_raw: Optional[str] = None
+        self._last_iso: Optional[str] = None
+        self._dates: Dict[str, Optional[str]] = {}
+
+    def convert(self, timestamp_str: str) -> Optional[str]:
+        """Return the ISO timestamp, or None if not in the strict layout"""
+        if timestamp_str == self._last_raw:
+            return self._last_iso
+
+        raw = timestamp_str.split(' ', 1)[0]
+        # DD/Mon/YYYY:HH:MM:SS
+        if len(raw) != 20 or raw[11] != ':' or raw[14] != ':' or raw[17] != ':':
+            return None
+
+        date_part = raw[:11]
+        iso_date = self._dates.get(date_part, False)
+        if iso_date is False:
+            iso_date = self._convert_date(date_part)
+            if len(self._dates) >= _MAX_CACHED_DATES:
+                self._dates.clear()
+            self._dates[date_part] = iso_date
+        if iso_date is None:
+            return None
+
+        hour, minute, second = raw[12:14], raw[15:17], raw[18:20]
+        if not (hour.isdigit() and minute.isdigit() and second.isdigit()):
+            return None
+        if int(hour) > 23 or int(minute) > 59 or int(second) > 61:
+            return None
+
+        iso = f"{iso_date}T{raw[12:]}"
+        self._last_raw = timestamp_str
+        self._last_iso = iso
+        return iso
+
+    def to_iso(self, timestamp_str: str) -> str:
+        """
+        Convert a timestamp, falling back to strptime for unusual layouts.
+
+        Returns:
+            ISO format string, or the input unchanged if it cannot be parsed
+        """
+        iso = self.convert(timestamp_str)
+        if iso is not None:
+            return iso
+        try:
+            dt = datetime.datetime.strptime(timestamp_str.split(' ')[0], '%d/%b/%Y:%H:%M:%S')
+            return dt.isoformat()
+        except ValueError:
+            return timestamp_str
+
+    @staticmethod
+    def _convert_date(date_part: str) -> Optional[str]:
+        """'10/Oct/2023' -> '2023-10-10', or None if invalid"""
+        if date_part[2] != '/' or date_part[6] != '/':
+            return None
+        day, month, year = date_part[:2], _MONTHS.get(date_part[3:6]), date_part[7:]
+        if month is None or not (day.isdigit() and year.isdigit()):
+            return None
+        try:
+            return datetime.date(int(year), month, int(day)).isoformat()
+        except ValueError:
+            return None
+
+
+class CombinedLineParser:
+    """
+    Split-based tokenizer for the combined log format.
+
+    parse() returns a tuple in COMBINED_COLUMNS order with the same values
+    NginxParser's regex path produces ('-' mapped to None, status and size
+    as int, time_local in ISO format). Lines it cannot tokenize with
+    certainty return None, and the caller falls back to the regex.
+    """
+
+    columns = COMBINED_COLUMNS
+
+    def __init__(self):
+        self.timestamps = TimestampConverter()
+
+    def parse(self, line: str) -> Optional[Tuple[Any, ...]]:
+        """
+        Parse a stripped log line.
+
+        Args:
+            line: Log line without the trailing newline
+
+        Returns:
+            Tuple of column values, or None if the fast path does not apply
+        """
+        if '\t' in line:
+            return None
+
+        # remote_addr remote_user auth_user [time_local] "request" ...
+        open_bracket = line.find(' [')
+        if open_bracket < 0:
+            return None
+        head = line[:open_bracket].split(' ')
+        if len(head) != 3 or not all(head):
+            return None
+
+        close_bracket = line.find('] "', open_bracket + 2)
+        if close_bracket < 0:
+            return None
+        time_local = line[open_bracket + 2:close_bracket]
+        if not time_local or ']' in time_local:
+            return None
+
+        request_start = close_bracket + 3
+        request_end = line.find('" ', request_start)
+        if request_end < 0:
+            return None
+        request = line[request_start:request_end]
+        request_parts = request.split(' ')
+        if len(request_parts) != 3 or not all(request_parts):
+            return None
+
+        # 200 1234 "referer" "user agent"
+        rest = line[request_end + 2:].split(' ', 2)
+        if len(rest) != 3:
+            return None
+        status, body_bytes_sent, quoted = rest
+        if not (status.isdigit() and body_bytes_sent.isdigit()) or not quoted.startswith('"'):
+            return None
+
+        referer_end = quoted.find('"', 1)
+        if referer_end < 0 or not quoted.startswith('" "', referer_end):
+            return None
+        agent_end = quoted.find('"', referer_end + 3)
+        if agent_end < 0:
+            return None
+
+        iso_time = self.timestamps.convert(time_local)
+        if iso_time is None:
+            return None
+
+        try:
+            status = int(status)
+            body_bytes_sent = int(body_bytes_sent)
+        except ValueError:
+            return None
+
+        remote_addr, remote_user, auth_user = head
+        method, path, protocol = request_parts
+        http_referer = quoted[1:referer_end]
+        http_user_agent = quoted[referer_end + 3:agent_end]
+
+        return (
+            None if remote_addr == '-' else remote_addr,
+            None if remote_user == '-' else remote_user,
+            None if auth_user == '-' else auth_user,
+            iso_time,
+            request,
+            None if method == '-' else method,
+            None if path == '-' else path,
+            None if protocol == '-' else protocol,
+            status,
+            body_bytes_sent,
+            None if http_referer == '-' else http_referer,
+            None if http_user_agent == '-' else http_user_agent,
+        )
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compile an nginx log_format string into a specialized line parser
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from .nginx_fast import TimestampConverter
+
+
+VARIABLE_PATTERN = re.compile(r'\$\{(\w+)\}|\$(\w+)')
+
+# Variables stored as INTEGER
+INT_VARIABLES = {
+    'status', 'body_bytes_sent', 'bytes_sent', 'request_length',
+    'connection', 'connection_requests', 'remote_port', 'server_port',
+    'content_length', 'upstream_status', 'upstream_bytes_received',
+    'upstream_bytes_sent', 'upstream_response_length', 'pid',
+}
+
+# Variables stored as REAL (seconds)
+FLOAT_VARIABLES = {
+    'request_time', 'upstream_response_time', 'upstream_connect_time',
+    'upstream_header_time', 'msec',
+}
+
+# Columns derived from $request
+REQUEST_COLUMNS = ('method', 'path', 'protocol')
+
+
+def _to_text(raw: str) -> Optional[str]:
+    return None if raw == '-' else raw
+
+
+def _to_int(raw: str) -> Any:
+    if raw == '-':
+        return None
+    try:
+        return int(raw)
+    except ValueError:
+        return raw
+
+
+def _to_float(raw: str) -> Any:
+    """
+    Convert a timing value. Several upstream attempts are logged as
+    '0.010, 0.020' or '0.010 : 0.020'; their times are summed.
+    """
+    if raw == '-':
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        pass
+    try:
+        parts = [part.strip() for part in re.split('[,:]', raw)]
+        return sum(float(part) for part in parts if part and part != '-')
+    except ValueError:
+        return raw
+
+
+class LogFormatParser:
+    """
+    Line parser generated from an nginx log_format definition.
+
+    The format is split once into variables and the literal text between
+    them. Parsing a line is then a fixed sequence of str.find() calls for
+    those literals, with a type converter chosen per variable: integers for
+    sizes and status codes, floats for timings, ISO strings for
+    $time_local, and '-' mapped to None. $request is additionally split
+    into method, path and protocol columns.
+    """
+
+    def __init__(self, log_format: str):
+        """
+        Args:
+            log_format: nginx log_format string, e.g. '$remote_addr [$time_local] "$request"'
+
+        Raises:
+            ValueError: If the format has no variables, two adjacent
+                variables, or two variables giving the same column (a
+                repeated variable, or $request with $method, $path or
+                $protocol)
+        """
+        self.log_format = log_format
+        self._timestamps = TimestampConverter()
+
+        matches = list(VARIABLE_PATTERN.finditer(log_format))
+        if not matches:
+            raise ValueError(f"log_format 中没有变量: {log_format!r}")
+
+        self._prefix = log_format[:matches[0].start()]
+        self._fields: List[Tuple[str, str, Callable[[str], Any]]] = []
+        self.columns: List[str] = []
+        sources: Dict[str, str] = {}
+        for i, match in enumerate(matches):
+            name = match.group(1) or match.group(2)
+            literal_end = matches[i + 1].start() if i + 1 < len(matches) else len(log_format)
+            literal = log_format[match.end():literal_end]
+            if not literal and i + 1 < len(matches):
+                raise ValueError(f"log_format 中变量 ${name} 与下一个变量之间没有分隔符")
+
+            self._fields.append((name, literal, self._converter_for(name)))
+            self._add_columns(name, sources)
+
+    def _add_columns(self, name: str, sources: Dict[str, str]) -> None:
+        """
+        Append the columns of a variable, rejecting names already taken.
+
+        Args:
+            name: Variable name
+            sources: Lower-cased column name to the variable that produced
+                it, for the columns added so far (updated in place)
+        """
+        derived = REQUEST_COLUMNS if name == 'request' else ()
+        for column in (name,) + derived:
+            # SQLite column names are case-insensitive
+            source = sources.get(column.lower())
+            if source is None:
+                continue
+            if column == name and source.lower() == name.lower():
+                raise ValueError(f"log_format 中变量 ${name} 出现了多次")
+            if column == name:
+                raise ValueError(f"log_format 中变量 ${name} 与 ${source} 拆分出的 {column} 列重名")
+            raise ValueError(f"log_format 中 ${name} 拆分出的 {column} 列与变量 ${source} 重名")
+        for column in (name,) + derived:
+            sources[column.lower()] = name
+        self.columns.extend((name,) + derived)
+
+    def _converter_for(self, name: str) -> Callable[[str], Any]:
+        """Choose the value converter for a variable"""
+        if name in INT_VARIABLES:
+            return _to_int
+        if name in FLOAT_VARIABLES:
+            return _to_float
+        if name == 'time_local':
+            return self._convert_time
+        return _to_text
+
+    def _convert_time(self, raw: str) -> Optional[str]:
+        return None if raw == '-' else self._timestamps.to_iso(raw)
+
+    def parse(self, line: str) -> Optional[Tuple[Any, ...]]:
+        """
+        Parse a stripped log line.
+
+        Args:
+            line: Log line without the trailing newline
+
+        Returns:
+            Tuple of values in `columns` order, or None if the line does not match
+        """
+        if not line.startswith(self._prefix):
+            return None
+
+        position = len(self._prefix)
+        values = []
+        for name, literal, convert in self._fields:
+            if literal:
+                end = line.find(literal, position)
+                if end < 0:
+                    return None
+            else:
+                end = len(line)
+
+            raw = line[position:end]
+            position = end + len(literal)
+            values.append(convert(raw))
+
+            if name == 'request':
+                parts = raw.split(' ')
+                if len(parts) == 3:
+                    values.extend(_to_text(part) for part in parts)
+                else:
+                    values.extend((None, None, None))
+
+        return tuple(values)
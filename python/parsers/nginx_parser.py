@@ -1,22 +1,32 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-Nginx access log parser (Combined format)
+Nginx access log parser (combined format or a custom log_format)
 """
 
 import re
 import sys
-from typing import List, Dict, Any
+from operator import itemgetter
+from typing import Dict, Any, Callable, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
 from .base import BaseParser
+from .reader import iter_text_lines_with_offsets, open_file, logical_name
+from .nginx_fast import CombinedLineParser, COMBINED_COLUMNS
+from .nginx_format import LogFormatParser
+from .rows import Rows
 
 
 class NginxParser(BaseParser):
-    """Parser for Nginx access logs (combined format)"""
+    """Parser for Nginx access logs (combined format or a custom log_format)"""
 
     format_name = "nginx"
     file_extensions = ['.log', '.access.log']
     mime_types = ['text/plain']
+    index_hints = ['status', 'remote_addr', 'path', 'method']
+    supports_tail = True
+    supports_parallel = True
+    supports_pushdown = True
+    supports_rows = True
 
     # Combined log format regex pattern
     # Example: 127.0.0.1 - - [10/Oct/2023:13:55:36 +0000] "GET /path HTTP/1.1" 200 1234 "http://referer" "Mozilla/5.0"
@@ -34,55 +44,120 @@ class NginxParser(BaseParser):
         r'"(?P<http_user_agent>[^"]*)"'             # User agent
     )
 
+    def __init__(self, log_format: Optional[str] = None):
+        """
+        Args:
+            log_format: nginx log_format string for non-combined logs
+                (None or 'combined' uses the built-in combined parser)
+        """
+        if log_format in (None, 'combined'):
+            self.log_format = None
+            # Split-based fast path; LOG_PATTERN is the fallback
+            self._line_parser = CombinedLineParser()
+            self.columns = COMBINED_COLUMNS
+        else:
+            self.log_format = log_format
+            self._line_parser = LogFormatParser(log_format)
+            self.columns = tuple(self._line_parser.columns)
+
+    def get_fingerprint_options(self) -> Dict[str, Any]:
+        """The log format changes the parsed columns"""
+        return {'log_format': self.log_format}
+
+    def get_columns(self, file_path: str) -> Optional[List[str]]:
+        """Columns are fixed by the log format"""
+        return list(self.columns)
+
     def supports_format(self, file_path: str) -> bool:
         """Check if file looks like Nginx log"""
-        if not file_path.lower().endswith(('.log', '.access.log')):
+        if not logical_name(file_path).lower().endswith(('.log', '.access.log')):
             return False
 
         # Try to parse first line to confirm format
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
+            with open_file(file_path, 'r', encoding='utf-8') as f:
                 first_line = f.readline().strip()
-                return bool(self.LOG_PATTERN.match(first_line))
+                return self._parse_line(first_line) is not None
         except Exception:
             return False
 
-    def load(self, file_path: str) -> List[Dict[str, Any]]:
-        """Parse Nginx access log into structured data"""
+    def iter_rows(self, file_path: str) -> Rows:
+        """Parse Nginx access log into tuples in `columns` order, one line at a time"""
+        return self.iter_rows_range(file_path, 0, None)
+
+    def prepare_ranges(self, file_path: str) -> int:
+        """Log lines start at the beginning of the file"""
+        return 0
+
+    def iter_rows_range(self, file_path: str, start: int, end: Optional[int]) -> Rows:
+        """Parse the log lines starting within [start, end)"""
+        names, project, keep = self._layout()
+        rows = (row for row, _ in self._iter_values(file_path, start, False, end, project, keep))
+        return Rows(names, rows)
+
+    def iter_records_from(self, file_path: str, offset: int = 0,
+                          skip_partial: bool = False,
+                          end: Optional[int] = None) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """Parse Nginx access log from a byte offset, yielding (record, end offset)"""
+        names, project, keep = self._layout()
+        for row, position in self._iter_values(file_path, offset, skip_partial, end, project, keep):
+            yield dict(zip(names, row)), position
+
+    def _layout(self) -> Tuple[List[str], Optional[Callable[[Sequence[Any]], Tuple[Any, ...]]],
+                               Optional[Callable[[Sequence[Any]], bool]]]:
+        """
+        Output columns under the pushdown.
+
+        Returns:
+            (column names, projection of a parsed line's tuple to them or
+            None to keep every column, row filter or None)
+        """
+        columns = list(self.columns)
+        if self.pushdown is None:
+            return columns, None, None
+        keep = self.pushdown.row_filter(columns)
+        indices = self.pushdown.project(columns)
+        if len(indices) == len(columns):
+            return columns, None, keep
+        if len(indices) == 1:
+            # itemgetter() of one index returns the value, not a tuple
+            index = indices[0]
+            project = lambda row: (row[index],)
+        else:
+            project = itemgetter(*indices)
+        return [columns[i] for i in indices], project, keep
+
+    def _iter_values(self, file_path: str, offset: int, skip_partial: bool, end: Optional[int],
+                     project: Optional[Callable[[Sequence[Any]], Tuple[Any, ...]]],
+                     keep: Optional[Callable[[Sequence[Any]], bool]]) -> Iterator[Tuple[Tuple[Any, ...], int]]:
+        """
+        Parse lines from a byte offset, yielding (output tuple, end offset).
+
+        Line numbers are only known when reading from the start of the
+        file; a line of a byte range or of an appended tail is reported
+        by the byte offset at which it starts.
+        """
         try:
-            data = []
-            with open(file_path, 'r', encoding='utf-8') as f:
-                for line_num, line in enumerate(f, 1):
-                    line = line.strip()
-                    if not line:
-                        continue
-
-                    match = self.LOG_PATTERN.match(line)
-                    if match:
-                        log_entry = match.groupdict()
-
-                        # Convert types
-                        log_entry['status'] = int(log_entry['status'])
-                        log_entry['body_bytes_sent'] = int(log_entry['body_bytes_sent'])
-
-                        # Parse timestamp
-                        try:
-                            log_entry['time_local'] = self._parse_nginx_timestamp(
-                                log_entry['time_local']
-                            )
-                        except ValueError:
-                            pass  # Keep as string if parsing fails
-
-                        # Handle empty strings
-                        for key, value in log_entry.items():
-                            if value == '-':
-                                log_entry[key] = None
-
-                        data.append(log_entry)
-                    else:
+            lines = iter_text_lines_with_offsets(file_path, offset, end, skip_partial=skip_partial)
+            line_start = offset
+            for line_num, (line, position) in enumerate(lines, 1):
+                start, line_start = line_start, position
+                line = line.strip()
+                if not line:
+                    continue
+
+                row = self._parse_line(line)
+                if row is None:
+                    if offset == 0:
                         print(f"警告: 无法解析第 {line_num} 行")
-
-            return data
+                    else:
+                        print(f"警告: 无法解析偏移 {start} 字节处的行")
+                elif keep is not None and not keep(row):
+                    continue
+                elif project is not None:
+                    yield project(row), position
+                else:
+                    yield row, position
 
         except FileNotFoundError:
             print(f"错误: 文件 {file_path} 不存在")
@@ -91,6 +166,45 @@ class NginxParser(BaseParser):
             print(f"读取日志文件错误: {e}")
             sys.exit(1)
 
+    def _parse_line(self, line: str) -> Optional[Tuple[Any, ...]]:
+        """Parse a stripped line into a tuple in `columns` order, or None"""
+        row = self._line_parser.parse(line)
+        if row is None and self.log_format is None:
+            row = self._parse_line_regex(line)
+        return row
+
+    def _parse_line_regex(self, line: str) -> Optional[Tuple[Any, ...]]:
+        """
+        Parse a line with LOG_PATTERN (fallback for lines the fast path rejects).
+
+        Returns:
+            Tuple of column values in COMBINED_COLUMNS order, or None
+        """
+        match = self.LOG_PATTERN.match(line)
+        if not match:
+            return None
+
+        log_entry = match.groupdict()
+
+        # Convert types
+        log_entry['status'] = int(log_entry['status'])
+        log_entry['body_bytes_sent'] = int(log_entry['body_bytes_sent'])
+
+        # Parse timestamp
+        try:
+            log_entry['time_local'] = self._parse_nginx_timestamp(
+                log_entry['time_local']
+            )
+        except ValueError:
+            pass  # Keep as string if parsing fails
+
+        # Handle empty strings
+        for key, value in log_entry.items():
+            if value == '-':
+                log_entry[key] = None
+
+        return tuple(log_entry[key] for key in COMBINED_COLUMNS)
+
     def _parse_nginx_timestamp(self, timestamp_str: str) -> str:
         """
         Parse Nginx timestamp format.
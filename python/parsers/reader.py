@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File opening and byte-range line reading shared by the parsers
+"""
+
+import bz2
+import contextlib
+import gzip
+import lzma
+import mmap
+import os
+import re
+from itertools import accumulate, chain
+from operator import methodcaller
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+
+# Target size of each byte range handed to a parallel worker
+DEFAULT_RANGE_BYTES = 8 * 1024 * 1024
+
+# Compressed files are decompressed transparently, chosen by suffix
+COMPRESSION_OPENERS = {
+    '.gz': gzip.open,
+    '.bz2': bz2.open,
+    '.xz': lzma.open,
+}
+
+# Size of the newline-aligned blocks decoded at once
+DEFAULT_BLOCK_BYTES = 1024 * 1024
+
+# Numeric suffix added by logrotate, e.g. access.log.1
+_ROTATION_SUFFIX = re.compile(r'\.\d+$')
+
+# Line breaks str.splitlines() recognises besides '\n', '\r\n' and '\r'
+_ASCII_LINE_BREAKS = ('\x0b', '\x0c', '\x1c', '\x1d', '\x1e')
+_OTHER_LINE_BREAKS = _ASCII_LINE_BREAKS + ('\x85', '\u2028', '\u2029')
+
+# Mappings opened by shared_mapping(), keyed by absolute path. Worker
+# processes forked while one is open inherit it instead of mapping again.
+_SHARED_MAPPINGS: Dict[str, mmap.mmap] = {}
+
+
+def is_compressed(file_path: str) -> bool:
+    """True if the file is read through a decompressor"""
+    return os.path.splitext(file_path)[1].lower() in COMPRESSION_OPENERS
+
+
+def open_file(file_path: str, mode: str = 'rb', encoding: Optional[str] = None) -> IO:
+    """
+    Open a file for reading, decompressing .gz/.bz2/.xz files on the fly.
+
+    Offsets used with seek()/tell() on a compressed file refer to the
+    decompressed content.
+
+    Args:
+        file_path: Path to the file
+        mode: 'rb' for bytes or 'r' for text
+        encoding: Text encoding (text mode only)
+
+    Returns:
+        File object
+    """
+    opener = COMPRESSION_OPENERS.get(os.path.splitext(file_path)[1].lower())
+    if opener is None:
+        return open(file_path, mode, encoding=encoding)
+    if 'b' not in mode:
+        return opener(file_path, mode.replace('r', 'rt'), encoding=encoding)
+    return opener(file_path, mode)
+
+
+def logical_name(file_path: str) -> str:
+    """
+    Return the file name with compression and rotation suffixes removed.
+
+    Used for format detection and table naming, so that
+    `access.log.30.gz` is treated like `access.log`.
+    """
+    name = os.path.basename(file_path)
+    root, ext = os.path.splitext(name)
+    if ext.lower() in COMPRESSION_OPENERS:
+        name = root
+    return _ROTATION_SUFFIX.sub('', name) or name
+
+
+@contextlib.contextmanager
+def map_file(file_path: str) -> Iterator[Optional[mmap.mmap]]:
+    """
+    Memory-map a plain (uncompressed) file read-only.
+
+    Reuses the mapping opened by shared_mapping() for the same file.
+
+    Args:
+        file_path: Path to the file
+
+    Yields:
+        The mapping, or None for an empty file (which cannot be mapped)
+    """
+    shared = _SHARED_MAPPINGS.get(os.path.abspath(file_path))
+    if shared is not None:
+        yield shared
+        return
+
+    with open(file_path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else None
+    try:
+        yield mapping
+    finally:
+        if mapping is not None:
+            mapping.close()
+
+
+@contextlib.contextmanager
+def shared_mapping(file_path: str) -> Iterator[None]:
+    """
+    Keep one mapping of a plain file open for everything reading it.
+
+    Open this before starting worker processes: forked workers inherit
+    the mapping and read their byte ranges from it without reopening the
+    file. Workers started by other methods map the file themselves.
+    """
+    key = os.path.abspath(file_path)
+    if key in _SHARED_MAPPINGS or is_compressed(file_path):
+        yield
+        return
+
+    with map_file(file_path) as mapping:
+        if mapping is None:
+            yield
+            return
+        _SHARED_MAPPINGS[key] = mapping
+        try:
+            yield
+        finally:
+            del _SHARED_MAPPINGS[key]
+
+
+def iter_text_lines(file_path: str, start: int = 0, end: Optional[int] = None,
+                    encoding: str = 'utf-8') -> Iterator[str]:
+    """
+    Yield decoded lines (including the trailing newline) from a byte range.
+
+    Plain files are memory-mapped; line boundaries are found in the mapped
+    bytes and each block of whole lines is decoded straight from the
+    mapping with one call, instead of reading and decoding line by line.
+    A line belongs to the range in which it starts, so consecutive ranges
+    produced by split_ranges() together yield every line exactly once.
+
+    Args:
+        file_path: Path to the file
+        start: Byte offset of the first line (must be at a line start)
+        end: Stop before any line starting at or after this offset
+        encoding: Text encoding in which b'\\n' only ever encodes a newline (e.g. UTF-8)
+
+    Yields:
+        Lines as str
+    """
+    blocks = _iter_blocks(file_path, start, end, encoding)
+    return chain.from_iterable(_split_lines(text) for _, text in blocks)
+
+
+def iter_text_lines_with_offsets(file_path: str, start: int = 0, end: Optional[int] = None,
+                                 encoding: str = 'utf-8',
+                                 skip_partial: bool = False) -> Iterator[Tuple[str, int]]:
+    """
+    Like iter_text_lines(), also yielding the byte offset just past each line.
+
+    Args:
+        file_path: Path to the file
+        start: Byte offset of the first line (must be at a line start)
+        end: Stop before any line starting at or after this offset
+        encoding: Text encoding in which b'\\n' only ever encodes a newline (e.g. UTF-8)
+        skip_partial: Leave out a last line without a newline (it may
+            still be being written)
+
+    Yields:
+        Tuples of (line, byte offset just past the line)
+    """
+    blocks = _iter_blocks(file_path, start, end, encoding)
+    return chain.from_iterable(_line_offsets(position, text, encoding, skip_partial)
+                               for position, text in blocks)
+
+
+def _line_offsets(position: int, text: str, encoding: str, skip_partial: bool) -> Iterator[Tuple[str, int]]:
+    """Pair the lines of a block with their end offsets, computed without a Python-level loop"""
+    lines = _split_lines(text)
+    if skip_partial and lines and not lines[-1].endswith('\n'):
+        lines.pop()
+    if text.isascii():
+        sizes = map(len, lines)
+    else:
+        sizes = map(len, map(methodcaller('encode', encoding), lines))
+    return zip(lines, map(position.__add__, accumulate(sizes)))
+
+
+def read_head(file_path: str, size: int) -> bytes:
+    """Return the first `size` (decompressed) bytes of a file"""
+    with open_file(file_path, 'rb') as f:
+        return f.read(size)
+
+
+def _split_lines(text: str) -> List[str]:
+    """Split text on newlines (LF or CRLF), keeping the line ends"""
+    breaks = _ASCII_LINE_BREAKS if text.isascii() else _OTHER_LINE_BREAKS
+    if not any(char in text for char in breaks) and text.count('\r') == text.count('\r\n'):
+        # Fast path: splitlines() breaks nowhere else in this text
+        return text.splitlines(True)
+    parts = text.split('\n')
+    lines = [part + '\n' for part in parts[:-1]]
+    if parts[-1]:
+        lines.append(parts[-1])
+    return lines
+
+
+def _iter_blocks(file_path: str, start: int, end: Optional[int], encoding: str,
+                 block_bytes: int = DEFAULT_BLOCK_BYTES) -> Iterator[Tuple[int, str]]:
+    """Yield (byte offset, decoded text) of newline-aligned blocks of whole lines"""
+    if end is not None and end <= start:
+        return
+    if is_compressed(file_path):
+        yield from _iter_stream_blocks(file_path, start, end, encoding, block_bytes)
+        return
+
+    with map_file(file_path) as mapping:
+        if mapping is None:
+            return
+        size = len(mapping)
+        limit = size
+        if end is not None and end < size:
+            # The line holding byte end - 1 is the last one starting before `end`
+            newline = mapping.find(b'\n', end - 1)
+            limit = size if newline < 0 else newline + 1
+
+        with memoryview(mapping) as view:
+            position = start
+            while position < limit:
+                block_end = min(position + block_bytes, limit)
+                if block_end < limit:
+                    newline = mapping.rfind(b'\n', position, block_end)
+                    if newline < 0:
+                        # A line longer than the block
+                        newline = mapping.find(b'\n', block_end, limit)
+                    block_end = limit if newline < 0 else newline + 1
+                yield position, str(view[position:block_end], encoding)
+                position = block_end
+
+
+def _iter_stream_blocks(file_path: str, start: int, end: Optional[int], encoding: str,
+                        block_bytes: int) -> Iterator[Tuple[int, str]]:
+    """_iter_blocks() for compressed files, read through the decompressor"""
+    with open_file(file_path, 'rb') as f:
+        f.seek(start)
+        position = start
+        carry = b''
+        while end is None or position < end:
+            data = f.read(block_bytes)
+            if not data:
+                if carry:
+                    yield position, _trim_block(carry, position, end).decode(encoding)
+                return
+            data = carry + data
+            cut = data.rfind(b'\n') + 1
+            block, carry = data[:cut], data[cut:]
+            if block:
+                block = _trim_block(block, position, end)
+                yield position, block.decode(encoding)
+                position += len(block)
+
+
+def _trim_block(block: bytes, position: int, end: Optional[int]) -> bytes:
+    """Cut a block at position `position` after its last line starting before `end`"""
+    if end is None or position + len(block) <= end:
+        return block
+    newline = block.find(b'\n', end - 1 - position)
+    return block if newline < 0 else block[:newline + 1]
+
+
+def split_ranges(file_path: str, start: int = 0,
+                 range_bytes: int = DEFAULT_RANGE_BYTES) -> List[Tuple[int, int]]:
+    """
+    Split a file into newline-aligned byte ranges of roughly equal size.
+
+    Args:
+        file_path: Path to the file
+        start: Offset where record lines begin (e.g. after a CSV header)
+        range_bytes: Target size of each range
+
+    Returns:
+        List of (start, end) offsets covering [start, file size)
+    """
+    range_bytes = max(range_bytes, 1)
+    ranges = []
+    with map_file(file_path) as mapping:
+        size = len(mapping) if mapping is not None else 0
+        while start < size:
+            target = start + range_bytes
+            if target >= size:
+                end = size
+            else:
+                # Advance to the byte after the next newline
+                newline = mapping.find(b'\n', target)
+                end = size if newline < 0 else newline + 1
+            ranges.append((start, end))
+            start = end
+    return ranges
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Record streams as tuples in a column order declared once per stream
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Sequence
+
+
+class Rows:
+    """
+    The records of one stream as value tuples, with their column order declared up front.
+
+    Parsers whose columns are known before any record is parsed (a CSV
+    header, a log format) produce Rows, and the loader inserts the tuples
+    as they are: no dictionary is built and no key looked up per record.
+    Iterating a Rows yields dictionaries, so it can also be passed
+    wherever a stream of dictionary records is expected.
+    """
+
+    __slots__ = ('columns', 'rows')
+
+    def __init__(self, columns: Sequence[str], rows: Iterable[Sequence[Any]]):
+        """
+        Args:
+            columns: Column names, in the order of the row values
+            rows: One value sequence per record (consumed once)
+        """
+        self.columns: List[str] = list(columns)
+        self.rows = rows
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield the records as dictionaries"""
+        columns = self.columns
+        for row in self.rows:
+            yield dict(zip(columns, row))
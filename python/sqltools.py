@@ -5,17 +5,35 @@ SQL Tools - Multi-format file query tool with plugin architecture
 """
 
 import argparse
+import contextlib
+import os
 import sys
+from typing import Dict, List, Optional, Union
 from core.registry import registry
 from core.engine import SQLEngine
+from core.lazy import LazyEngine, ENGINES, lazy_available
+from core.schema import SchemaInference, DEFAULT_BATCH_SIZE
+from core.cache import TableCache, file_fingerprint, DEFAULT_CACHE_MAX_BYTES
+from core.result_cache import DEFAULT_RESULT_CACHE_BYTES
+from core.storage import DEFAULT_PAGE_SIZE, DEFAULT_DB_CACHE_BYTES, DEFAULT_MMAP_BYTES
+from core.incremental import LogFollower
+from core.parallel import iter_records_parallel, iter_rows_parallel, resolve_workers
+from core.indexing import parse_index_spec
+from core.fileset import is_file_set, expand_file_set, SOURCE_COLUMN
+from core.nested import explode_records, PARENT_ID_COLUMN
+from core.pushdown import Pushdown, plan_pushdown
+from core.output import write_results, OUTPUT_FORMATS, OUTPUT_FETCH_SIZE
 from parsers.json_parser import JSONParser
+from parsers.ndjson_parser import NDJSONParser
 from parsers.csv_parser import CSVParser
 from parsers.nginx_parser import NginxParser
+from parsers.flatten import Flattener, DEFAULT_FLATTEN_DEPTH
 
 
 def register_builtin_parsers():
     """Register built-in parsers"""
     registry.register(JSONParser)
+    registry.register(NDJSONParser)
     registry.register(CSVParser)
     registry.register(NginxParser)
 
@@ -32,52 +50,462 @@ def list_formats():
     print()
 
 
-def query_file(file_path: str, table_name: str = None, format_override: str = None, sql_query: str = None):
-    """
-    Main function: Load file and start SQL query REPL
+def build_indexes(engine: SQLEngine, parser, table_name: str, indexes, auto_index: bool):
+    """Create requested/automatic indexes, exiting on unknown columns"""
+    if not indexes and not auto_index:
+        return
+    try:
+        engine.index_table(table_name, indexes, auto_index, parser.index_hints)
+    except ValueError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
 
-    Args:
-        file_path: Path to file to query
-        table_name: Custom table name (auto-generated if None)
-        format_override: Force specific format parser
-        sql_query: SQL query to execute directly (non-interactive mode)
-    """
-    # Find appropriate parser
-    parser = registry.find_parser_for_file(file_path, format_override)
 
+def find_parser(file_path: str, format_override: str = None, log_format: str = None):
+    """Find the parser for a file, or None if there is none"""
+    if log_format:
+        try:
+            parser = registry.get_parser('nginx', log_format=log_format)
+        except ValueError as e:
+            print(f"错误: 无效的 log_format: {e}")
+            sys.exit(1)
+        return parser if parser.supports_format(file_path) else None
+    return registry.find_parser_for_file(file_path, format_override)
+
+
+def resolve_parser(file_path: str, format_override: str = None, log_format: str = None):
+    """Find the parser for a file, exiting if there is none"""
+    parser = find_parser(file_path, format_override, log_format)
     if not parser:
         print(f"错误: 未找到适合该文件的解析器: {file_path}")
         print("使用 --list-formats 查看支持的格式")
         sys.exit(1)
+    return parser
+
 
-    print(f"检测到格式: {parser.get_display_name()}")
+def resolve_file_set(pattern: str, format_override: str = None, log_format: str = None):
+    """
+    Expand a directory or glob into the files of one format, exiting if none match.
 
-    # Load data
-    data = parser.load(file_path)
+    The format is taken from the first file (oldest rotation first) that
+    has a parser; files the parser does not support are left out.
 
-    if not data:
-        print("错误: 未能从文件加载任何数据")
+    Returns:
+        Tuple of (parser, file paths)
+    """
+    candidates = expand_file_set(pattern)
+    parser = next(filter(None, (find_parser(path, format_override, log_format) for path in candidates)), None)
+    if not parser:
+        print(f"错误: 未找到可解析的文件: {pattern}")
+        print("使用 --list-formats 查看支持的格式")
         sys.exit(1)
+    return parser, [path for path in candidates if parser.supports_format(path)]
+
+
+def open_records(parser, file_path: str, workers: int):
+    """
+    Records of a file, parsed by `workers` processes when supported.
+
+    Parsers with `supports_rows` produce tuples (parsers.rows.Rows), the
+    others dictionaries.
+    """
+    parallel = workers > 1 and parser.supports_parallel
+    if parser.supports_rows:
+        return iter_rows_parallel(parser, file_path, workers) if parallel else parser.iter_rows(file_path)
+    if parallel:
+        return iter_records_parallel(parser, file_path, workers)
+    return parser.iter_records(file_path)
 
-    # Generate table name if not provided
-    if not table_name:
-        table_name = parser.get_table_name(file_path)
 
-    # Create engine and load data
-    engine = SQLEngine()
-    engine.load_data(data, table_name)
+def apply_pushdown(engine: Union[SQLEngine, LazyEngine], sql_query: str, streamed, indexes) -> Dict[str, Pushdown]:
+    """
+    Hand the columns and filters of a one-shot query to the parsers that support it.
+
+    Args:
+        engine: Engine holding any tables that are already loaded or registered
+        sql_query: The query that will run after loading
+        streamed: (parser, file path, table name) of the files about to be parsed
+        indexes: Requested indexes, whose columns must be kept
+
+    Returns:
+        Pushdown per table name that received one
+    """
+    tables = {}
+    if engine.cursor:
+        # Tables loaded already, including attached cache databases
+        engine.cursor.execute("PRAGMA database_list")
+        for schema in [row[1] for row in engine.cursor.fetchall()]:
+            engine.cursor.execute(f"SELECT name FROM [{schema}].sqlite_master WHERE type = 'table'")
+            for (name,) in engine.cursor.fetchall():
+                tables.setdefault(name, [col['name'] for col in SchemaInference.get_table_info(engine.cursor, name)])
+    for parser, path, name in streamed:
+        columns = parser.get_columns(path) if parser.supports_pushdown else None
+        if columns:
+            tables[name] = columns
+
+    required = {name: {column for index in indexes for column in index} for name in tables}
+    plans = plan_pushdown(sql_query, tables, required)
+
+    pushed = {}
+    for parser, _, name in streamed:
+        if name in plans and parser.supports_pushdown:
+            parser.set_pushdown(plans[name])
+            pushed[name] = plans[name]
+            print(f"下推到表 '{name}': {plans[name].describe()}")
+    return pushed
+
+
+def finish_pushdown(engine: SQLEngine, parser, file_path: str, table_name: str, count: int,
+                    batch_size: int, workers: int) -> None:
+    """
+    Validate a table loaded with pushdown, reloading it in full if needed.
+
+    Column types are inferred from the loaded rows, so when the dropped
+    rows would have given a column another type the query could behave
+    differently; the file is then loaded again without pushdown.
+    """
+    pushdown = parser.pushdown
+    parser.set_pushdown(None)
+    if not count:
+        # Nothing matched the filters: the query sees an empty table
+        columns = [c for c in parser.get_columns(file_path) if pushdown.columns is None or c in pushdown.columns]
+        # Sorted, as the columns of a loaded table are
+        SchemaInference.create_table(engine.cursor, table_name, sorted(columns), {c: 'TEXT' for c in columns})
+        engine.conn.commit()
+        return
+
+    column_types = {col['name']: col['type'] for col in SchemaInference.get_table_info(engine.cursor, table_name)}
+    if not pushdown.types_match(column_types):
+        print(f"表 '{table_name}' 中被过滤的行会改变列类型, 重新完整加载")
+        engine.load_stream(open_records(parser, file_path, workers), table_name, batch_size)
+
+
+def open_lazy(parsers, file_paths: List[str], table_names: List[str], file_sets,
+              sql_query: Optional[str]) -> LazyEngine:
+    """
+    Register every input as a virtual table of a lazy engine.
+
+    Args:
+        parsers: Parser per input
+        file_paths: Inputs as given
+        table_names: Table name per input
+        file_sets: Member files per input, or None for a single file
+        sql_query: One-shot query to push columns and filters down from (None = no pushdown)
+    """
+    engine = LazyEngine()
+    singles = []
+    for parser, path, name, members in zip(parsers, file_paths, table_names, file_sets):
+        if members is not None:
+            engine.register_file(parser, members, name, {SOURCE_COLUMN: None})
+        else:
+            singles.append((parser, path, name))
+
+    if sql_query and singles:
+        apply_pushdown(engine, sql_query, singles, [])
+    for parser, path, name in singles:
+        engine.register_file(parser, [path], name)
+    return engine
+
+
+def unique_table_names(names: List[str]) -> List[str]:
+    """Suffix repeated table names with _2, _3, ... so every file gets its own table"""
+    used = set()
+    result = []
+    for name in names:
+        candidate, suffix = name, 1
+        while candidate in used:
+            suffix += 1
+            candidate = f"{name}_{suffix}"
+        used.add(candidate)
+        result.append(candidate)
+    return result
+
+
+def query_file(file_path: Union[str, List[str]], table_name: str = None, format_override: str = None,
+               sql_query: Union[str, List[str]] = None,
+               batch_size: int = DEFAULT_BATCH_SIZE, cache: Optional[TableCache] = None,
+               rebuild_cache: bool = False, db_path: str = None, follow: bool = False,
+               workers: int = 1, log_format: str = None, infer_limit: int = None,
+               index_spec: str = None, auto_index: bool = False,
+               output_format: str = 'json', output_path: str = None, pushdown: bool = True,
+               engine_name: str = 'materialize', flatten_depth: int = DEFAULT_FLATTEN_DEPTH,
+               explode: Optional[List[str]] = None,
+               result_cache_bytes: int = DEFAULT_RESULT_CACHE_BYTES,
+               page_size: int = DEFAULT_PAGE_SIZE, db_cache_bytes: int = DEFAULT_DB_CACHE_BYTES,
+               mmap_bytes: int = DEFAULT_MMAP_BYTES, query_workers: Optional[int] = None):
+    """
+    Main function: Load file(s) and start SQL query REPL
+
+    Every file is loaded into its own table of one database, so queries
+    can join across files. Files that need parsing are loaded concurrently.
+    A directory or glob pattern loads all its files into a single table.
+    With `db_path` and no files, the tables of an earlier run are queried.
+
+    Args:
+        file_path: Path, or list of paths, of the files (or file sets) to query
+        table_name: Custom table name (single file only; auto-generated if None)
+        format_override: Force specific format parser
+        sql_query: SQL query, or list of queries, to execute directly
+            (non-interactive mode); several queries run concurrently
+        batch_size: Number of rows inserted per transaction
+        cache: Persistent table cache (disabled if None)
+        rebuild_cache: Ignore and overwrite an existing cache entry
+        db_path: Build into this on-disk database; logs are appended incrementally
+            and tables of unchanged files are reused
+        follow: Keep ingesting new log lines in the background during the REPL
+        workers: Number of parser processes (0 = all CPU cores)
+        log_format: nginx log_format string (implies the nginx parser)
+        infer_limit: Rows analyzed for column types (None = all rows)
+        index_spec: Indexes to create, e.g. 'status,path' or 'status+path'
+        auto_index: Create indexes chosen from load-time column statistics
+        output_format: Result format for sql_query (see core.output.OUTPUT_FORMATS)
+        output_path: Write query results to this file instead of stdout
+        pushdown: Let parsers skip columns and rows sql_query cannot use
+        engine_name: 'materialize' loads the files into SQLite; 'lazy' reads
+            them in place on every query (see core.lazy.LazyEngine)
+        flatten_depth: Levels of nested JSON objects turned into dotted
+            columns; deeper values are stored as JSON text
+        explode: Array columns of JSON files loaded into child tables
+            (`<table>_<column>`, joined on _parent_id = _record_id)
+        result_cache_bytes: Results of repeated REPL queries kept in memory (0 = none)
+        page_size: Page size of a new on-disk database
+        db_cache_bytes: SQLite page cache of the on-disk database
+        mmap_bytes: Memory-mapped I/O size of the on-disk database
+        query_workers: Queries run at the same time when several are given
+            (None = all CPU cores)
+    """
+    file_paths = [file_path] if isinstance(file_path, str) else list(file_path)
+    if table_name and len(file_paths) > 1:
+        raise ValueError("table_name can only be given for a single file")
+    queries = [sql_query] if isinstance(sql_query, str) else list(sql_query or [])
+    # Only a single query is pushed down to the parsers
+    sql_query = queries[0] if len(queries) == 1 else None
+
+    progress = contextlib.ExitStack()
+    if queries and output_format != 'json' and not output_path:
+        # Keep stdout clean for piping: progress messages go to stderr
+        progress.enter_context(contextlib.redirect_stdout(sys.stderr))
+
+    with progress:
+        # Find appropriate parsers; a file set shares one parser and table
+        parsers = []
+        file_sets = []
+        for path in file_paths:
+            if is_file_set(path):
+                if follow:
+                    print(f"错误: 目录或通配符输入不支持 --follow: {path}")
+                    sys.exit(1)
+                parser, members = resolve_file_set(path, format_override, log_format)
+                print(f"检测到格式: {parser.get_display_name()} ({path}, {len(members)} 个文件)")
+            else:
+                parser, members = resolve_parser(path, format_override, log_format), None
+                if len(file_paths) > 1:
+                    print(f"检测到格式: {parser.get_display_name()} ({path})")
+                else:
+                    print(f"检测到格式: {parser.get_display_name()}")
+
+            if follow and not parser.supports_tail:
+                print(f"错误: {parser.get_display_name()} 格式不支持 --follow")
+                sys.exit(1)
+            parser.set_flattener(Flattener(flatten_depth))
+            parsers.append(parser)
+            file_sets.append(members)
+
+        # Generate table names if not provided
+        if table_name:
+            table_names = [table_name]
+        else:
+            table_names = unique_table_names([
+                parser.get_table_name(path if members is None else members[0])
+                for parser, path, members in zip(parsers, file_paths, file_sets)
+            ])
+
+        tailed = []
+        if engine_name == 'lazy' and not lazy_available():
+            print("提示: 未安装 apsw, --engine lazy 不可用, 改为加载到 SQLite (pip install apsw)")
+            engine_name = 'materialize'
+
+        if engine_name == 'lazy':
+            # Query the files in place: nothing is loaded up front
+            engine = open_lazy(parsers, file_paths, table_names, file_sets, sql_query if pushdown else None)
+        else:
+            engine = SQLEngine(db_path, result_cache_bytes, page_size, db_cache_bytes, mmap_bytes)
+            if db_path and not file_paths:
+                # Reopen a database built earlier: nothing to parse
+                engine.open_database(db_path, read_only=False)
+                table_names = engine.list_tables()
+                print(f"已打开数据库 {db_path}: {', '.join(table_names) or '没有表'}")
+            loaded = engine.loaded_tables() if db_path else None
+            fingerprints = {}
+            reused = []
+            indexes = parse_index_spec(index_spec) if index_spec else []
+            cache_options = {'indexes': indexes, 'auto_index': auto_index, 'infer_limit': infer_limit}
+            workers = resolve_workers(workers)
+
+            streamed = []
+            merged = []
+            cache_keys = {}
+            for i, (parser, path, name, members) in enumerate(zip(parsers, file_paths, table_names, file_sets)):
+                exploding = bool(explode) and parser.flattener is not None
+                if exploding and (members is not None or (db_path and parser.supports_tail)):
+                    print(f"警告: 增量或多文件加载不支持 --explode, {path} 的数组保存为 JSON 文本")
+                    exploding = False
+
+                if members is not None:
+                    # Load every file of the set into one table, skipping files loaded before
+                    engine.ingest_files(parser, members, name, batch_size, workers)
+
+                    if not SchemaInference.table_exists(engine.cursor, name):
+                        print(f"错误: 未能从文件加载任何数据: {path}")
+                        sys.exit(1)
+                    merged.append((parser, path, name))
+                    continue
+
+                if db_path and parser.supports_tail:
+                    # Append only the lines written since the last run
+                    engine.ingest_tail(parser, path, name, batch_size)
+
+                    if not SchemaInference.table_exists(engine.cursor, name):
+                        print(f"错误: 未能从文件加载任何数据: {path}")
+                        sys.exit(1)
+                    tailed.append((parser, path, name))
+                    continue
+
+                # Reuse a cached database for an unchanged file (the cache does
+                # not keep the child tables of exploded arrays)
+                cacheable = cache and not db_path and not exploding
+                cache_key = cache.fingerprint(path, parser, name, cache_options) if cacheable else None
+                cached_path = cache.lookup(cache_key) if cache_key and not rebuild_cache else None
+                if cached_path:
+                    engine.attach_database(cached_path, f"cache_{i}")
+                    print(f"已从缓存打开表 '{name}': {cached_path}")
+                    continue
+
+                cache_keys[name] = cache_key
+                if exploding:
+                    parser.set_flattener(Flattener(flatten_depth, explode))
+
+                if loaded is not None:
+                    # Reuse the table if an earlier run loaded this file unchanged
+                    fingerprint = file_fingerprint(path, parser, name, {'infer_limit': infer_limit})
+                    if loaded.lookup(name) == fingerprint:
+                        print(f"表 '{name}' 已在数据库中且文件未变化, 跳过解析")
+                        reused.append((parser, path, name))
+                        continue
+                    loaded.forget(name)
+                    fingerprints[name] = fingerprint
+                streamed.append((parser, path, name))
+
+            pushed = {}
+            if pushdown and sql_query and streamed and not db_path and not cache and infer_limit is None:
+                # One-shot query: parse only the columns and rows it can use
+                pushed = apply_pushdown(engine, sql_query, streamed, indexes)
+
+            if streamed:
+                # Stream data into the database; independent files are parsed concurrently
+                sources = []
+                children = []
+                for parser, path, name in streamed:
+                    records = open_records(parser, path, workers)
+                    if parser.flattener is not None and parser.flattener.explode:
+                        # Array elements stream into child tables alongside the parent
+                        split = explode_records(records, name, sorted(parser.flattener.explode), batch_size)
+                        sources.extend(split)
+                        children.extend(child_name for child_name, _ in split[1:])
+                    else:
+                        sources.append((name, records))
+                counts = engine.load_streams(sources, batch_size, infer_limit=infer_limit)
+                for child_name in children:
+                    if counts[child_name]:
+                        engine.index_table(child_name, [[PARENT_ID_COLUMN]])
+                for parser, path, name in streamed:
+                    if name in pushed:
+                        finish_pushdown(engine, parser, path, name, counts[name], batch_size, workers)
+                    elif not counts[name]:
+                        print(f"错误: 未能从文件加载任何数据: {path}")
+                        sys.exit(1)
+                    if name in fingerprints:
+                        loaded.record(name, os.path.abspath(path), fingerprints[name], counts[name])
+
+            for parser, _, name, *_ in tailed + merged + streamed + reused:
+                build_indexes(engine, parser, name, indexes, auto_index)
+
+            for name, cache_key in cache_keys.items():
+                if cache_key:
+                    cache.store(cache_key, engine, name)
 
     # Execute query or start REPL
-    if sql_query:
-        results = engine.execute_query(sql_query)
-        if results is not None:
-            import json
-            print(json.dumps(results, indent=2, ensure_ascii=False))
+    failed = False
+    if len(queries) > 1:
+        if output_path:
+            with open(output_path, 'w', encoding='utf-8', newline='') as out:
+                failed = not run_queries(engine, queries, output_format, out, query_workers)
+        else:
+            try:
+                failed = not run_queries(engine, queries, output_format, sys.stdout, query_workers)
+            except BrokenPipeError:
+                sys.stdout = open(os.devnull, 'w')
+    elif sql_query:
+        batches = engine.execute_batches(sql_query, OUTPUT_FETCH_SIZE)
+        if batches is not None:
+            columns = engine.get_column_names()
+            if output_path:
+                with open(output_path, 'w', encoding='utf-8', newline='') as out:
+                    write_results(batches, columns, output_format, out)
+            else:
+                try:
+                    write_results(batches, columns, output_format, sys.stdout)
+                except BrokenPipeError:
+                    # Reader (e.g. head) went away; stop quietly
+                    sys.stdout = open(os.devnull, 'w')
     else:
-        engine.run_repl(table_name)
+        followers = []
+        if follow:
+            for parser, path, name in tailed:
+                follower = LogFollower(db_path, parser, path, name, batch_size)
+                follower.start()
+                followers.append(follower)
+                print(f"正在后台追踪 {path} 的新增内容")
+        try:
+            engine.run_repl(table_names[0] if table_names else "data")
+        finally:
+            for follower in followers:
+                follower.stop()
 
     # Cleanup
     engine.close()
+    if failed:
+        sys.exit(1)
+
+
+def run_queries(engine: Union[SQLEngine, LazyEngine], queries: List[str], output_format: str,
+                out, workers: Optional[int]) -> bool:
+    """
+    Run several queries concurrently and write their results in query order.
+
+    A result is written as soon as it and every result before it are
+    complete. A header line naming the query, and any error, goes to
+    stderr.
+
+    Returns:
+        True if every query succeeded
+    """
+    completed = {}
+    position = 0
+    succeeded = True
+    for result in engine.execute_many(queries, workers):
+        completed[result['index']] = result
+        while position in completed:
+            result = completed.pop(position)
+            position += 1
+            print(f"-- 查询 {position}/{len(queries)} ({result['seconds']:.3f}s): {result['sql']}",
+                  file=sys.stderr)
+            if result['error'] is not None:
+                print(f"错误: {result['error']}", file=sys.stderr)
+                succeeded = False
+            elif result['rows'] is not None:
+                write_results([result['rows']], result['columns'], output_format, out)
+    return succeeded
 
 
 def main():
@@ -89,30 +517,185 @@ def main():
                "  %(prog)s access.log --table nginx_logs\n"
                "  %(prog)s data.csv --format csv\n"
                "  %(prog)s data.json --query 'SELECT COUNT(*) FROM data'\n"
+               "  %(prog)s access.log --cache-dir ~/.cache/sqltools --query 'SELECT COUNT(*) FROM access'\n"
+               "  %(prog)s access.log customers.csv --query 'SELECT c.name, COUNT(*) FROM access a "
+               "JOIN customers c ON a.remote_addr = c.ip GROUP BY c.name'\n"
+               "  %(prog)s 'logs/access.log*' --db access.db --query 'SELECT _source_file, COUNT(*) FROM access GROUP BY 1'\n"
+               "  %(prog)s --db access.db --query 'SELECT status, COUNT(*) FROM access GROUP BY 1'\n"
+               "  %(prog)s --db access.db -q 'SELECT COUNT(*) FROM access' -q 'SELECT MAX(request_time) FROM access'\n"
+               "  %(prog)s events.ndjson --explode items --query 'SELECT e.\"user.id\", i.sku FROM events e "
+               "JOIN events_items i ON i._parent_id = e._record_id'\n"
+               "  %(prog)s huge.log --engine lazy --query 'SELECT * FROM huge WHERE status = 500 LIMIT 10'\n"
                "  %(prog)s --list-formats",
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
 
     parser.add_argument(
         "file",
-        nargs="?",
-        help="要查询的文件路径"
+        nargs="*",
+        help="要查询的文件路径, 可指定多个, 每个文件加载为一张表; "
+             "目录或通配符 (需加引号, 如 'logs/access.log*') 的全部文件加载为同一张表"
     )
     parser.add_argument(
         "--table", "-t",
         default=None,
-        help="自定义表名 (默认: 从文件名自动生成)"
+        help="自定义表名, 仅限单个文件 (默认: 从文件名自动生成)"
     )
     parser.add_argument(
         "--format", "-f",
         dest="format_override",
-        choices=['json', 'csv', 'nginx'],
+        choices=['json', 'ndjson', 'csv', 'nginx'],
         help="强制指定格式解析器 (默认: 自动检测)"
     )
+    parser.add_argument(
+        "--log-format",
+        default=None,
+        help="Nginx 日志的 log_format 定义, 如 '$remote_addr [$time_local] \"$request\" $status $request_time' "
+             "(默认: combined)"
+    )
     parser.add_argument(
         "--query", "-q",
         dest="sql_query",
-        help="直接执行SQL查询 (非交互模式)"
+        action="append",
+        help="直接执行SQL查询 (非交互模式); 可重复指定, 多个只读查询在独立连接上并发执行, 结果按指定顺序输出"
+    )
+    parser.add_argument(
+        "--query-workers",
+        type=int,
+        default=0,
+        help="多个 --query 同时执行的数量, 0 表示使用全部 CPU 核心 (默认: 0)"
+    )
+    parser.add_argument(
+        "--output-format", "-F",
+        choices=OUTPUT_FORMATS,
+        default="json",
+        help="--query 结果的输出格式, 边查询边输出 (默认: json)"
+    )
+    parser.add_argument(
+        "--output", "-o",
+        dest="output_path",
+        default=None,
+        help="将 --query 结果写入文件而非标准输出"
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=DEFAULT_BATCH_SIZE,
+        help=f"每个事务批量插入的行数 (默认: {DEFAULT_BATCH_SIZE})"
+    )
+    parser.add_argument(
+        "--index",
+        dest="index_spec",
+        default=None,
+        help="加载后创建索引, 逗号分隔, '+' 表示联合索引, 如 'status,path' 或 'status+path'"
+    )
+    parser.add_argument(
+        "--auto-index",
+        action="store_true",
+        help="根据加载时的列统计信息自动为常用过滤列和低基数列创建索引"
+    )
+    parser.add_argument(
+        "--infer-rows",
+        type=int,
+        default=None,
+        help="用于推断列类型的行数 (默认: 全部行, 类型按所有值拓宽)"
+    )
+    parser.add_argument(
+        "--workers", "-j",
+        type=int,
+        default=1,
+        help="并行解析的进程数, 0 表示使用全部 CPU 核心 (默认: 1, 支持 CSV、NDJSON 和 Nginx 日志)"
+    )
+    parser.add_argument(
+        "--no-pushdown",
+        dest="pushdown",
+        action="store_false",
+        help="--query 时仍加载所有列和行 (默认只解析查询用到的列, 并在插入前丢弃不满足简单 WHERE 条件的行)"
+    )
+    parser.add_argument(
+        "--engine",
+        dest="engine_name",
+        choices=ENGINES,
+        default="materialize",
+        help="materialize: 先把文件加载到 SQLite 再查询 (默认); "
+             "lazy: 不加载, 查询时按需读取文件, 遇到 LIMIT 可提前结束 (需要 apsw, 每次查询都重新读取文件)"
+    )
+    parser.add_argument(
+        "--flatten-depth",
+        type=int,
+        default=DEFAULT_FLATTEN_DEPTH,
+        help="JSON 嵌套对象展开为列的层数, 列名用点连接, 如 user.geo.country; "
+             f"更深的对象和数组保存为 JSON 文本, 可用 json_extract() 查询 (默认: {DEFAULT_FLATTEN_DEPTH})"
+    )
+    parser.add_argument(
+        "--explode",
+        default=None,
+        help="将 JSON 数组列拆分到子表, 逗号分隔, 如 'items,order.lines'; 子表名为 <表名>_<列名>, "
+             "通过 _parent_id = _record_id 与主表关联 (不使用缓存)"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=os.environ.get("SQLTOOLS_CACHE_DIR"),
+        help="缓存已加载数据库的目录 (默认: 环境变量 SQLTOOLS_CACHE_DIR, 未设置则不缓存)"
+    )
+    parser.add_argument(
+        "--cache-max-size",
+        type=int,
+        default=DEFAULT_CACHE_MAX_BYTES // (1024 * 1024),
+        help="缓存目录总大小上限 (MB), 超出时按最近最少使用淘汰"
+    )
+    parser.add_argument(
+        "--cache-hash",
+        action="store_true",
+        help="缓存键中包含文件内容的 SHA-256 (更可靠但需读取整个文件)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="本次运行不使用缓存"
+    )
+    parser.add_argument(
+        "--rebuild-cache",
+        action="store_true",
+        help="忽略已有缓存, 重新解析文件并覆盖缓存"
+    )
+    parser.add_argument(
+        "--result-cache-size",
+        type=int,
+        default=DEFAULT_RESULT_CACHE_BYTES // (1024 * 1024),
+        help="交互模式下缓存重复查询结果的内存上限 (MB), 数据变化时自动失效, 0 表示不缓存 "
+             f"(默认: {DEFAULT_RESULT_CACHE_BYTES // (1024 * 1024)})"
+    )
+    parser.add_argument(
+        "--db",
+        dest="db_path",
+        default=None,
+        help="使用磁盘数据库文件 (WAL 模式) 而非内存数据库, 内存占用受 SQLite 缓存大小限制; "
+             "再次运行时 Nginx 和 NDJSON 日志只追加新增的行, 未变化的文件不再解析; 不指定文件时直接查询已有数据库"
+    )
+    parser.add_argument(
+        "--db-cache-size",
+        type=int,
+        default=DEFAULT_DB_CACHE_BYTES // (1024 * 1024),
+        help=f"--db 数据库的 SQLite 页缓存 (MB) (默认: {DEFAULT_DB_CACHE_BYTES // (1024 * 1024)})"
+    )
+    parser.add_argument(
+        "--db-mmap-size",
+        type=int,
+        default=DEFAULT_MMAP_BYTES // (1024 * 1024),
+        help=f"--db 数据库内存映射读取的大小 (MB), 0 表示不使用 (默认: {DEFAULT_MMAP_BYTES // (1024 * 1024)})"
+    )
+    parser.add_argument(
+        "--db-page-size",
+        type=int,
+        choices=[2 ** n for n in range(9, 17)],
+        default=DEFAULT_PAGE_SIZE,
+        help=f"新建 --db 数据库的页大小 (字节) (默认: {DEFAULT_PAGE_SIZE})"
+    )
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="交互模式下在后台持续导入日志新增的行 (需要 --db)"
     )
     parser.add_argument(
         "--list-formats",
@@ -130,12 +713,40 @@ def main():
         list_formats()
         return
 
-    # Require file argument for normal operation
-    if not args.file:
+    # Require file argument for normal operation (--db alone reopens a database)
+    if not args.file and not args.db_path:
         parser.error("需要参数: file")
+    if not args.file and not os.path.isfile(args.db_path):
+        parser.error(f"数据库文件不存在: {args.db_path}")
+    if not args.file and args.follow:
+        parser.error("--follow 需要指定日志文件")
+
+    if args.table and len(args.file) > 1:
+        parser.error("--table 只能用于单个文件")
+
+    if args.follow and not args.db_path:
+        parser.error("--follow 需要同时指定 --db")
+
+    if args.engine_name == 'lazy' and (args.db_path or args.index_spec or args.auto_index or args.explode):
+        parser.error("--engine lazy 不能与 --db、--index、--auto-index 或 --explode 同时使用")
+
+    if args.flatten_depth < 1:
+        parser.error("--flatten-depth 至少为 1")
+
+    cache = None
+    if args.cache_dir and not args.no_cache:
+        cache = TableCache(args.cache_dir, args.cache_max_size * 1024 * 1024, args.cache_hash)
 
     # Run query
-    query_file(args.file, args.table, args.format_override, args.sql_query)
+    query_file(args.file, args.table, args.format_override, args.sql_query,
+               args.batch_size, cache, args.rebuild_cache, args.db_path, args.follow,
+               args.workers, args.log_format, args.infer_rows,
+               args.index_spec, args.auto_index, args.output_format, args.output_path,
+               args.pushdown, args.engine_name, args.flatten_depth,
+               args.explode.split(',') if args.explode else None,
+               args.result_cache_size * 1024 * 1024,
+               args.db_page_size, args.db_cache_size * 1024 * 1024, args.db_mmap_size * 1024 * 1024,
+               args.query_workers or None)
 
 
 if __name__ == "__main__":
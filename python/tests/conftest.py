@@ -0,0 +1,40 @@
+"""Shared fixtures: make the core and parsers packages importable"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.engine import SQLEngine  # noqa: E402
+
+
+@pytest.fixture
+def engine():
+    """In-memory engine without a result cache, closed after the test"""
+    sql_engine = SQLEngine(result_cache_bytes=0)
+    yield sql_engine
+    sql_engine.close()
+
+
+@pytest.fixture
+def write_file(tmp_path):
+    """Write text to a file under tmp_path and return its path"""
+    def write(name, text):
+        path = tmp_path / name
+        path.write_text(text, encoding='utf-8')
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def log_lines():
+    """Build nginx combined-format lines numbered start..stop-1 (path /p<n>, bytes n)"""
+    def lines(start, stop):
+        return ''.join(
+            f'10.0.0.{n % 9} - - [10/Oct/2023:00:{n // 60 % 60:02d}:{n % 60:02d} +0000] '
+            f'"GET /p{n} HTTP/1.1" 200 {n} "-" "curl/7.68.0"\n'
+            for n in range(start, stop)
+        )
+    return lines
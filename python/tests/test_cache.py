@@ -0,0 +1,95 @@
+"""Keys and entries of the persistent table cache (core.cache)"""
+
+import os
+
+import pytest
+
+import sqltools
+from core.cache import TableCache, file_fingerprint
+from parsers.csv_parser import CSVParser
+from parsers.nginx_parser import NginxParser
+
+
+@pytest.fixture
+def csv_path(write_file):
+    return write_file('data.csv', 'id,name\n1,a\n2,b\n')
+
+
+def test_key_is_stable_for_an_unchanged_file(csv_path):
+    assert file_fingerprint(csv_path, CSVParser(), 'data') == file_fingerprint(csv_path, CSVParser(), 'data')
+
+
+def test_key_changes_with_the_file(csv_path):
+    before = file_fingerprint(csv_path, CSVParser(), 'data')
+    with open(csv_path, 'a', encoding='utf-8') as f:
+        f.write('3,c\n')
+    assert file_fingerprint(csv_path, CSVParser(), 'data') != before
+
+
+def test_hash_detects_change_with_same_size_and_mtime(csv_path):
+    stat = os.stat(csv_path)
+    before = file_fingerprint(csv_path, CSVParser(), 'data', use_hash=True)
+    with open(csv_path, 'w', encoding='utf-8') as f:
+        f.write('id,name\n1,x\n2,b\n')
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert file_fingerprint(csv_path, CSVParser(), 'data') == file_fingerprint(csv_path, CSVParser(), 'data')
+    assert file_fingerprint(csv_path, CSVParser(), 'data', use_hash=True) != before
+
+
+@pytest.mark.parametrize('changed', [
+    {'table_name': 'other'},
+    {'options': {'indexes': [['id']]}},
+    {'options': {'auto_index': True}},
+    {'options': {'infer_limit': 10}},
+])
+def test_key_changes_with_load_options(csv_path, changed):
+    base = {'table_name': 'data', 'options': {'indexes': [], 'auto_index': False, 'infer_limit': None}}
+    options = dict(base, **changed)
+    if 'options' in changed:
+        options['options'] = dict(base['options'], **changed['options'])
+    assert (file_fingerprint(csv_path, CSVParser(), **base)
+            != file_fingerprint(csv_path, CSVParser(), **options))
+
+
+def test_key_changes_with_parser_and_its_options(write_file):
+    path = write_file('access.log', '')
+    combined = file_fingerprint(path, NginxParser(), 'access')
+    custom = file_fingerprint(path, NginxParser('$remote_addr $status'), 'access')
+    assert combined != custom
+    assert combined != file_fingerprint(path, CSVParser(), 'access')
+
+
+def test_store_lookup_and_evict(tmp_path, engine):
+    cache = TableCache(str(tmp_path / 'cache'), max_bytes=1)
+    engine.load_data([{'id': 1}], 'a')
+    engine.load_data([{'id': 2}], 'b')
+
+    first = cache.store('key-a', engine, 'a')
+    assert cache.lookup('key-a') == first
+    second = cache.store('key-b', engine, 'b')
+    # Over max_bytes: everything but the entry just stored is evicted
+    assert cache.lookup('key-a') is None
+    assert cache.lookup('key-b') == second
+    assert cache.lookup('missing') is None
+
+
+def run_cached(path, cache_dir, capsys, infer_limit=None):
+    """One-shot query through the cache; returns the progress output"""
+    sqltools.register_builtin_parsers()
+    cache = TableCache(cache_dir)
+    sqltools.query_file(path, 'data', sql_query='SELECT count(*) FROM data', cache=cache,
+                        infer_limit=infer_limit, output_format='csv', output_path=os.devnull)
+    return capsys.readouterr().out
+
+
+def test_second_run_is_served_from_cache(csv_path, tmp_path, capsys):
+    cache_dir = str(tmp_path / 'cache')
+    assert '已从缓存打开表' not in run_cached(csv_path, cache_dir, capsys)
+    assert '已从缓存打开表' in run_cached(csv_path, cache_dir, capsys)
+
+
+def test_infer_limit_is_part_of_the_cache_key(csv_path, tmp_path, capsys):
+    cache_dir = str(tmp_path / 'cache')
+    run_cached(csv_path, cache_dir, capsys)
+    assert '已从缓存打开表' not in run_cached(csv_path, cache_dir, capsys, infer_limit=10)
+    assert '已从缓存打开表' in run_cached(csv_path, cache_dir, capsys, infer_limit=10)
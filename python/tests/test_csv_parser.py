@@ -0,0 +1,80 @@
+"""CSV column typing (parsers.csv_parser)"""
+
+import pytest
+
+from parsers.csv_parser import CSVParser, CONVERT_BATCH_ROWS
+from parsers.reader import split_ranges
+
+
+def load_csv(engine, path, table='data'):
+    engine.load_stream(CSVParser().iter_rows(path), table)
+
+
+def test_first_batch_types_columns(engine, write_file):
+    path = write_file('t.csv', 'id,amt,zip,word\n1,1.5,007,a\n2,,010,b\n')
+    load_csv(engine, path)
+    rows = engine.execute_query("SELECT typeof(id), typeof(amt), typeof(zip), typeof(word) FROM data")
+    assert rows == [('integer', 'real', 'text', 'text'), ('integer', 'null', 'text', 'text')]
+
+
+def test_integer_column_widens_to_real_after_first_batch(engine, write_file):
+    count = CONVERT_BATCH_ROWS + 1000
+    lines = ['v'] + [str(i) for i in range(count)] + ['1.5']
+    path = write_file('mix.csv', '\n'.join(lines) + '\n')
+    load_csv(engine, path, 'mix')
+
+    assert engine.execute_query("SELECT count(*) FROM mix WHERE v > 500") == [(count - 501,)]
+    assert engine.execute_query("SELECT count(*) FROM mix WHERE typeof(v) = 'text'") == [(0,)]
+    assert engine.execute_query("SELECT v FROM mix WHERE v < 2 ORDER BY v") == [(0,), (1,), (1.5,)]
+
+
+def test_text_after_first_batch_keeps_numbers(write_file):
+    count = CONVERT_BATCH_ROWS + 10
+    lines = ['k,v'] + [f'x,{i}' for i in range(count)] + ['x,n/a', 'x,2.5', 'x,']
+    path = write_file('mix.csv', '\n'.join(lines) + '\n')
+    values = [row[1] for row in CSVParser().iter_rows(path).rows]
+
+    assert values[:count] == list(range(count))
+    assert values[count:] == ['n/a', 2.5, None]
+
+
+def test_repeated_and_empty_header_names_are_made_unique(engine, write_file):
+    path = write_file('dup.csv', 'a,a,b,,A,a_1\n1,2,3,4,5,6\n')
+    assert CSVParser().get_columns(path) == ['a', 'a_1', 'b', 'column_4', 'A_2', 'a_1_1']
+
+    load_csv(engine, path, 'dup')
+    assert engine.execute_query("SELECT a, a_1, b, column_4, A_2, a_1_1 FROM dup") == [(1, 2, 3, 4, 5, 6)]
+
+
+@pytest.mark.parametrize('values, expected', [
+    (['1', '-2', '0', ''], [1, -2, 0, None]),
+    (['1.5', '2', '-3e2', '.5', '1E+3'], [1.5, 2.0, -300.0, 0.5, 1000.0]),
+    (['007', '1'], ['007', '1']),
+    (['+7', '1'], ['+7', '1']),
+    (['+7', '3', '1.5'], ['+7', '3', '1.5']),
+    (['-0', '1'], ['-0', '1']),
+    (['-0.5', '-0e1', '1'], [-0.5, -0.0, 1.0]),
+    (['1_000', '2'], ['1_000', '2']),
+    ([' 7', '1'], [' 7', '1']),
+    (['nan', '1.5'], ['nan', '1.5']),
+    (['inf', '2'], ['inf', '2']),
+    (['9223372036854775807', '1'], [9223372036854775807, 1]),
+    (['9223372036854775808', '1'], [9223372036854775808.0, 1.0]),
+    (['', ''], ['', '']),
+    (['a', '1'], ['a', '1']),
+])
+def test_column_type_rules(values, expected, write_file):
+    path = write_file('t.csv', 'k,v\n' + ''.join(f'x,{value}\n' for value in values))
+    assert [row[1] for row in CSVParser().iter_rows(path).rows] == expected
+
+
+def test_ranges_convert_like_a_whole_file(write_file):
+    lines = ['id,amt'] + [f'{i},{i / 4}' for i in range(500)]
+    path = write_file('t.csv', '\n'.join(lines) + '\n')
+    parser = CSVParser()
+    whole = list(parser.iter_rows(path).rows)
+
+    body_start = parser.prepare_ranges(path)
+    ranges = split_ranges(path, body_start, range_bytes=1000)
+    assert len(ranges) > 2
+    assert [row for start, end in ranges for row in parser.iter_rows_range(path, start, end).rows] == whole
@@ -0,0 +1,31 @@
+"""Load-time PRAGMAs of the in-memory engine (core.engine)"""
+
+import sqlite3
+
+import pytest
+
+
+def journal_mode(engine):
+    return engine.conn.execute("PRAGMA journal_mode").fetchone()[0]
+
+
+def test_journal_is_off_only_while_loading(engine):
+    seen = []
+
+    def records():
+        for i in range(5):
+            seen.append(journal_mode(engine))
+            yield {'v': i}
+
+    engine.load_stream(records(), 'data', batch_size=2, sample_size=1)
+    assert set(seen) == {'off'}
+    assert journal_mode(engine) == 'memory'
+    assert engine.conn.execute("PRAGMA synchronous").fetchone()[0] != 0
+
+
+def test_failed_write_after_a_load_rolls_back(engine):
+    engine.load_stream(({'v': i} for i in range(100)), 'data')
+    engine.execute_query("CREATE UNIQUE INDEX data_v ON data (v)")
+    with pytest.raises(sqlite3.IntegrityError):
+        engine.execute_query("UPDATE data SET v = 200 - v * 2")
+    assert engine.execute_query("SELECT sum(v) FROM data") == [(sum(range(100)),)]
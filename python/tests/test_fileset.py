@@ -0,0 +1,112 @@
+"""File sets of rotated logs loaded into one table (core.fileset)"""
+
+import gzip
+import os
+
+from core.engine import SQLEngine
+from core.fileset import expand_file_set, SOURCE_COLUMN
+from parsers.csv_parser import CSVParser
+from parsers.nginx_parser import NginxParser
+
+
+def write(path, text):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(text)
+
+
+def write_gzip(path, text):
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        f.write(text)
+
+
+def ingest(db_path, pattern, parser=None, table='access'):
+    """One run over the set: returns (new rows, sorted body_bytes_sent of all rows)"""
+    engine = SQLEngine(db_path, result_cache_bytes=0)
+    try:
+        count = engine.ingest_files(parser or NginxParser(), expand_file_set(pattern), table)
+        values = sorted(row[0] for row in engine.execute_query(f"SELECT body_bytes_sent FROM {table}"))
+    finally:
+        engine.close()
+    return count, values
+
+
+def test_rotated_files_sort_oldest_first(tmp_path):
+    names = ['access.log', 'access.log.1', 'access.log.2.gz', 'access.log.10.gz', 'error.log']
+    for name in names:
+        (tmp_path / name).write_bytes(b'')
+    (tmp_path / 'sub').mkdir()
+    assert [os.path.basename(p) for p in expand_file_set(str(tmp_path))] == [
+        'access.log.10.gz', 'access.log.2.gz', 'access.log.1', 'access.log', 'error.log']
+    assert [os.path.basename(p) for p in expand_file_set(str(tmp_path / 'access.log*'))] == [
+        'access.log.10.gz', 'access.log.2.gz', 'access.log.1', 'access.log']
+
+
+def test_rerun_skips_loaded_files(tmp_path, log_lines):
+    logs = tmp_path / 'logs'
+    logs.mkdir()
+    write(logs / 'access.log.1', log_lines(0, 10))
+    write(logs / 'access.log', log_lines(10, 15))
+    db_path = str(tmp_path / 'a.db')
+
+    assert ingest(db_path, str(logs)) == (15, list(range(15)))
+    assert ingest(db_path, str(logs)) == (0, list(range(15)))
+
+
+def test_rotation_loads_only_new_content(tmp_path, log_lines):
+    logs = tmp_path / 'logs'
+    logs.mkdir()
+    write(logs / 'access.log.1', log_lines(0, 10))
+    write(logs / 'access.log', log_lines(10, 15))
+    db_path = str(tmp_path / 'a.db')
+    ingest(db_path, str(logs))
+
+    # logrotate: .1 is compressed to .2.gz, the current log (with lines
+    # appended before rotating) becomes .1 and a new log starts
+    write_gzip(logs / 'access.log.2.gz', log_lines(0, 10))
+    os.remove(logs / 'access.log.1')
+    with open(logs / 'access.log', 'a', encoding='utf-8') as f:
+        f.write(log_lines(15, 18))
+    os.rename(logs / 'access.log', logs / 'access.log.1')
+    write(logs / 'access.log', log_lines(18, 20))
+
+    assert ingest(db_path, str(logs)) == (5, list(range(20)))
+
+
+def test_rows_record_their_source_file(tmp_path, log_lines):
+    write(tmp_path / 'a.log', log_lines(0, 2))
+    write(tmp_path / 'b.log', log_lines(2, 5))
+    engine = SQLEngine(result_cache_bytes=0)
+    engine.ingest_files(NginxParser(), expand_file_set(str(tmp_path / '*.log')), 'access')
+    rows = engine.execute_query(f"SELECT {SOURCE_COLUMN}, count(*) FROM access GROUP BY 1 ORDER BY 1")
+    engine.close()
+    assert [(os.path.basename(path), count) for path, count in rows] == [('a.log', 2), ('b.log', 3)]
+
+
+def test_changed_csv_replaces_its_earlier_rows(tmp_path):
+    write(tmp_path / 'a.csv', 'body_bytes_sent\n1\n2\n')
+    db_path = str(tmp_path / 'a.db')
+    assert ingest(db_path, str(tmp_path / '*.csv'), CSVParser(), 'data') == (2, [1, 2])
+
+    write(tmp_path / 'a.csv', 'body_bytes_sent\n1\n2\n3\n')
+    assert ingest(db_path, str(tmp_path / '*.csv'), CSVParser(), 'data') == (3, [1, 2, 3])
+
+
+def test_changed_csv_keeps_rows_of_other_files(tmp_path):
+    write(tmp_path / 'a.csv', 'body_bytes_sent\n1\n2\n')
+    write(tmp_path / 'b.csv', 'body_bytes_sent\n10\n')
+    db_path = str(tmp_path / 'a.db')
+    ingest(db_path, str(tmp_path / '*.csv'), CSVParser(), 'data')
+
+    write(tmp_path / 'a.csv', 'body_bytes_sent\n1\n2\n3\n')
+    assert ingest(db_path, str(tmp_path / '*.csv'), CSVParser(), 'data') == (3, [1, 2, 3, 10])
+    assert ingest(db_path, str(tmp_path / '*.csv'), CSVParser(), 'data') == (0, [1, 2, 3, 10])
+
+
+def test_renamed_and_changed_csv_replaces_its_earlier_rows(tmp_path):
+    write(tmp_path / 'a.csv', 'body_bytes_sent\n1\n2\n')
+    db_path = str(tmp_path / 'a.db')
+    ingest(db_path, str(tmp_path / '*.csv'), CSVParser(), 'data')
+
+    os.remove(tmp_path / 'a.csv')
+    write(tmp_path / 'b.csv', 'body_bytes_sent\n1\n2\n3\n')
+    assert ingest(db_path, str(tmp_path / '*.csv'), CSVParser(), 'data') == (3, [1, 2, 3])
@@ -0,0 +1,65 @@
+"""Incremental tail ingestion of growing logs (core.incremental)"""
+
+import os
+
+from core.engine import SQLEngine
+from parsers.nginx_parser import NginxParser
+
+
+def ingest(db_path, log_path, table='access'):
+    """One run: a fresh engine appends what is new, returning (new rows, all body_bytes_sent)"""
+    engine = SQLEngine(db_path, result_cache_bytes=0)
+    try:
+        count = engine.ingest_tail(NginxParser(), log_path, table)
+        values = [row[0] for row in engine.execute_query(f"SELECT body_bytes_sent FROM {table} ORDER BY rowid")]
+    finally:
+        engine.close()
+    return count, values
+
+
+def append(path, text):
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(text)
+
+
+def test_only_appended_lines_are_loaded(tmp_path, log_lines):
+    db_path, log_path = str(tmp_path / 'a.db'), str(tmp_path / 'access.log')
+    append(log_path, log_lines(0, 50))
+    assert ingest(db_path, log_path) == (50, list(range(50)))
+    assert ingest(db_path, log_path) == (0, list(range(50)))
+
+    append(log_path, log_lines(50, 70))
+    assert ingest(db_path, log_path) == (20, list(range(70)))
+
+
+def test_partial_last_line_waits_for_its_newline(tmp_path, log_lines):
+    db_path, log_path = str(tmp_path / 'a.db'), str(tmp_path / 'access.log')
+    line = log_lines(10, 11)
+    append(log_path, log_lines(0, 10) + line[:30])
+    assert ingest(db_path, log_path) == (10, list(range(10)))
+
+    append(log_path, line[30:])
+    assert ingest(db_path, log_path) == (1, list(range(11)))
+
+
+def test_rotated_log_is_finished_before_the_new_file(tmp_path, log_lines):
+    db_path, log_path = str(tmp_path / 'a.db'), str(tmp_path / 'access.log')
+    append(log_path, log_lines(0, 10))
+    ingest(db_path, log_path)
+
+    # Lines written just before rotation, then a fresh file
+    append(log_path, log_lines(10, 15))
+    os.rename(log_path, log_path + '.1')
+    append(log_path, log_lines(15, 20))
+    assert ingest(db_path, log_path) == (10, list(range(20)))
+
+
+def test_truncated_log_is_read_from_the_start(tmp_path, log_lines):
+    db_path, log_path = str(tmp_path / 'a.db'), str(tmp_path / 'access.log')
+    append(log_path, log_lines(0, 10))
+    ingest(db_path, log_path)
+
+    # copytruncate: same inode, shorter content
+    with open(log_path, 'w', encoding='utf-8') as f:
+        f.write(log_lines(100, 103))
+    assert ingest(db_path, log_path) == (3, list(range(10)) + [100, 101, 102])
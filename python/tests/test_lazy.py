@@ -0,0 +1,46 @@
+"""Lazy engine planning (core.lazy)"""
+
+import pytest
+
+from benchmarks.generators import generate_nginx_log
+from parsers.nginx_parser import NginxParser
+
+apsw = pytest.importorskip('apsw')
+
+from core.lazy import LazyEngine  # noqa: E402
+
+
+@pytest.fixture
+def lazy_engine(tmp_path):
+    path = str(tmp_path / 'access.log')
+    generate_nginx_log(path, 2000, 1)
+    engine = LazyEngine()
+    engine.register_file(NginxParser(), [path], 'access')
+    yield engine
+    engine.close()
+
+
+def test_row_estimate_is_close_to_line_count(lazy_engine):
+    assert 1800 <= lazy_engine.sources[0].estimated_rows() <= 2200
+
+
+def test_subquery_join_is_materialized_not_rerun(lazy_engine):
+    sql_query = ("SELECT count(*) FROM access a "
+                 "JOIN (SELECT DISTINCT status s FROM access) t ON a.status = t.s")
+    plan = [detail for _, _, _, detail in lazy_engine.explain_query(sql_query)]
+    assert any('AUTOMATIC' in detail for detail in plan)
+    assert lazy_engine.execute_query(sql_query) == [(2000,)]
+
+
+def test_repl_commands_run_on_the_lazy_engine(lazy_engine, capsys):
+    lazy_engine.run_meta_command('.profile on')
+    lazy_engine.execute_query("SELECT count(*) FROM access WHERE status = 200")
+    lazy_engine.print_query_report(lazy_engine.last_query)
+    lazy_engine.run_meta_command('.explain')
+    lazy_engine.run_meta_command('.loadtime')
+    lazy_engine.run_meta_command('.cache')
+    output = capsys.readouterr().out
+    assert '查询计划' in output
+    assert '全表扫描: access' in output
+    assert '没有加载计时' in output
+    assert '结果缓存未启用' in output
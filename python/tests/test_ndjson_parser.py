@@ -0,0 +1,32 @@
+"""Where the NDJSON parser reports lines it cannot decode"""
+
+import pytest
+
+from parsers.ndjson_parser import NDJSONParser
+
+
+def test_bad_lines_reported_by_line_number(write_file, capsys):
+    path = write_file('d.ndjson', '{"a": 1}\n{bad\n[1]\n{"a": 2}\n')
+    records = [record for record, _ in NDJSONParser().iter_records_from(path)]
+    assert records == [{'a': 1}, {'a': 2}]
+    output = capsys.readouterr().out
+    assert '警告: 无法解析第 2 行' in output
+    assert '警告: 第 3 行不是 JSON 对象' in output
+
+
+def test_bad_lines_after_an_offset_reported_by_offset(write_file, capsys):
+    head = '{"a": 1}\n{"a": 2}\n'
+    path = write_file('d.ndjson', head + '{bad\n[1]\n')
+    start = len(head)
+    assert list(NDJSONParser().iter_records_from(path, start)) == []
+    output = capsys.readouterr().out
+    assert f'警告: 无法解析偏移 {start} 字节处的行' in output
+    assert f'警告: 偏移 {start + 5} 字节处的行不是 JSON 对象' in output
+
+
+def test_undecodable_file_exits_with_a_message(tmp_path, capsys):
+    path = tmp_path / 'd.ndjson'
+    path.write_bytes(b'{"a": "\xff"}\n')
+    with pytest.raises(SystemExit):
+        list(NDJSONParser().iter_records_from(str(path)))
+    assert '读取JSON文件错误' in capsys.readouterr().out
@@ -0,0 +1,51 @@
+"""nginx log_format compilation and where the parser reports lines it cannot parse"""
+
+import pytest
+
+from parsers.nginx_format import LogFormatParser
+from parsers.nginx_parser import NginxParser
+
+
+def test_unparsable_line_reported_by_line_number(write_file, log_lines, capsys):
+    path = write_file('access.log', log_lines(0, 3) + 'garbage\n' + log_lines(3, 5))
+    rows = list(NginxParser().iter_rows(path).rows)
+    assert len(rows) == 5
+    assert '警告: 无法解析第 4 行' in capsys.readouterr().out
+
+
+def test_unparsable_line_in_range_reported_by_offset(write_file, log_lines, capsys):
+    head = log_lines(0, 3)
+    path = write_file('access.log', head + log_lines(3, 5) + 'garbage\n' + log_lines(5, 6))
+    start = len(head.encode())
+    bad = len((head + log_lines(3, 5)).encode())
+    rows = list(NginxParser().iter_rows_range(path, start, None).rows)
+    assert len(rows) == 3
+    assert f'警告: 无法解析偏移 {bad} 字节处的行' in capsys.readouterr().out
+
+
+def test_unparsable_line_in_tail_reported_by_offset(write_file, log_lines, capsys):
+    head = log_lines(0, 2)
+    path = write_file('access.log', head + 'garbage\n')
+    records = list(NginxParser().iter_records_from(path, len(head.encode())))
+    assert records == []
+    output = capsys.readouterr().out
+    assert f'警告: 无法解析偏移 {len(head.encode())} 字节处的行' in output
+    assert '第 1 行' not in output
+
+
+@pytest.mark.parametrize('log_format, message', [
+    ('$remote_addr $status $remote_addr', '变量 $remote_addr 出现了多次'),
+    ('$Status $status', '变量 $status 出现了多次'),
+    ('$method "$request"', '$request 拆分出的 method 列与变量 $method 重名'),
+    ('"$request" $path', '变量 $path 与 $request 拆分出的 path 列重名'),
+])
+def test_log_format_with_repeated_columns_is_rejected(log_format, message):
+    with pytest.raises(ValueError, match=message.replace('$', r'\$')):
+        LogFormatParser(log_format)
+
+
+def test_log_format_columns():
+    parser = LogFormatParser('$remote_addr "$request" $status $request_time')
+    assert parser.columns == ['remote_addr', 'request', 'method', 'path', 'protocol', 'status', 'request_time']
+    assert parser.parse('1.2.3.4 "GET /a HTTP/1.1" 200 0.5') == (
+        '1.2.3.4', 'GET /a HTTP/1.1', 'GET', '/a', 'HTTP/1.1', 200, 0.5)
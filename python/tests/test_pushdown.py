@@ -0,0 +1,99 @@
+"""Projection and filter pushdown give the same results as a full load (core.pushdown)"""
+
+import json
+
+import pytest
+
+import sqltools
+from benchmarks.generators import generate_nginx_log
+from parsers.csv_parser import CONVERT_BATCH_ROWS
+
+CSV_TEXT = """id,name,score,city,code,flag
+1,alice,3.5,Paris,007,1
+2,bob,,Berlin,010,0
+3,carol,7,,100,1
+4,dave,10.25,paris,x1,
+5,Eve,-2,Rome,5,1
+6,frank,0,Berlin,05,0
+7,grace,1e3,Paris_1,,1
+8,heidi,abc,100%,7,0
+"""
+
+
+@pytest.fixture(autouse=True)
+def parsers():
+    sqltools.register_builtin_parsers()
+
+
+def run_query(path, sql_query, pushdown, tmp_path, capsys, table='data'):
+    """Run a one-shot query; return the result and the progress output"""
+    out = tmp_path / f"result-{pushdown}.json"
+    sqltools.query_file(path, table, sql_query=sql_query, output_format='json-compact',
+                        output_path=str(out), pushdown=pushdown)
+    return json.loads(out.read_text(encoding='utf-8')), capsys.readouterr().out
+
+
+def assert_same_results(path, sql_query, tmp_path, capsys, table='data'):
+    expected, _ = run_query(path, sql_query, False, tmp_path, capsys, table)
+    actual, progress = run_query(path, sql_query, True, tmp_path, capsys, table)
+    assert actual == expected
+    return progress
+
+
+@pytest.mark.parametrize('where', [
+    "id = 3", "id == 3", "id != 3", "id <> 3", "id < 3", "id <= 3", "id > 3", "id >= 3",
+    "3 < id", "score > 1", "score <= 0", "score = 'abc'", "score > 'a'",
+    "name = 'bob'", "name > 'c'", "name < 'bob'", "code = '007'", "code = 7", "code > 5",
+    "city = 'Paris'", "city != 'Paris'",
+    "id IN (1, 3, 5)", "id NOT IN (1, 3, 5)", "name IN ('bob', 'Eve')", "code IN (7, '007')",
+    "id BETWEEN 2 AND 5", "score BETWEEN 0 AND 8", "name BETWEEN 'b' AND 'e'",
+    "name LIKE 'a%'", "city LIKE 'paris%'", "city LIKE '%\\_1'", "city NOT LIKE 'p%'", "city LIKE '100%'",
+    "city IS NULL", "city IS NOT NULL", "flag IS NULL", "score IS NOT NULL",
+    "id > 1 AND city = 'Berlin'", "flag = 1 AND score > 2 AND name LIKE '%a%'",
+])
+def test_csv_filters_match_full_load(where, write_file, tmp_path, capsys):
+    path = write_file('data.csv', CSV_TEXT)
+    progress = assert_same_results(path, f"SELECT * FROM data WHERE {where} ORDER BY id", tmp_path, capsys)
+    assert '下推到表' in progress
+
+
+@pytest.mark.parametrize('sql_query', [
+    "SELECT d.name FROM data AS d WHERE d.id > 2 ORDER BY d.id",
+    "SELECT name, score FROM data ORDER BY id",
+    "SELECT count(*) FROM data",
+    "SELECT count(*), sum(score) FROM data WHERE score > 100",
+    "SELECT * FROM data WHERE id > 3 OR name = 'bob' ORDER BY id",
+    "SELECT city, count(*) FROM data GROUP BY city ORDER BY city",
+    "SELECT * FROM data WHERE (id > 2) AND (id < 7) ORDER BY id",
+])
+def test_csv_queries_match_full_load(sql_query, write_file, tmp_path, capsys):
+    path = write_file('data.csv', CSV_TEXT)
+    assert_same_results(path, sql_query, tmp_path, capsys)
+
+
+def test_filter_matching_nothing_gives_empty_table(write_file, tmp_path, capsys):
+    path = write_file('data.csv', CSV_TEXT)
+    result, _ = run_query(path, "SELECT name FROM data WHERE id > 100", True, tmp_path, capsys)
+    assert result == {'columns': ['name'], 'rows': []}
+
+
+def test_dropped_rows_that_change_a_type_reload_the_file(write_file, tmp_path, capsys):
+    # The first batch types v as INTEGER; the dropped rows hold text
+    lines = ['k,v'] + [f"a,{i}" for i in range(CONVERT_BATCH_ROWS)] + [f"b,x{i}" for i in range(10)]
+    path = write_file('data.csv', '\n'.join(lines) + '\n')
+    sql_query = "SELECT count(*), max(v), typeof(max(v)) FROM data WHERE k = 'a' AND v >= 0"
+    progress = assert_same_results(path, sql_query, tmp_path, capsys)
+    assert '重新完整加载' in progress
+
+
+@pytest.mark.parametrize('where', [
+    "status = 404", "status >= 500", "status IN (200, 404)", "status BETWEEN 300 AND 499",
+    "path LIKE '/api/%'", "method = 'POST'", "body_bytes_sent < 1000",
+    "http_referer IS NULL", "status != 200 AND method != 'GET'",
+])
+def test_nginx_filters_match_full_load(where, tmp_path, capsys):
+    path = str(tmp_path / 'access.log')
+    generate_nginx_log(path, 500, 7)
+    sql_query = f"SELECT * FROM access WHERE {where} ORDER BY time_local, remote_addr, path"
+    progress = assert_same_results(path, sql_query, tmp_path, capsys, 'access')
+    assert '下推到表' in progress
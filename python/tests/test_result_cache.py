@@ -0,0 +1,62 @@
+"""Result cache keys and volatile query detection (core.result_cache)"""
+
+import pytest
+
+from core.result_cache import ResultCache, normalize_sql, is_cacheable
+
+
+@pytest.mark.parametrize('sql_query, expected', [
+    ('SELECT  *\n FROM   data ;', 'select * from data'),
+    ("select * from Data where name = 'Bob  X'", "select * from data where name = 'Bob  X'"),
+    ('SELECT "Mixed Case", [Other  Col] FROM t;  ', 'select "Mixed Case", [Other  Col] from t'),
+    ("SELECT 'it''s', `q`", "select 'it''s', `q`"),
+])
+def test_normalize_sql(sql_query, expected):
+    assert normalize_sql(sql_query) == expected
+
+
+@pytest.mark.parametrize('sql_query', [
+    'SELECT COUNT(*) FROM data',
+    "SELECT date(ts) FROM data",
+    "SELECT datetime(ts, 'unixepoch') FROM data",
+    "SELECT strftime('%Y', ts) FROM data",
+    "SELECT unixepoch(created) FROM data",
+    "SELECT julianday(a) - julianday(b) FROM data",
+    "SELECT * FROM data WHERE note = 'current_date random()'",
+    "SELECT current_date_column FROM data",
+    "SELECT date FROM data WHERE time > 5",
+])
+def test_deterministic_queries_are_cacheable(sql_query):
+    assert is_cacheable(sql_query)
+
+
+@pytest.mark.parametrize('sql_query', [
+    'SELECT random()',
+    'SELECT RANDOMBLOB(4)',
+    'SELECT changes(), total_changes(), last_insert_rowid()',
+    "SELECT date('now')",
+    "SELECT * FROM data WHERE ts > datetime('NOW', '-1 day')",
+    'SELECT current_timestamp',
+    'SELECT CURRENT_DATE, CURRENT_TIME',
+    'SELECT date()',
+    'SELECT datetime( )',
+    'SELECT time()',
+    'SELECT julianday()',
+    'SELECT unixepoch()',
+    "SELECT strftime('%s')",
+    "SELECT * FROM data WHERE day = date(  )",
+    "SELECT max(ts) - strftime('%s') FROM data",
+])
+def test_time_dependent_queries_are_not_cacheable(sql_query):
+    assert not is_cacheable(sql_query)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = ResultCache(max_bytes=500)
+    cache.put('a', ['x'], [(1,)] * 3)
+    cache.put('b', ['x'], [(2,)] * 3)
+    assert cache.get('a') == (['x'], [(1,)] * 3)
+    cache.put('c', ['x'], [(3,)] * 3)
+    assert cache.get('b') is None
+    assert cache.get('a') is not None
+    assert cache.stats()['evictions'] == 1
@@ -0,0 +1,74 @@
+"""Column typing of streamed loads (core.schema)"""
+
+from core.engine import SQLEngine
+from core.schema import TableStats
+from parsers.ndjson_parser import NDJSONParser
+
+
+def load(engine, values, table='data'):
+    """Load one column `v`, typed from the first two records"""
+    engine.load_stream(({'v': value} for value in values), table, batch_size=2, sample_size=2)
+    column_type = engine.execute_query(f"SELECT type FROM pragma_table_info('{table}')")[0][0]
+    rows = engine.execute_query(f"SELECT v, typeof(v) FROM {table} ORDER BY rowid")
+    return column_type, rows
+
+
+def test_real_values_keep_integer_column(engine, capsys):
+    column_type, rows = load(engine, [1, 2, 3, 1.5, 600])
+    assert column_type == 'INTEGER'
+    assert rows[3] == (1.5, 'real')
+    assert engine.execute_query("SELECT count(*) FROM data WHERE v > 2") == [(2,)]
+    assert '重建表' not in capsys.readouterr().out
+
+
+def test_non_numeric_text_keeps_numeric_column(engine, capsys):
+    column_type, rows = load(engine, [1, 2, 600, 'n/a', None])
+    assert column_type == 'INTEGER'
+    assert rows == [(1, 'integer'), (2, 'integer'), (600, 'integer'), ('n/a', 'text'), (None, 'null')]
+    # Numbers still compare as numbers
+    assert engine.execute_query("SELECT v FROM data WHERE v > 100 AND typeof(v) = 'integer'") == [(600,)]
+    assert '重建表' not in capsys.readouterr().out
+
+
+def test_numeric_looking_text_retypes_to_text(engine, capsys):
+    column_type, rows = load(engine, [1, 2, 3, '007'])
+    assert column_type == 'TEXT'
+    assert rows == [('1', 'text'), ('2', 'text'), ('3', 'text'), ('007', 'text')]
+    assert 'v INTEGER -> TEXT' in capsys.readouterr().out
+
+
+def test_numeric_looking_text_after_the_sample_keeps_its_digits(engine):
+    records = [{'v': i} for i in range(1500)] + [{'v': '007'}]
+    engine.load_stream(iter(records), 'x')
+    assert engine.execute_query("SELECT count(*) FROM x WHERE v = '007'") == [(1,)]
+    assert engine.execute_query("SELECT v FROM x ORDER BY rowid DESC LIMIT 1") == [('007',)]
+
+
+def test_numeric_looking_text_in_an_append_keeps_its_digits(tmp_path):
+    db_path, log_path = str(tmp_path / 'a.db'), str(tmp_path / 'data.ndjson')
+    with open(log_path, 'w', encoding='utf-8') as f:
+        f.write('{"v": 1}\n{"v": 2}\n')
+    engine = SQLEngine(db_path, result_cache_bytes=0)
+    try:
+        engine.ingest_tail(NDJSONParser(), log_path, 'data')
+        with open(log_path, 'a', encoding='utf-8') as f:
+            f.write('{"v": "007"}\n')
+        engine.ingest_tail(NDJSONParser(), log_path, 'data')
+        assert engine.execute_query("SELECT v FROM data ORDER BY rowid") == [('1',), ('2',), ('007',)]
+    finally:
+        engine.close()
+
+
+def test_numbers_after_null_sample_retype_to_integer(engine, capsys):
+    column_type, rows = load(engine, [None, None, 5, 10])
+    assert column_type == 'INTEGER'
+    assert rows[2:] == [(5, 'integer'), (10, 'integer')]
+    assert 'v TEXT -> INTEGER' in capsys.readouterr().out
+
+
+def test_stats_flag_numeric_text_only_after_numbers():
+    stats = TableStats()
+    stats.update(['a', 'b'], [('12', 1), ('x', 2)])
+    stats.update(['a', 'b'], [('y', ' 3.5 ')])
+    assert stats.numeric_text_columns() == {'b'}
+    assert stats.column_types() == {'a': 'TEXT', 'b': 'TEXT'}